@@ -50,6 +50,9 @@ contract Strategy is BaseStrategy {
 
     uint256 public immutable DECIMALS; // For toETH conversion
 
+    // Cached from ADDRESS_PROVIDER, anyone can refresh it with updatePriceOracle
+    IPriceOracle public priceOracle;
+
     // stkAAVE
     IERC20 public constant reward =
         IERC20(0x4da27a545c0c5B758a6BA100e3a049001de870f5); // Token we farm and swap to want / aToken
@@ -68,6 +71,7 @@ contract Strategy is BaseStrategy {
         IERC20(0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2);
 
     uint256 public constant VARIABLE_RATE = 2;
+    uint256 public constant FLASH_LOAN_PREMIUM = 9; // AAVE V2 FLASHLOAN_PREMIUM_TOTAL, in BPS
     uint16 public constant REFERRAL_CODE = 0;
 
     // Min Price we tollerate when swapping from stkAAVE to AAVE
@@ -84,14 +88,89 @@ contract Strategy is BaseStrategy {
     // Turn migration into noOP, prepareMigration does nothing when this is true
     bool public skipMigration = false;
 
+    // Harvest leaves rewards to build up until there's this much stkAAVE, see sellRewards
+    uint256 public minRewardsToSell = 0;
+
+    // Most stkAAVE sold at once, the 1% pool is low liquidity
+    uint256 public maxRewardsToSell = type(uint256).max;
+
     // Leverage
     uint256 public constant MAX_BPS = 10000;
     uint256 public minHealth = 1080000000000000000; // 1.08 with 18 decimals this is slighly above 70% tvl
     uint256 public minRebalanceAmount = 50000000; // 0.5 should be changed based on decimals (btc has 8)
 
+    // Target health band, 18 decimals, off (0, 0) by default: lever up to ltv, repay what drifts past it
+    // Once set, leverage is left alone while health is inside [lowerHealth, upperHealth]
+    // and brought back to the middle of the band, up or down, once it leaves it
+    uint256 public lowerHealth = 0;
+    uint256 public upperHealth = 0;
+
     // How many times should we loop around?
     uint256 public maxIterations = 5;
 
+    // Lever up and down with one flash loan instead of looping
+    bool public useFlashLoan = false;
+
+    // Rough gas of each part of harvest and tend, used to price them in the triggers
+    uint256 internal constant HARVEST_GAS = 250000; // Vault report and health check
+    uint256 internal constant TEND_GAS = 80000;
+    uint256 internal constant REWARDS_GAS = 450000; // Claim and the two swaps
+    uint256 internal constant DEPOSIT_GAS = 160000;
+    uint256 internal constant LEVER_STEP_GAS = 420000; // Borrow and deposit
+    uint256 internal constant REPAY_STEP_GAS = 330000; // Withdraw and repay
+    uint256 internal constant FLASH_LOAN_GAS = 600000; // Lever up in one go
+
+    event PriceOracleUpdated(address priceOracle);
+
+    // Every change of leverage, so indexers don't have to poll deposited / borrowed
+    // Health factors are the ones after the change, 18 decimals like AAVE's
+    event LeveredUp(uint256 amount, uint256 iterations, uint256 healthFactor);
+    event LeveredDown(uint256 amount, uint256 iterations, uint256 healthFactor);
+    event RepaidBelowHealth(
+        uint256 amount,
+        uint256 shortfall,
+        uint256 healthFactor
+    );
+    event RewardsSold(
+        uint256 stkAAVEAmount,
+        uint256 aaveAmount,
+        uint256 wantOut
+    );
+
+    // Everything keepers and dashboards need, see getState
+    struct StrategyState {
+        uint256 estimatedTotalAssets;
+        uint256 wantBalance;
+        uint256 deposited;
+        uint256 borrowed;
+        uint256 balanceOfRewards;
+        uint256 valueOfRewards;
+        uint256 canBorrow;
+        bool shouldRepay;
+        uint256 canRepay;
+        uint256 debtBelowHealth;
+        uint256 totalCollateralETH;
+        uint256 totalDebtETH;
+        uint256 availableBorrowsETH;
+        uint256 currentLiquidationThreshold;
+        uint256 ltv;
+        uint256 healthFactor;
+        uint256 vaultTotalDebt;
+        uint256 minHealth;
+        uint256 minRebalanceAmount;
+        uint256 maxIterations;
+    }
+
+    // Our position in AAVE, read once per call and then updated after each pool action
+    // so we only call AAVE to change it
+    struct Position {
+        uint256 deposited;
+        uint256 borrowed;
+        uint256 ltv;
+        uint256 liquidationThreshold;
+        uint256 vaultTotalDebt; // Only loaded by prepareReturn, which reports to the vault
+    }
+
     constructor(address _vault) public BaseStrategy(_vault) {
         // You can set these parameters on deployment to whatever you want
         maxReportDelay = 6300;
@@ -102,6 +181,8 @@ contract Strategy is BaseStrategy {
         ILendingPool lendingPool =
             ILendingPool(ADDRESS_PROVIDER.getLendingPool());
 
+        priceOracle = IPriceOracle(ADDRESS_PROVIDER.getPriceOracle());
+
         // Set lending pool as immutable
         LENDING_POOL = lendingPool;
 
@@ -126,9 +207,25 @@ contract Strategy is BaseStrategy {
     // Set min health, stkToAAVE conv, AAVE to Want Conv and minRebalanceAmount
     function setMinHealth(uint256 newMinHealth) external onlyVaultManagers {
         require(newMinHealth >= 1000000000000000000); // dev: minHealth
+        // Not above the band, setHealthBand wouldn't accept it
+        require(upperHealth == 0 || newMinHealth <= lowerHealth); // dev: healthBand
         minHealth = newMinHealth;
     }
 
+    // (0, 0) turns the band off
+    function setHealthBand(uint256 newLowerHealth, uint256 newUpperHealth)
+        external
+        onlyVaultManagers
+    {
+        require(
+            newUpperHealth == 0
+                ? newLowerHealth == 0
+                : newLowerHealth >= minHealth && newUpperHealth > newLowerHealth
+        ); // dev: healthBand
+        lowerHealth = newLowerHealth;
+        upperHealth = newUpperHealth;
+    }
+
     function setMinStkAAVEPrice(uint256 newMinStkAAVEPRice)
         external
         onlyVaultManagers
@@ -153,6 +250,29 @@ contract Strategy is BaseStrategy {
         minRebalanceAmount = newMinRebalanceAmount;
     }
 
+    function setMinRewardsToSell(uint256 newMinRewardsToSell)
+        external
+        onlyVaultManagers
+    {
+        minRewardsToSell = newMinRewardsToSell;
+    }
+
+    function setMaxRewardsToSell(uint256 newMaxRewardsToSell)
+        external
+        onlyVaultManagers
+    {
+        require(newMaxRewardsToSell > 0); // dev: maxRewardsToSell
+        maxRewardsToSell = newMaxRewardsToSell;
+    }
+
+    function setMaxIterations(uint256 newMaxIterations)
+        external
+        onlyVaultManagers
+    {
+        require(newMaxIterations > 0); // dev: maxIterations
+        maxIterations = newMaxIterations;
+    }
+
     // Should we harvest before migrate, should we check slippage on harvest?
     function setShouldHarvestBeforeMigrate(bool newHarvestBeforeMigrate)
         external
@@ -175,6 +295,11 @@ contract Strategy is BaseStrategy {
         skipMigration = newSkipMigration;
     }
 
+    // Should we use flash loans to lever up and down?
+    function setUseFlashLoan(bool newUseFlashLoan) external onlyVaultManagers {
+        useFlashLoan = newUseFlashLoan;
+    }
+
     // ******** OVERRIDE THESE METHODS FROM BASE CONTRACT ************
 
     function name() external view override returns (string memory) {
@@ -206,14 +331,20 @@ contract Strategy is BaseStrategy {
         // Get current amount of want // used to estimate profit
         uint256 beforeBalance = want.balanceOf(address(this));
 
-        // Claim stkAAVE -> swap into want
-        _claimRewardsAndGetMoreWant();
+        // Claim stkAAVE -> swap into want, once there's enough to be worth the swaps
+        if (balanceOfRewards() >= minRewardsToSell) {
+            _claimRewardsAndGetMoreWant(maxRewardsToSell);
+        }
 
-        (uint256 earned, uint256 lost) = _repayAAVEBorrow(beforeBalance);
+        Position memory position = _loadPosition();
+        position.vaultTotalDebt = vault.strategies(address(this)).totalDebt;
+
+        (uint256 earned, uint256 lost) =
+            _repayAAVEBorrow(beforeBalance, position);
 
         if (_debtOutstanding > 0) {
             // Get it all out
-            _divestFromAAVE();
+            _divestFromAAVE(position);
 
             // Repay debt
             uint256 maxRepay = want.balanceOf(address(this));
@@ -226,8 +357,7 @@ contract Strategy is BaseStrategy {
                 _debtPayment = _debtOutstanding;
                 // Profit has to be the amount above Vault.debt
                 // What's left is our profit
-                uint256 initialDebt =
-                    VaultAPI(vault).strategies(address(this)).totalDebt;
+                uint256 initialDebt = position.vaultTotalDebt;
 
                 // In repaying we may report a profit or a loss
                 // In this case we have profit
@@ -250,17 +380,18 @@ contract Strategy is BaseStrategy {
         }
     }
 
-    function _repayAAVEBorrow(uint256 beforeBalance)
-        internal
-        returns (uint256 _profit, uint256 _loss)
-    {
+    function _repayAAVEBorrow(
+        uint256 beforeBalance,
+        Position memory position
+    ) internal returns (uint256 _profit, uint256 _loss) {
         // Calculate Gain from AAVE interest // NOTE: This should never happen as we take more debt than we earn
-        uint256 currentWantInAave = deposited().sub(borrowed());
-        uint256 initialDeposit = vault.strategies(address(this)).totalDebt;
+        uint256 currentWantInAave = position.deposited.sub(position.borrowed);
+        uint256 initialDeposit = position.vaultTotalDebt;
         if (currentWantInAave > initialDeposit) {
             uint256 interestProfit = currentWantInAave.sub(initialDeposit);
             LENDING_POOL.withdraw(address(want), interestProfit, address(this));
             // Withdraw interest of aToken so that now we have exactly the same amount
+            position.deposited = position.deposited.sub(interestProfit);
         }
 
         uint256 afterBalance = want.balanceOf(address(this));
@@ -268,14 +399,33 @@ contract Strategy is BaseStrategy {
 
         // Pay off any debt
         // Debt is equal to negative of canBorrow
-        uint256 toRepay = debtBelowHealth();
+        uint256 toRepay =
+            _debtBelowHealth(
+                position.deposited,
+                position.borrowed,
+                position.ltv,
+                _healthFactor(
+                    position.deposited,
+                    position.borrowed,
+                    position.liquidationThreshold
+                )
+            );
         uint256 repayAmount = toRepay;
+        uint256 shortfall;
 
         if (toRepay > wantEarned) {
-            // We lost some money, and can only repay up to wantEarned
+            // Not enough earned (or rewards left to build up), repay what we have
             repayAmount = wantEarned;
-            // Repay all we can, rest is loss
-            _loss = toRepay.sub(repayAmount);
+            // The rest stays borrowed, adjustPosition or the next tend steps it down
+            // It's only lost when the collateral can't back it either
+            shortfall = toRepay.sub(repayAmount);
+            uint256 borrowedAfter = position.borrowed.sub(repayAmount);
+            if (borrowedAfter > position.deposited) {
+                _loss = Math.min(
+                    shortfall,
+                    borrowedAfter.sub(position.deposited)
+                );
+            }
             // Notice that once the strats starts loosing funds here, you should probably retire it as it's not profitable
         } else {
             // We made money or are even
@@ -290,27 +440,63 @@ contract Strategy is BaseStrategy {
                 VARIABLE_RATE,
                 address(this)
             );
+            position.borrowed = position.borrowed.sub(repayAmount).add(1);
+        }
+
+        if (toRepay > 0) {
+            emit RepaidBelowHealth(
+                repayAmount,
+                shortfall,
+                _healthFactor(
+                    position.deposited,
+                    position.borrowed,
+                    position.liquidationThreshold
+                )
+            );
         }
     }
 
     function adjustPosition(uint256 _debtOutstanding) internal override {
         // Do something to invest excess `want` tokens (from the Vault) into your positions
         // NOTE: Try to adjust positions so that `_debtOutstanding` can be freed up on *next* harvest (not immediately)
+        Position memory position = _loadPosition();
+
+        // Interest pushed the debt past ltv since we levered up, withdraw and repay back to it
+        uint256 toRepay = _driftToRepay(position);
+        if (toRepay > 0) {
+            uint256 repaid =
+                _stepDown(
+                    position.deposited,
+                    position.borrowed,
+                    toRepay,
+                    position.liquidationThreshold
+                );
+            position.deposited = position.deposited.sub(repaid);
+            position.borrowed = position.borrowed.sub(repaid).add(1);
+        }
+
         uint256 wantAvailable = want.balanceOf(address(this));
         if (wantAvailable > _debtOutstanding) {
             uint256 toDeposit = wantAvailable.sub(_debtOutstanding);
+
             LENDING_POOL.deposit(
                 address(want),
                 toDeposit,
                 address(this),
                 REFERRAL_CODE
             );
+            // AAVE rounds scaled balances, assume the worst by 1 wei
+            position.deposited = position.deposited.add(toDeposit).sub(1);
+        }
 
-            // Lever up
-            _invest();
+        // Lever up to the target even with nothing new to deposit, so tend alone keeps
+        // leverage tight between harvests. Not while the vault wants funds back
+        if (wantAvailable >= _debtOutstanding) {
+            _invest(position);
         }
     }
 
+    // Unclaimed rewards plus the stkAAVE and AAVE we hold and didn't sell yet
     function balanceOfRewards() public view returns (uint256) {
         // Get rewards
         address[] memory assets = new address[](2);
@@ -319,15 +505,20 @@ contract Strategy is BaseStrategy {
 
         uint256 totalRewards =
             INCENTIVES_CONTROLLER.getRewardsBalance(assets, address(this));
-        return totalRewards;
+        return
+            totalRewards.add(reward.balanceOf(address(this))).add(
+                AAVE_TOKEN.balanceOf(address(this))
+            );
     }
 
+    // Both prices in one call to the oracle
     function valueOfAAVEToWant(uint256 aaveAmount)
         public
         view
         returns (uint256)
     {
-        return ethToWant(AAVEToETH(aaveAmount));
+        (uint256 aavePrice, uint256 wantPrice) = _getPrices();
+        return _ethToWant(_AAVEToETH(aaveAmount, aavePrice), wantPrice);
     }
 
     function valueOfRewards() public view returns (uint256) {
@@ -390,15 +581,19 @@ contract Strategy is BaseStrategy {
         ROUTER.exactInput(fromAAVETowBTCParams);
     }
 
-    function _claimRewardsAndGetMoreWant() internal {
+    // Sell up to `maxToSell` stkAAVE, the rest waits for the next sale
+    function _claimRewardsAndGetMoreWant(uint256 maxToSell) internal {
         _claimRewards();
 
-        uint256 rewardsAmount = reward.balanceOf(address(this));
+        uint256 rewardsAmount =
+            Math.min(reward.balanceOf(address(this)), maxToSell);
 
         if (rewardsAmount == 0) {
             return;
         }
 
+        uint256 wantBefore = want.balanceOf(address(this));
+
         // Specify a min out
         uint256 minAAVEOut = rewardsAmount.mul(minStkAAVEPRice).div(MAX_BPS);
         _fromSTKAAVEToAAVE(rewardsAmount, minAAVEOut);
@@ -413,6 +608,12 @@ contract Strategy is BaseStrategy {
         }
 
         _fromAAVEToWant(aaveToSwap, minWantOut);
+
+        emit RewardsSold(
+            rewardsAmount,
+            aaveToSwap,
+            want.balanceOf(address(this)).sub(wantBefore)
+        );
     }
 
     function liquidatePosition(uint256 _amountNeeded)
@@ -424,8 +625,11 @@ contract Strategy is BaseStrategy {
         // NOTE: Maintain invariant `want.balanceOf(this) >= _liquidatedAmount`
         // NOTE: Maintain invariant `_liquidatedAmount + _loss <= _amountNeeded`
 
-        // Lever Down
-        _divestFromAAVE();
+        // Use idle want first, then lever down just enough for the rest
+        uint256 wantBalance = want.balanceOf(address(this));
+        if (_amountNeeded > wantBalance) {
+            _freeWant(_amountNeeded.sub(wantBalance), _loadPosition());
+        }
 
         uint256 totalAssets = want.balanceOf(address(this));
         if (_amountNeeded > totalAssets) {
@@ -439,16 +643,231 @@ contract Strategy is BaseStrategy {
     // Withdraw all from AAVE Pool
     function liquidateAllPositions() internal override returns (uint256) {
         // Repay all debt and divest
-        _divestFromAAVE();
+        _divestFromAAVE(_loadPosition());
 
         // Get rewards before leaving
-        _claimRewardsAndGetMoreWant();
+        _claimRewardsAndGetMoreWant(type(uint256).max);
 
         // Return amount freed
         return want.balanceOf(address(this));
     }
 
-    // NOTE: Can override `tendTrigger` and `harvestTrigger` if necessary
+    // Harvest when we have to (debt to pay, a loss, maxReportDelay), otherwise only when
+    // the rewards this harvest sells, the interest and the vault's credit are worth
+    // profitFactor times what this harvest costs
+    // NOTE: callCostInWei prices a plain harvest (HARVEST_GAS), like BaseStrategy's
+    // It's scaled to the path the harvest takes here, see harvestGasEstimate
+    function harvestTrigger(uint256 callCostInWei)
+        public
+        view
+        override
+        returns (bool)
+    {
+        StrategyParams memory params = vault.strategies(address(this));
+
+        if (params.activation == 0) {
+            return false;
+        }
+
+        uint256 sinceLastReport = block.timestamp.sub(params.lastReport);
+        if (sinceLastReport < minReportDelay) {
+            return false;
+        }
+        if (sinceLastReport >= maxReportDelay) {
+            return true;
+        }
+
+        if (vault.debtOutstanding() > debtThreshold) {
+            return true;
+        }
+
+        uint256 liquid =
+            want.balanceOf(address(this)).add(deposited()).sub(borrowed());
+        uint256 rewards = balanceOfRewards();
+        if (
+            liquid.add(valueOfAAVEToWant(rewards)).add(debtThreshold) <
+            params.totalDebt
+        ) {
+            return true;
+        }
+
+        // Only what prepareReturn sells counts, rewards under minRewardsToSell stay put
+        uint256 rewardsValue =
+            rewards > 0 && rewards >= minRewardsToSell
+                ? valueOfAAVEToWant(Math.min(rewards, maxRewardsToSell))
+                : 0;
+        uint256 interest =
+            liquid > params.totalDebt ? liquid.sub(params.totalDebt) : 0;
+        uint256 callCost =
+            ethToWant(
+                callCostInWei.mul(harvestGasEstimate()).div(HARVEST_GAS)
+            );
+
+        return
+            profitFactor.mul(callCost) <
+            vault.creditAvailable().add(interest).add(rewardsValue);
+    }
+
+    // Tend when interest pushed the debt past ltv, whatever the gas
+    // Or when the want we can put to work is worth profitFactor times the call cost
+    // NOTE: callCostInWei is the cost of the whole call, see tendGasEstimate
+    function tendTrigger(uint256 callCostInWei)
+        public
+        view
+        override
+        returns (bool)
+    {
+        Position memory position = _loadPosition();
+        if (_driftToRepay(position) > 0) {
+            return true;
+        }
+
+        uint256 toInvest =
+            want.balanceOf(address(this)).add(
+                _canBorrow(
+                    position.deposited,
+                    position.borrowed,
+                    position.ltv,
+                    position.liquidationThreshold,
+                    _healthFactor(
+                        position.deposited,
+                        position.borrowed,
+                        position.liquidationThreshold
+                    )
+                )
+            );
+        if (toInvest < minRebalanceAmount) {
+            return false;
+        }
+
+        uint256 callCost = ethToWant(callCostInWei);
+
+        return profitFactor.mul(callCost) < toInvest;
+    }
+
+    // Sell rewards when there's at least minRewardsToSell and the chunk we'd sell
+    // is worth profitFactor times the call cost
+    // NOTE: callCostInWei is the cost of the whole call, like the other triggers
+    function sellRewardsTrigger(uint256 callCostInWei)
+        public
+        view
+        returns (bool)
+    {
+        uint256 rewards = balanceOfRewards();
+        if (rewards == 0 || rewards < minRewardsToSell) {
+            return false;
+        }
+
+        uint256 callCost = ethToWant(callCostInWei);
+
+        return
+            profitFactor.mul(callCost) <
+            valueOfAAVEToWant(Math.min(rewards, maxRewardsToSell));
+    }
+
+    // Gas harvest takes now: selling rewards, repaying debt and the lever up iterations
+    function harvestGasEstimate() public view returns (uint256) {
+        uint256 gas = HARVEST_GAS;
+        uint256 rewards = balanceOfRewards();
+        if (rewards > 0 && rewards >= minRewardsToSell) {
+            gas = gas.add(REWARDS_GAS);
+        }
+
+        // adjustPosition deposits our want and the vault's credit
+        return
+            gas.add(
+                _adjustPositionGas(
+                    _loadPosition(),
+                    want.balanceOf(address(this)).add(vault.creditAvailable())
+                )
+            );
+    }
+
+    // Gas sellRewards takes: the claim, the two swaps and the deposit
+    function sellRewardsGasEstimate() public pure returns (uint256) {
+        return REWARDS_GAS.add(DEPOSIT_GAS);
+    }
+
+    // Gas tend takes now, see harvestGasEstimate
+    function tendGasEstimate() public view returns (uint256) {
+        return
+            TEND_GAS.add(
+                _adjustPositionGas(
+                    _loadPosition(),
+                    want.balanceOf(address(this))
+                )
+            );
+    }
+
+    // Same path as adjustPosition, counting gas instead of calling AAVE
+    function _adjustPositionGas(Position memory position, uint256 toDeposit)
+        internal
+        view
+        returns (uint256 gas)
+    {
+        // One step is enough for what interest adds
+        uint256 toRepay = _driftToRepay(position);
+        if (toRepay > 0) {
+            gas = REPAY_STEP_GAS;
+            position.deposited = position.deposited.sub(toRepay);
+            position.borrowed = position.borrowed.sub(toRepay);
+        }
+
+        if (toDeposit > 0) {
+            gas = gas.add(DEPOSIT_GAS);
+            position.deposited = position.deposited.add(toDeposit);
+        }
+
+        if (
+            !_shouldLeverUp(
+                _healthFactor(
+                    position.deposited,
+                    position.borrowed,
+                    position.liquidationThreshold
+                )
+            )
+        ) {
+            return gas;
+        }
+
+        if (useFlashLoan) {
+            uint256 toBorrow =
+                _flashBorrowAmount(
+                    position.deposited,
+                    position.borrowed,
+                    position.ltv,
+                    position.liquidationThreshold
+                );
+            if (toBorrow >= minRebalanceAmount) {
+                gas = gas.add(FLASH_LOAN_GAS);
+            }
+            return gas;
+        }
+
+        uint256 aBalance = position.deposited;
+        uint256 vBalance = position.borrowed;
+        for (uint256 i = 0; i < maxIterations; i++) {
+            uint256 toBorrow =
+                _borrowToTarget(
+                    aBalance,
+                    vBalance,
+                    position.ltv,
+                    position.liquidationThreshold,
+                    _healthFactor(
+                        aBalance,
+                        vBalance,
+                        position.liquidationThreshold
+                    )
+                );
+            if (toBorrow == 0) {
+                break;
+            }
+
+            aBalance = aBalance.add(toBorrow);
+            vBalance = vBalance.add(toBorrow);
+            gas = gas.add(LEVER_STEP_GAS);
+        }
+    }
 
     function prepareMigration(address _newStrategy) internal override {
         // Transfer any non-`want` tokens to the new strategy
@@ -461,11 +880,11 @@ contract Strategy is BaseStrategy {
         }
 
         //Divest all
-        _divestFromAAVE();
+        _divestFromAAVE(_loadPosition());
 
         if (harvestBeforeMigrate) {
             // Harvest rewards one last time
-            _claimRewardsAndGetMoreWant();
+            _claimRewardsAndGetMoreWant(type(uint256).max);
         }
 
         // Just in case we don't fully liquidate to want
@@ -532,10 +951,44 @@ contract Strategy is BaseStrategy {
         override
         returns (uint256)
     {
-        address priceOracle = ADDRESS_PROVIDER.getPriceOracle();
-        uint256 priceInEth =
-            IPriceOracle(priceOracle).getAssetPrice(address(want));
+        return
+            _ethToWant(_amtInWei, priceOracle.getAssetPrice(address(want)));
+    }
 
+    function AAVEToETH(uint256 _amt) public view returns (uint256) {
+        return
+            _AAVEToETH(_amt, priceOracle.getAssetPrice(address(AAVE_TOKEN)));
+    }
+
+    // Anyone can point us to the oracle the provider has now
+    function updatePriceOracle() external {
+        IPriceOracle current = IPriceOracle(ADDRESS_PROVIDER.getPriceOracle());
+        if (address(current) != address(priceOracle)) {
+            priceOracle = current;
+            emit PriceOracleUpdated(address(current));
+        }
+    }
+
+    // AAVE and want prices in ETH, from one call
+    function _getPrices()
+        internal
+        view
+        returns (uint256 aavePrice, uint256 wantPrice)
+    {
+        address[] memory assets = new address[](2);
+        assets[0] = address(AAVE_TOKEN);
+        assets[1] = address(want);
+
+        uint256[] memory prices = priceOracle.getAssetsPrices(assets);
+        aavePrice = prices[0];
+        wantPrice = prices[1];
+    }
+
+    function _ethToWant(uint256 _amtInWei, uint256 priceInEth)
+        internal
+        view
+        returns (uint256)
+    {
         // Opposite of priceInEth
         // Multiply first to keep rounding
         uint256 priceInWant = _amtInWei.mul(10**DECIMALS).div(priceInEth);
@@ -543,11 +996,11 @@ contract Strategy is BaseStrategy {
         return priceInWant;
     }
 
-    function AAVEToETH(uint256 _amt) public view returns (uint256) {
-        address priceOracle = ADDRESS_PROVIDER.getPriceOracle();
-        uint256 priceInEth =
-            IPriceOracle(priceOracle).getAssetPrice(address(AAVE_TOKEN));
-
+    function _AAVEToETH(uint256 _amt, uint256 priceInEth)
+        internal
+        pure
+        returns (uint256)
+    {
         // Price in ETH
         // AMT * Price in ETH / Decimals
         uint256 aaveToEth = _amt.mul(priceInEth).div(10**18);
@@ -569,13 +1022,20 @@ contract Strategy is BaseStrategy {
         (, , , , uint256 ltv, uint256 healthFactor) =
             LENDING_POOL.getUserAccountData(address(this));
 
-        // How much did we go off of minHealth? //NOTE: We always borrow as much as we can
-        uint256 maxBorrow = deposited().mul(ltv).div(MAX_BPS);
+        return _debtBelowHealth(deposited(), borrowed(), ltv, healthFactor);
+    }
 
-        uint256 allDebt = borrowed();
+    function _debtBelowHealth(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 ltv,
+        uint256 healthFactor
+    ) internal view returns (uint256) {
+        // How much did we go off of minHealth? //NOTE: We always borrow as much as we can
+        uint256 maxBorrow = aBalance.mul(ltv).div(MAX_BPS);
 
-        if (healthFactor < minHealth && allDebt > maxBorrow) {
-            uint256 maxValue = allDebt.sub(maxBorrow);
+        if (healthFactor < minHealth && vBalance > maxBorrow) {
+            uint256 maxValue = vBalance.sub(maxBorrow);
 
             return maxValue;
         }
@@ -583,16 +1043,130 @@ contract Strategy is BaseStrategy {
         return 0;
     }
 
-    // NOTE: We always borrow max, no fucks given
+    // Debt to withdraw and repay to get back to the target after interest pushed us past it
+    // Below minHealth back to ltv, or below lowerHealth back to the middle of the band
+    // (vBalance - x) = (aBalance - x) * target => x = (vBalance - aBalance * target) / (1 - target)
+    // Dust is left for later, save gas
+    function _driftToRepay(Position memory position)
+        internal
+        view
+        returns (uint256)
+    {
+        uint256 healthFactor =
+            _healthFactor(
+                position.deposited,
+                position.borrowed,
+                position.liquidationThreshold
+            );
+        if (healthFactor >= (upperHealth == 0 ? minHealth : lowerHealth)) {
+            return 0;
+        }
+
+        uint256 target =
+            _targetLtv(position.ltv, position.liquidationThreshold);
+        uint256 maxDebt = position.deposited.mul(target).div(1e18);
+        if (position.borrowed <= maxDebt) {
+            return 0;
+        }
+
+        uint256 toRepay =
+            position.borrowed.sub(maxDebt).mul(1e18).div(
+                uint256(1e18).sub(target)
+            );
+
+        if (toRepay < minRebalanceAmount) {
+            return 0;
+        }
+
+        // Round up, it's fine to repay a wei more
+        return Math.min(toRepay.add(1), position.borrowed);
+    }
+
+    // NOTE: We always borrow max, no fucks given. Unless the health band is set, see upperHealth
     function canBorrow() public view returns (uint256) {
-        (, , , , uint256 ltv, uint256 healthFactor) =
-            LENDING_POOL.getUserAccountData(address(this));
+        (
+            ,
+            ,
+            ,
+            uint256 liquidationThreshold,
+            uint256 ltv,
+            uint256 healthFactor
+        ) = LENDING_POOL.getUserAccountData(address(this));
+
+        return
+            _canBorrow(
+                deposited(),
+                borrowed(),
+                ltv,
+                liquidationThreshold,
+                healthFactor
+            );
+    }
+
+    function _canBorrow(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 ltv,
+        uint256 liquidationThreshold,
+        uint256 healthFactor
+    ) internal view returns (uint256) {
+        if (!_shouldLeverUp(healthFactor)) {
+            return 0;
+        }
+
+        // The two modes stop at different leverage: the flash loan lands on
+        // min(ltv, liquidationThreshold / target health), the loop borrows up to ltv
+        // on every step that starts over the target health, see _flashBorrowAmount
+        if (useFlashLoan) {
+            uint256 toBorrow =
+                _flashBorrowAmount(
+                    aBalance,
+                    vBalance,
+                    ltv,
+                    liquidationThreshold
+                );
+            return toBorrow < minRebalanceAmount ? 0 : toBorrow;
+        }
 
-        if (healthFactor > minHealth) {
+        return
+            _borrowToTarget(
+                aBalance,
+                vBalance,
+                ltv,
+                liquidationThreshold,
+                healthFactor
+            );
+    }
+
+    // One step of the lever up loop, once we know we should lever up
+    function _borrowToTarget(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 ltv,
+        uint256 liquidationThreshold,
+        uint256 healthFactor
+    ) internal view returns (uint256) {
+        if (healthFactor > _targetHealth()) {
             // Amount = deposited * ltv - borrowed
             // Div MAX_BPS because because ltv / maxbps is the percent
-            uint256 maxValue =
-                deposited().mul(ltv).div(MAX_BPS).sub(borrowed());
+            uint256 maxDebt = aBalance.mul(ltv).div(MAX_BPS);
+            if (maxDebt <= vBalance) {
+                return 0;
+            }
+            uint256 maxValue = maxDebt.sub(vBalance);
+
+            // With the band, only what lands at its middle once it's all deposited
+            if (upperHealth > 0) {
+                maxValue = Math.min(
+                    maxValue,
+                    _flashBorrowAmount(
+                        aBalance,
+                        vBalance,
+                        ltv,
+                        liquidationThreshold
+                    )
+                );
+            }
 
             // Don't borrow if it's dust, save gas
             if (maxValue < minRebalanceAmount) {
@@ -605,10 +1179,118 @@ contract Strategy is BaseStrategy {
         return 0;
     }
 
-    function _invest() internal {
-        // Loop on it until it's properly done
-        for (uint256 i = 0; i < maxIterations; i++) {
-            uint256 toBorrow = canBorrow();
+    // Lever up past minHealth, or only once health went over the band
+    function _shouldLeverUp(uint256 healthFactor) internal view returns (bool) {
+        return upperHealth == 0 || healthFactor > upperHealth;
+    }
+
+    // Health we lever up and repay to: minHealth, or the middle of the band
+    function _targetHealth() internal view returns (uint256) {
+        if (upperHealth == 0) {
+            return minHealth;
+        }
+
+        return lowerHealth.add(upperHealth).div(2);
+    }
+
+    // Debt over deposits we lever up to, 18 decimals
+    // ltv, or what puts us at the middle of the band if that's lower
+    function _targetLtv(uint256 ltv, uint256 liquidationThreshold)
+        internal
+        view
+        returns (uint256)
+    {
+        uint256 maxLtv = ltv.mul(1e18).div(MAX_BPS);
+        if (upperHealth == 0) {
+            return maxLtv;
+        }
+
+        return
+            Math.min(
+                maxLtv,
+                liquidationThreshold.mul(1e36).div(
+                    _targetHealth().mul(MAX_BPS)
+                )
+            );
+    }
+
+    // Health Factor as AAVE computes it, in want instead of ETH (one asset, same price)
+    function _healthFactor(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 liquidationThreshold
+    ) internal pure returns (uint256) {
+        if (vBalance == 0) {
+            return type(uint256).max;
+        }
+
+        return
+            aBalance.mul(liquidationThreshold).mul(1e18).div(
+                vBalance.mul(MAX_BPS)
+            );
+    }
+
+    // LTV and Liquidation Threshold of want, from the reserve configuration
+    // Cheaper than getUserAccountData which loops on every reserve
+    function _getLtvAndThreshold()
+        internal
+        view
+        returns (uint256 ltv, uint256 liquidationThreshold)
+    {
+        uint256 configuration =
+            LENDING_POOL.getConfiguration(address(want)).data;
+
+        //bit 0-15: LTV, bit 16-31: Liq. threshold
+        ltv = configuration & 0xFFFF;
+        liquidationThreshold = (configuration >> 16) & 0xFFFF;
+    }
+
+    // Our position as of now, see Position
+    function _loadPosition() internal view returns (Position memory position) {
+        position.deposited = deposited();
+        position.borrowed = borrowed();
+        (position.ltv, position.liquidationThreshold) = _getLtvAndThreshold();
+    }
+
+    function _invest(Position memory position) internal {
+        // Inside the band, leave it be
+        if (
+            !_shouldLeverUp(
+                _healthFactor(
+                    position.deposited,
+                    position.borrowed,
+                    position.liquidationThreshold
+                )
+            )
+        ) {
+            return;
+        }
+
+        if (useFlashLoan) {
+            _leverUpWithFlashLoan(position);
+            return;
+        }
+
+        // Compute each step of the loop locally from the position
+        // Same leverage as calling canBorrow every iteration, without re-querying AAVE
+        uint256 aBalance = position.deposited;
+        uint256 vBalance = position.borrowed;
+
+        uint256 iterations = maxIterations;
+        uint256 steps = 0;
+        for (uint256 i = 0; i < iterations; i++) {
+            uint256 toBorrow =
+                _borrowToTarget(
+                    aBalance,
+                    vBalance,
+                    position.ltv,
+                    position.liquidationThreshold,
+                    _healthFactor(
+                        aBalance,
+                        vBalance,
+                        position.liquidationThreshold
+                    )
+                );
             if (toBorrow > 0) {
                 LENDING_POOL.borrow(
                     address(want),
@@ -624,21 +1306,68 @@ contract Strategy is BaseStrategy {
                     address(this),
                     REFERRAL_CODE
                 );
+
+                // AAVE rounds scaled balances, assume the worst by 1 wei each way
+                aBalance = aBalance.add(toBorrow).sub(1);
+                vBalance = vBalance.add(toBorrow).add(1);
+                steps++;
             } else {
                 break;
             }
         }
+
+        if (steps > 0) {
+            emit LeveredUp(
+                vBalance.sub(position.borrowed),
+                steps,
+                _healthFactor(aBalance, vBalance, position.liquidationThreshold)
+            );
+        }
+
+        position.deposited = aBalance;
+        position.borrowed = vBalance;
     }
 
     // Divest all from AAVE, awful gas, but hey, it works
-    function _divestFromAAVE() internal {
-        (bool shouldRepay, uint256 repayAmount) = canRepay(); // The "unsafe" (below target health) you can withdraw
+    function _divestFromAAVE(Position memory position) internal {
+        if (useFlashLoan) {
+            // Repay all the debt in one go, exact amount so we don't leave dust
+            uint256 vBalance = borrowed();
+            if (vBalance > 0) {
+                _flashLoan(vBalance, 0);
+                // Nothing left borrowed
+                emit LeveredDown(vBalance, 1, type(uint256).max);
+            }
+        } else {
+            uint256 aBalance = position.deposited;
+            uint256 vBalance = position.borrowed;
+            (bool shouldRepay, uint256 repayAmount) =
+                _canRepay(aBalance, vBalance, position.liquidationThreshold); // The "unsafe" (below target health) you can withdraw
+
+            // Loop to withdraw until you have the amount you need
+            uint256 steps = 0;
+            while (shouldRepay) {
+                _withdrawStepFromAAVE(repayAmount);
+                steps++;
+
+                // The last step repays more than we owe, AAVE only takes the debt
+                aBalance = aBalance.sub(repayAmount);
+                vBalance = vBalance > repayAmount
+                    ? vBalance.sub(repayAmount).add(1)
+                    : 0;
+                (shouldRepay, repayAmount) = _canRepay(
+                    aBalance,
+                    vBalance,
+                    position.liquidationThreshold
+                );
+            }
 
-        // Loop to withdraw until you have the amount you need
-        while (shouldRepay) {
-            _withdrawStepFromAAVE(repayAmount);
-            (shouldRepay, repayAmount) = canRepay();
+            if (steps > 0) {
+                // The loop only stops once nothing is borrowed
+                emit LeveredDown(position.borrowed, steps, type(uint256).max);
+            }
         }
+
         if (deposited() > 0) {
             // Withdraw the rest here
             LENDING_POOL.withdraw(
@@ -649,7 +1378,251 @@ contract Strategy is BaseStrategy {
         }
     }
 
+    /* Flash Loan functions */
+    // Borrow up to the target in one go, the deposit happens in executeOperation
+    function _leverUpWithFlashLoan(Position memory position) internal {
+        uint256 toBorrow =
+            _flashBorrowAmount(
+                position.deposited,
+                position.borrowed,
+                position.ltv,
+                position.liquidationThreshold
+            );
+
+        // Don't borrow if it's dust, save gas
+        if (toBorrow < minRebalanceAmount) {
+            return;
+        }
+
+        _flashLoan(toBorrow, VARIABLE_RATE);
+
+        emit LeveredUp(
+            toBorrow,
+            1,
+            _healthFactor(
+                position.deposited.add(toBorrow),
+                position.borrowed.add(toBorrow),
+                position.liquidationThreshold
+            )
+        );
+    }
+
+    // How much to borrow and deposit so we end at the target health (capped at ltv)
+    // Used by the lever up loop too, when the band is set. Without the band the loop
+    // can end past the target health, its last step borrows up to ltv
+    // (aBalance + x) * target = vBalance + x => x = (aBalance * target - vBalance) / (1 - target)
+    function _flashBorrowAmount(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 ltv,
+        uint256 liquidationThreshold
+    ) internal view returns (uint256) {
+        uint256 target =
+            Math.min(
+                _targetLtv(ltv, liquidationThreshold),
+                liquidationThreshold.mul(1e36).div(
+                    _targetHealth().mul(MAX_BPS)
+                )
+            );
+
+        uint256 maxDebt = aBalance.mul(target).div(1e18);
+        if (maxDebt <= vBalance) {
+            return 0;
+        }
+
+        return maxDebt.sub(vBalance).mul(1e18).div(uint256(1e18).sub(target));
+    }
+
+    // mode 0 means we pay back in the same tx, mode 2 means we keep it as variable debt
+    function _flashLoan(uint256 amount, uint256 mode) internal {
+        address[] memory assets = new address[](1);
+        assets[0] = address(want);
+
+        uint256[] memory amounts = new uint256[](1);
+        amounts[0] = amount;
+
+        uint256[] memory modes = new uint256[](1);
+        modes[0] = mode;
+
+        LENDING_POOL.flashLoan(
+            address(this),
+            assets,
+            amounts,
+            modes,
+            address(this),
+            abi.encode(mode),
+            REFERRAL_CODE
+        );
+    }
+
+    // Called by AAVE in the middle of flashLoan
+    function executeOperation(
+        address[] calldata,
+        uint256[] calldata amounts,
+        uint256[] calldata premiums,
+        address initiator,
+        bytes calldata params
+    ) external returns (bool) {
+        require(msg.sender == address(LENDING_POOL)); // dev: !lendingPool
+        require(initiator == address(this)); // dev: !initiator
+
+        if (abi.decode(params, (uint256)) == VARIABLE_RATE) {
+            _flashLeverUp(amounts[0]);
+        } else {
+            _flashDeleverage(amounts[0], premiums[0]);
+        }
+
+        return true;
+    }
+
+    // Deposit what we borrowed, AAVE opens the debt after executeOperation returns
+    function _flashLeverUp(uint256 amount) internal {
+        LENDING_POOL.deposit(
+            address(want),
+            amount,
+            address(this),
+            REFERRAL_CODE
+        );
+    }
+
+    // Repay, then withdraw enough to give back the loan plus premium
+    // AAVE pulls it back after executeOperation returns, the pool is already approved
+    function _flashDeleverage(uint256 amount, uint256 premium) internal {
+        LENDING_POOL.repay(address(want), amount, VARIABLE_RATE, address(this));
+        LENDING_POOL.withdraw(
+            address(want),
+            amount.add(premium),
+            address(this)
+        );
+    }
+
     // Withdraw and Repay AAVE Debt
+    // Withdraw `amount` from AAVE, repaying only the debt needed to stay at the target health
+    // Unwinds everything if `amount` is all we have
+    function _freeWant(uint256 amount, Position memory position) internal {
+        uint256 aBalance = position.deposited;
+        uint256 vBalance = position.borrowed;
+        if (amount.add(vBalance) >= aBalance) {
+            _divestFromAAVE(position);
+            return;
+        }
+
+        uint256 liquidationThreshold = position.liquidationThreshold;
+        uint256 premium = useFlashLoan ? FLASH_LOAN_PREMIUM : 0;
+        uint256 repayAmount =
+            _repayAmountToFree(
+                aBalance,
+                vBalance,
+                amount,
+                liquidationThreshold,
+                premium
+            );
+
+        if (repayAmount > 0) {
+            if (useFlashLoan) {
+                _flashLoan(repayAmount, 0);
+
+                // The premium is paid with aTokens too
+                emit LeveredDown(
+                    repayAmount,
+                    1,
+                    _healthFactor(
+                        aBalance.sub(amount).sub(
+                            repayAmount.mul(MAX_BPS.add(premium)).div(MAX_BPS)
+                        ),
+                        vBalance.sub(repayAmount),
+                        liquidationThreshold
+                    )
+                );
+            } else {
+                uint256 repaid =
+                    _stepDown(
+                        aBalance,
+                        vBalance,
+                        repayAmount,
+                        liquidationThreshold
+                    );
+
+                // AAVE stopped us short, only withdraw what keeps the position above
+                // health 1, liquidatePosition reports the rest as not freed
+                if (repaid < repayAmount) {
+                    (, uint256 canWithdraw) =
+                        _canRepay(
+                            aBalance.sub(repaid),
+                            vBalance.sub(repaid),
+                            liquidationThreshold
+                        );
+                    amount = Math.min(amount, canWithdraw);
+                }
+            }
+        }
+
+        if (amount > 0) {
+            LENDING_POOL.withdraw(address(want), amount, address(this));
+        }
+    }
+
+    // Debt to repay so that after withdrawing `amount` (and the flash loan premium) we are at the target health
+    // (aBalance - amount - r * (1 + premium)) * k = vBalance - r, with k = liquidationThreshold / target
+    function _repayAmountToFree(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 amount,
+        uint256 liquidationThreshold,
+        uint256 premium
+    ) internal view returns (uint256) {
+        uint256 k =
+            liquidationThreshold.mul(1e36).div(_targetHealth().mul(MAX_BPS));
+        uint256 maxDebt = aBalance.sub(amount).mul(k).div(1e18);
+        if (maxDebt >= vBalance) {
+            return 0;
+        }
+
+        uint256 kWithPremium = k.mul(MAX_BPS.add(premium)).div(MAX_BPS);
+        uint256 toRepay =
+            vBalance.sub(maxDebt).mul(1e18).div(
+                uint256(1e18).sub(kWithPremium)
+            );
+
+        // Round up, it's fine to repay a wei more
+        return Math.min(toRepay.add(1), vBalance);
+    }
+
+    // Withdraw and repay `repayAmount` in as few steps as AAVE allows
+    // Returns what was repaid, less than `repayAmount` if AAVE didn't allow another step
+    function _stepDown(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 repayAmount,
+        uint256 liquidationThreshold
+    ) internal returns (uint256 repaid) {
+        uint256 steps = 0;
+        while (repayAmount > 0) {
+            (, uint256 step) =
+                _canRepay(aBalance, vBalance, liquidationThreshold);
+            if (step == 0) {
+                break;
+            }
+            step = Math.min(step, repayAmount);
+
+            _withdrawStepFromAAVE(step);
+
+            aBalance = aBalance.sub(step);
+            vBalance = vBalance.sub(step);
+            repayAmount = repayAmount.sub(step);
+            repaid = repaid.add(step);
+            steps++;
+        }
+
+        if (steps > 0) {
+            emit LeveredDown(
+                repaid,
+                steps,
+                _healthFactor(aBalance, vBalance, liquidationThreshold)
+            );
+        }
+    }
+
     function _withdrawStepFromAAVE(uint256 repayAmount) internal {
         if (repayAmount > 0) {
             //Repay this step
@@ -666,18 +1639,17 @@ contract Strategy is BaseStrategy {
     // returns 95% of the collateral we can withdraw from aave, used to loop and repay debts
     // You always can repay something, if we return false, it means you have nothing to pay
     function canRepay() public view returns (bool, uint256) {
-        (
-            uint256 totalCollateralETH,
-            uint256 totalDebtETH,
-            uint256 availableBorrowsETH,
-            uint256 currentLiquidationThreshold,
-            uint256 ltv,
-            uint256 healthFactor
-        ) = LENDING_POOL.getUserAccountData(address(this));
+        (, , , uint256 currentLiquidationThreshold, , ) =
+            LENDING_POOL.getUserAccountData(address(this));
 
-        uint256 aBalance = deposited();
-        uint256 vBalance = borrowed();
+        return _canRepay(deposited(), borrowed(), currentLiquidationThreshold);
+    }
 
+    function _canRepay(
+        uint256 aBalance,
+        uint256 vBalance,
+        uint256 currentLiquidationThreshold
+    ) internal pure returns (bool, uint256) {
         if (vBalance == 0) {
             return (false, 0); //You have repaid all
         }
@@ -691,18 +1663,81 @@ contract Strategy is BaseStrategy {
         return (true, inWant);
     }
 
+    /** State Lens */
+    // Same values as the individual views, in one call
+    // getUserAccountData and the price oracle are read once
+    // NOTE: canRepay is (true, 0) when we are liquidatable, canRepay() reverts there
+    function getState() external view returns (StrategyState memory state) {
+        state.wantBalance = want.balanceOf(address(this));
+        state.deposited = deposited();
+        state.borrowed = borrowed();
+
+        (
+            state.totalCollateralETH,
+            state.totalDebtETH,
+            state.availableBorrowsETH,
+            state.currentLiquidationThreshold,
+            state.ltv,
+            state.healthFactor
+        ) = LENDING_POOL.getUserAccountData(address(this));
+
+        state.balanceOfRewards = balanceOfRewards();
+        state.valueOfRewards = valueOfAAVEToWant(state.balanceOfRewards);
+
+        state.estimatedTotalAssets = state
+            .wantBalance
+            .add(state.deposited)
+            .sub(state.borrowed)
+            .add(state.valueOfRewards);
+
+        state.canBorrow = _canBorrow(
+            state.deposited,
+            state.borrowed,
+            state.ltv,
+            state.currentLiquidationThreshold,
+            state.healthFactor
+        );
+        state.debtBelowHealth = _debtBelowHealth(
+            state.deposited,
+            state.borrowed,
+            state.ltv,
+            state.healthFactor
+        );
+
+        if (state.borrowed > 0 && state.currentLiquidationThreshold > 0) {
+            uint256 minDeposited =
+                state.borrowed.mul(MAX_BPS).div(
+                    state.currentLiquidationThreshold
+                );
+            if (state.deposited >= minDeposited) {
+                (state.shouldRepay, state.canRepay) = _canRepay(
+                    state.deposited,
+                    state.borrowed,
+                    state.currentLiquidationThreshold
+                );
+            } else {
+                state.shouldRepay = true;
+            }
+        }
+
+        state.vaultTotalDebt = vault.strategies(address(this)).totalDebt;
+        state.minHealth = minHealth;
+        state.minRebalanceAmount = minRebalanceAmount;
+        state.maxIterations = maxIterations;
+    }
+
     /** Manual Functions */
 
     /** Leverage Manual Functions */
     // Emergency function to immediately deleverage to 0
     function manualDivestFromAAVE() public onlyVaultManagers {
-        _divestFromAAVE();
+        _divestFromAAVE(_loadPosition());
     }
 
     // Manually perform 5 loops to lever up
     // Safe because it's capped by canBorrow
     function manualLeverUp() public onlyVaultManagers {
-        _invest();
+        _invest(_loadPosition());
     }
 
     // Emergency function that we can use to deleverage manually if something is broken
@@ -726,6 +1761,23 @@ contract Strategy is BaseStrategy {
         );
     }
 
+    /** Rewards */
+    // Sell up to maxRewardsToSell of the rewards, between harvests
+    // The want is lent right away, the next harvest reports it as profit like interest
+    function sellRewards() external onlyKeepers {
+        _claimRewardsAndGetMoreWant(maxRewardsToSell);
+
+        uint256 wantBalance = want.balanceOf(address(this));
+        if (wantBalance > 0) {
+            LENDING_POOL.deposit(
+                address(want),
+                wantBalance,
+                address(this),
+                REFERRAL_CODE
+            );
+        }
+    }
+
     /** DCA Manual Functions */
 
     // Get the rewards
@@ -0,0 +1,19 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {Strategy} from "./Strategy.sol";
+
+// Read the state of many levered strategies in one eth_call
+contract StrategyLens {
+    function getStates(address[] calldata strategies)
+        external
+        view
+        returns (Strategy.StrategyState[] memory states)
+    {
+        states = new Strategy.StrategyState[](strategies.length);
+        for (uint256 i = 0; i < strategies.length; i++) {
+            states[i] = Strategy(strategies[i]).getState();
+        }
+    }
+}
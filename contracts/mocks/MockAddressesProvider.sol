@@ -0,0 +1,16 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+// Only what the Strategy and the mocks read, see scripts/mocks.py
+contract MockAddressesProvider {
+    address public getLendingPool;
+    address public getPriceOracle;
+
+    function setLendingPool(address pool) external {
+        getLendingPool = pool;
+    }
+
+    function setPriceOracle(address priceOracle) external {
+        getPriceOracle = priceOracle;
+    }
+}
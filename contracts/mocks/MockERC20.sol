@@ -0,0 +1,95 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {SafeMath} from "@openzeppelin/contracts/math/SafeMath.sol";
+
+// Mintable ERC20, metadata lives in storage so a copy of the code placed at
+// another address (see scripts/mocks.py) can be set up with initialize
+contract MockERC20 {
+    using SafeMath for uint256;
+
+    string public name;
+    string public symbol;
+    uint8 public decimals;
+    uint256 public totalSupply;
+
+    mapping(address => uint256) public balanceOf;
+    mapping(address => mapping(address => uint256)) public allowance;
+
+    event Transfer(address indexed from, address indexed to, uint256 value);
+    event Approval(
+        address indexed owner,
+        address indexed spender,
+        uint256 value
+    );
+
+    constructor(
+        string memory _name,
+        string memory _symbol,
+        uint8 _decimals
+    ) public {
+        initialize(_name, _symbol, _decimals);
+    }
+
+    function initialize(
+        string memory _name,
+        string memory _symbol,
+        uint8 _decimals
+    ) public {
+        require(decimals == 0); // dev: initialized
+        name = _name;
+        symbol = _symbol;
+        decimals = _decimals;
+    }
+
+    function mint(address to, uint256 amount) public {
+        totalSupply = totalSupply.add(amount);
+        balanceOf[to] = balanceOf[to].add(amount);
+        emit Transfer(address(0), to, amount);
+    }
+
+    function burn(address from, uint256 amount) public {
+        balanceOf[from] = balanceOf[from].sub(amount);
+        totalSupply = totalSupply.sub(amount);
+        emit Transfer(from, address(0), amount);
+    }
+
+    function approve(address spender, uint256 amount) public returns (bool) {
+        allowance[msg.sender][spender] = amount;
+        emit Approval(msg.sender, spender, amount);
+        return true;
+    }
+
+    function transfer(address to, uint256 amount) public returns (bool) {
+        _transfer(msg.sender, to, amount);
+        return true;
+    }
+
+    function transferFrom(
+        address from,
+        address to,
+        uint256 amount
+    ) public returns (bool) {
+        if (allowance[from][msg.sender] != uint256(-1)) {
+            allowance[from][msg.sender] = allowance[from][msg.sender].sub(
+                amount,
+                "ERC20: transfer amount exceeds allowance"
+            );
+        }
+        _transfer(from, to, amount);
+        return true;
+    }
+
+    function _transfer(
+        address from,
+        address to,
+        uint256 amount
+    ) internal {
+        balanceOf[from] = balanceOf[from].sub(
+            amount,
+            "ERC20: transfer amount exceeds balance"
+        );
+        balanceOf[to] = balanceOf[to].add(amount);
+        emit Transfer(from, to, amount);
+    }
+}
@@ -0,0 +1,26 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+// Yearn's CommonHealthCheck with its default limits:
+// profit up to 1% and loss up to 0.01% of the strategy's debt per harvest
+contract MockHealthCheck {
+    uint256 internal constant MAX_BPS = 10000;
+    uint256 public constant profitLimitRatio = 100;
+    uint256 public constant lossLimitRatio = 1;
+
+    function check(
+        uint256 profit,
+        uint256 loss,
+        uint256,
+        uint256,
+        uint256 totalDebt
+    ) external pure returns (bool) {
+        if (profit > (totalDebt * profitLimitRatio) / MAX_BPS) {
+            return false;
+        }
+        if (loss > (totalDebt * lossLimitRatio) / MAX_BPS) {
+            return false;
+        }
+        return true;
+    }
+}
@@ -0,0 +1,216 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {SafeMath} from "@openzeppelin/contracts/math/SafeMath.sol";
+
+interface IMockScaledToken {
+    function scaledBalanceOf(address user) external view returns (uint256);
+
+    function scaledTotalSupply() external view returns (uint256);
+}
+
+interface IMockStakedAave {
+    function STAKED_TOKEN() external view returns (address);
+
+    function stake(address onBehalfOf, uint256 amount) external;
+}
+
+interface IMintable {
+    function mint(address to, uint256 amount) external;
+
+    function approve(address spender, uint256 amount) external returns (bool);
+}
+
+// Liquidity mining like AaveIncentivesController (AaveDistributionManager):
+// each asset emits per second to its holders, pro rata of their scaled balance,
+// tracked with an index per asset and per user. Claims are paid in stkAAVE
+// NOTE: No distribution end, emissions are set with configureAssets
+contract MockIncentivesController {
+    using SafeMath for uint256;
+
+    uint256 internal constant PRECISION = 18;
+
+    struct AssetData {
+        uint256 emissionPerSecond;
+        uint256 lastUpdateTimestamp;
+        uint256 index;
+        mapping(address => uint256) users;
+    }
+
+    IMockStakedAave public immutable STAKE_TOKEN;
+
+    mapping(address => AssetData) public assets;
+    mapping(address => uint256) internal _usersUnclaimedRewards;
+
+    event RewardsAccrued(address indexed user, uint256 amount);
+    event RewardsClaimed(
+        address indexed user,
+        address indexed to,
+        uint256 amount
+    );
+
+    constructor(address stakeToken) public {
+        STAKE_TOKEN = IMockStakedAave(stakeToken);
+    }
+
+    function configureAssets(
+        address[] calldata _assets,
+        uint256[] calldata emissionsPerSecond
+    ) external {
+        for (uint256 i = 0; i < _assets.length; i++) {
+            AssetData storage asset = assets[_assets[i]];
+            _updateAssetState(
+                asset,
+                IMockScaledToken(_assets[i]).scaledTotalSupply()
+            );
+            asset.emissionPerSecond = emissionsPerSecond[i];
+        }
+    }
+
+    // Called by the aToken / debt token before every balance change
+    function handleAction(
+        address user,
+        uint256 totalSupply,
+        uint256 userBalance
+    ) external {
+        uint256 accrued =
+            _updateUserAssetState(
+                assets[msg.sender],
+                user,
+                userBalance,
+                totalSupply
+            );
+        if (accrued > 0) {
+            _usersUnclaimedRewards[user] = _usersUnclaimedRewards[user].add(
+                accrued
+            );
+            emit RewardsAccrued(user, accrued);
+        }
+    }
+
+    function getRewardsBalance(address[] calldata _assets, address user)
+        external
+        view
+        returns (uint256)
+    {
+        uint256 unclaimedRewards = _usersUnclaimedRewards[user];
+        for (uint256 i = 0; i < _assets.length; i++) {
+            AssetData storage asset = assets[_assets[i]];
+            uint256 index =
+                _getAssetIndex(
+                    asset,
+                    IMockScaledToken(_assets[i]).scaledTotalSupply()
+                );
+            unclaimedRewards = unclaimedRewards.add(
+                _getRewards(
+                    IMockScaledToken(_assets[i]).scaledBalanceOf(user),
+                    index,
+                    asset.users[user]
+                )
+            );
+        }
+        return unclaimedRewards;
+    }
+
+    function getUserUnclaimedRewards(address user)
+        external
+        view
+        returns (uint256)
+    {
+        return _usersUnclaimedRewards[user];
+    }
+
+    function claimRewards(
+        address[] calldata _assets,
+        uint256 amount,
+        address to
+    ) external returns (uint256) {
+        if (amount == 0) {
+            return 0;
+        }
+
+        uint256 unclaimedRewards = _usersUnclaimedRewards[msg.sender];
+        for (uint256 i = 0; i < _assets.length; i++) {
+            unclaimedRewards = unclaimedRewards.add(
+                _updateUserAssetState(
+                    assets[_assets[i]],
+                    msg.sender,
+                    IMockScaledToken(_assets[i]).scaledBalanceOf(msg.sender),
+                    IMockScaledToken(_assets[i]).scaledTotalSupply()
+                )
+            );
+        }
+        if (unclaimedRewards == 0) {
+            return 0;
+        }
+
+        uint256 amountToClaim =
+            amount > unclaimedRewards ? unclaimedRewards : amount;
+        _usersUnclaimedRewards[msg.sender] = unclaimedRewards - amountToClaim;
+
+        // The rewards vault, AAVE is minted then staked for `to`
+        IMintable aave = IMintable(STAKE_TOKEN.STAKED_TOKEN());
+        aave.mint(address(this), amountToClaim);
+        aave.approve(address(STAKE_TOKEN), amountToClaim);
+        STAKE_TOKEN.stake(to, amountToClaim);
+
+        emit RewardsClaimed(msg.sender, to, amountToClaim);
+        return amountToClaim;
+    }
+
+    function _updateAssetState(AssetData storage asset, uint256 totalSupply)
+        internal
+        returns (uint256)
+    {
+        uint256 newIndex = _getAssetIndex(asset, totalSupply);
+        asset.index = newIndex;
+        asset.lastUpdateTimestamp = block.timestamp;
+        return newIndex;
+    }
+
+    function _updateUserAssetState(
+        AssetData storage asset,
+        address user,
+        uint256 userBalance,
+        uint256 totalSupply
+    ) internal returns (uint256 accrued) {
+        uint256 newIndex = _updateAssetState(asset, totalSupply);
+        uint256 userIndex = asset.users[user];
+
+        if (userIndex != newIndex) {
+            accrued = _getRewards(userBalance, newIndex, userIndex);
+            asset.users[user] = newIndex;
+        }
+    }
+
+    function _getAssetIndex(AssetData storage asset, uint256 totalSupply)
+        internal
+        view
+        returns (uint256)
+    {
+        if (
+            asset.emissionPerSecond == 0 ||
+            totalSupply == 0 ||
+            asset.lastUpdateTimestamp == block.timestamp
+        ) {
+            return asset.index;
+        }
+
+        uint256 timeDelta = block.timestamp.sub(asset.lastUpdateTimestamp);
+        return
+            asset
+                .emissionPerSecond
+                .mul(timeDelta)
+                .mul(10**PRECISION)
+                .div(totalSupply)
+                .add(asset.index);
+    }
+
+    function _getRewards(
+        uint256 userBalance,
+        uint256 reserveIndex,
+        uint256 userIndex
+    ) internal pure returns (uint256) {
+        return userBalance.mul(reserveIndex.sub(userIndex)).div(10**PRECISION);
+    }
+}
@@ -0,0 +1,584 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {
+    SafeERC20,
+    SafeMath,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import {ERC20} from "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+import {Math} from "@openzeppelin/contracts/math/Math.sol";
+
+import {
+    ILendingPoolAddressesProvider
+} from "../../interfaces/aave/ILendingPoolAddressesProvider.sol";
+import {IPriceOracle} from "../../interfaces/aave/IPriceOracle.sol";
+import {DataTypes} from "../../interfaces/aave/types/DataTypes.sol";
+
+import {MockMath} from "./MockMath.sol";
+import {MockScaledToken} from "./MockScaledToken.sol";
+
+interface IFlashLoanReceiver {
+    function executeOperation(
+        address[] calldata assets,
+        uint256[] calldata amounts,
+        uint256[] calldata premiums,
+        address initiator,
+        bytes calldata params
+    ) external returns (bool);
+}
+
+// Stand-in for the AAVE V2 LendingPool: index based interest, variable debt only,
+// flash loans, liquidations, and the same validations and error codes for what the Strategy uses
+// NOTE: Underlying is held by the pool instead of the aToken, rates are set by hand
+contract MockLendingPool {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+    using MockMath for uint256;
+
+    uint256 public constant FLASHLOAN_PREMIUM_TOTAL = 9;
+    uint256 internal constant HEALTH_FACTOR_LIQUIDATION_THRESHOLD = 1e18;
+    uint256 internal constant LIQUIDATION_CLOSE_FACTOR_PERCENT = 5000;
+
+    ILendingPoolAddressesProvider public immutable ADDRESSES_PROVIDER;
+
+    mapping(address => DataTypes.ReserveData) internal _reserves;
+    address[] internal _reservesList;
+
+    struct AccountVars {
+        uint256 aBalance;
+        uint256 vBalance;
+        uint256 totalCollateralETH;
+        uint256 totalDebtETH;
+        uint256 avgLtv;
+        uint256 avgLiquidationThreshold;
+        uint256 price;
+        uint256 tokenUnit;
+        uint256 balanceETH;
+        uint256 configuration;
+    }
+
+    struct LiquidationVars {
+        uint256 userCollateral;
+        uint256 userDebt;
+        uint256 debtToLiquidate;
+        uint256 collateralToLiquidate;
+        uint256 collateralPrice;
+        uint256 debtPrice;
+        uint256 collateralUnit;
+        uint256 debtUnit;
+        uint256 liquidationBonus;
+    }
+
+    constructor(address addressesProvider) public {
+        ADDRESSES_PROVIDER = ILendingPoolAddressesProvider(addressesProvider);
+    }
+
+    /* Admin */
+    function initReserve(
+        address asset,
+        uint256 ltv,
+        uint256 liquidationThreshold,
+        uint256 liquidationBonus,
+        address incentivesController
+    ) external {
+        DataTypes.ReserveData storage reserve = _reserves[asset];
+        require(reserve.aTokenAddress == address(0)); // dev: initialized
+
+        uint8 decimals = ERC20(asset).decimals();
+        reserve.aTokenAddress = address(
+            new MockScaledToken(
+                address(this),
+                asset,
+                decimals,
+                false,
+                incentivesController
+            )
+        );
+        reserve.variableDebtTokenAddress = address(
+            new MockScaledToken(
+                address(this),
+                asset,
+                decimals,
+                true,
+                incentivesController
+            )
+        );
+        reserve.liquidityIndex = uint128(MockMath.RAY);
+        reserve.variableBorrowIndex = uint128(MockMath.RAY);
+        reserve.lastUpdateTimestamp = uint40(block.timestamp);
+        reserve.id = uint8(_reservesList.length);
+        _reservesList.push(asset);
+
+        setConfiguration(asset, ltv, liquidationThreshold, liquidationBonus);
+    }
+
+    function setConfiguration(
+        address asset,
+        uint256 ltv,
+        uint256 liquidationThreshold,
+        uint256 liquidationBonus
+    ) public {
+        uint256 decimals = ERC20(asset).decimals();
+
+        //bit 0-15: LTV, 16-31: Liq. threshold, 32-47: Liq. bonus, 48-55: Decimals
+        //bit 56: active, 58: borrowing enabled
+        _reserves[asset].configuration.data =
+            ltv |
+            (liquidationThreshold << 16) |
+            (liquidationBonus << 32) |
+            (decimals << 48) |
+            (1 << 56) |
+            (1 << 58);
+    }
+
+    // Rates are in ray, per year
+    function setRates(
+        address asset,
+        uint256 liquidityRate,
+        uint256 variableBorrowRate
+    ) external {
+        DataTypes.ReserveData storage reserve = _reserves[asset];
+        _updateState(reserve);
+        reserve.currentLiquidityRate = uint128(liquidityRate);
+        reserve.currentVariableBorrowRate = uint128(variableBorrowRate);
+    }
+
+    /* Views */
+    function getReserveData(address asset)
+        external
+        view
+        returns (DataTypes.ReserveData memory)
+    {
+        return _reserves[asset];
+    }
+
+    function getConfiguration(address asset)
+        external
+        view
+        returns (DataTypes.ReserveConfigurationMap memory)
+    {
+        return _reserves[asset].configuration;
+    }
+
+    function getReservesList() external view returns (address[] memory) {
+        return _reservesList;
+    }
+
+    function getReserveNormalizedIncome(address asset)
+        public
+        view
+        returns (uint256)
+    {
+        return _normalizedIncome(_reserves[asset]);
+    }
+
+    function getReserveNormalizedVariableDebt(address asset)
+        public
+        view
+        returns (uint256)
+    {
+        return _normalizedDebt(_reserves[asset]);
+    }
+
+    function getUserAccountData(address user)
+        public
+        view
+        returns (
+            uint256 totalCollateralETH,
+            uint256 totalDebtETH,
+            uint256 availableBorrowsETH,
+            uint256 currentLiquidationThreshold,
+            uint256 ltv,
+            uint256 healthFactor
+        )
+    {
+        AccountVars memory vars = _accountVars(user);
+
+        totalCollateralETH = vars.totalCollateralETH;
+        totalDebtETH = vars.totalDebtETH;
+        if (totalCollateralETH > 0) {
+            ltv = vars.avgLtv.div(totalCollateralETH);
+            currentLiquidationThreshold = vars.avgLiquidationThreshold.div(
+                totalCollateralETH
+            );
+        }
+
+        availableBorrowsETH = totalCollateralETH.percentMul(ltv);
+        availableBorrowsETH = availableBorrowsETH > totalDebtETH
+            ? availableBorrowsETH - totalDebtETH
+            : 0;
+
+        healthFactor = totalDebtETH == 0
+            ? uint256(-1)
+            : totalCollateralETH.percentMul(currentLiquidationThreshold).wadDiv(
+                totalDebtETH
+            );
+    }
+
+    /* Actions */
+    function deposit(
+        address asset,
+        uint256 amount,
+        address onBehalfOf,
+        uint16
+    ) external {
+        require(amount != 0, "1"); // VL_INVALID_AMOUNT
+        DataTypes.ReserveData storage reserve = _reserves[asset];
+        _updateState(reserve);
+
+        IERC20(asset).safeTransferFrom(msg.sender, address(this), amount);
+        MockScaledToken(reserve.aTokenAddress).mint(
+            onBehalfOf,
+            amount,
+            reserve.liquidityIndex
+        );
+    }
+
+    function withdraw(
+        address asset,
+        uint256 amount,
+        address to
+    ) external returns (uint256) {
+        DataTypes.ReserveData storage reserve = _reserves[asset];
+        _updateState(reserve);
+
+        MockScaledToken aToken = MockScaledToken(reserve.aTokenAddress);
+        uint256 userBalance = aToken.balanceOf(msg.sender);
+        uint256 amountToWithdraw = amount == uint256(-1) ? userBalance : amount;
+        require(amountToWithdraw != 0, "1"); // VL_INVALID_AMOUNT
+        require(amountToWithdraw <= userBalance, "32"); // VL_NOT_ENOUGH_AVAILABLE_USER_BALANCE
+
+        aToken.burn(msg.sender, amountToWithdraw, reserve.liquidityIndex);
+        (, , , , , uint256 healthFactor) = getUserAccountData(msg.sender);
+        require(healthFactor >= HEALTH_FACTOR_LIQUIDATION_THRESHOLD, "6"); // VL_TRANSFER_NOT_ALLOWED
+
+        IERC20(asset).safeTransfer(to, amountToWithdraw);
+        return amountToWithdraw;
+    }
+
+    function borrow(
+        address asset,
+        uint256 amount,
+        uint256,
+        uint16,
+        address onBehalfOf
+    ) external {
+        require(onBehalfOf == msg.sender); // dev: no credit delegation
+        _executeBorrow(asset, onBehalfOf, amount);
+        IERC20(asset).safeTransfer(msg.sender, amount);
+    }
+
+    function repay(
+        address asset,
+        uint256 amount,
+        uint256,
+        address onBehalfOf
+    ) external returns (uint256) {
+        DataTypes.ReserveData storage reserve = _reserves[asset];
+        _updateState(reserve);
+
+        MockScaledToken debtToken =
+            MockScaledToken(reserve.variableDebtTokenAddress);
+        uint256 paybackAmount = debtToken.balanceOf(onBehalfOf);
+        require(amount != 0, "1"); // VL_INVALID_AMOUNT
+        require(paybackAmount > 0, "39"); // VL_NO_DEBT_OF_SELECTED_TYPE
+        if (amount < paybackAmount) {
+            paybackAmount = amount;
+        }
+
+        debtToken.burn(onBehalfOf, paybackAmount, reserve.variableBorrowIndex);
+        IERC20(asset).safeTransferFrom(
+            msg.sender,
+            address(this),
+            paybackAmount
+        );
+        return paybackAmount;
+    }
+
+    function flashLoan(
+        address receiverAddress,
+        address[] memory assets,
+        uint256[] memory amounts,
+        uint256[] memory modes,
+        address onBehalfOf,
+        bytes memory params,
+        uint16
+    ) public {
+        require(assets.length == amounts.length, "73"); // VL_INCONSISTENT_FLASHLOAN_PARAMS
+
+        uint256[] memory premiums = new uint256[](assets.length);
+        for (uint256 i = 0; i < assets.length; i++) {
+            premiums[i] = amounts[i].mul(FLASHLOAN_PREMIUM_TOTAL).div(10000);
+            IERC20(assets[i]).safeTransfer(receiverAddress, amounts[i]);
+        }
+
+        require(
+            IFlashLoanReceiver(receiverAddress).executeOperation(
+                assets,
+                amounts,
+                premiums,
+                msg.sender,
+                params
+            ),
+            "60" // P_INVALID_FLASH_LOAN_EXECUTOR_RETURN
+        );
+
+        for (uint256 i = 0; i < assets.length; i++) {
+            if (modes[i] == 0) {
+                DataTypes.ReserveData storage reserve = _reserves[assets[i]];
+                _updateState(reserve);
+                _cumulateToLiquidityIndex(reserve, premiums[i]);
+
+                IERC20(assets[i]).safeTransferFrom(
+                    receiverAddress,
+                    address(this),
+                    amounts[i].add(premiums[i])
+                );
+            } else {
+                // Keep the funds, open the debt instead
+                require(onBehalfOf == msg.sender); // dev: no credit delegation
+                _executeBorrow(assets[i], onBehalfOf, amounts[i]);
+            }
+        }
+    }
+
+    // Repay up to half the debt of an account below health 1, for its collateral plus the bonus
+    // NOTE: receiveAToken is not supported, the liquidator always gets the underlying
+    function liquidationCall(
+        address collateralAsset,
+        address debtAsset,
+        address user,
+        uint256 debtToCover,
+        bool receiveAToken
+    ) external {
+        require(!receiveAToken); // dev: receiveAToken
+        DataTypes.ReserveData storage collateralReserve =
+            _reserves[collateralAsset];
+        DataTypes.ReserveData storage debtReserve = _reserves[debtAsset];
+        _updateState(collateralReserve);
+        _updateState(debtReserve);
+
+        (, , , , , uint256 healthFactor) = getUserAccountData(user);
+        require(healthFactor < HEALTH_FACTOR_LIQUIDATION_THRESHOLD, "42"); // LPCM_HEALTH_FACTOR_NOT_BELOW_THRESHOLD
+
+        LiquidationVars memory vars =
+            _liquidationVars(collateralReserve, debtReserve, user);
+        require(vars.userCollateral > 0, "43"); // LPCM_COLLATERAL_CANNOT_BE_LIQUIDATED
+        require(vars.userDebt > 0, "44"); // LPCM_SPECIFIED_CURRENCY_NOT_BORROWED_BY_USER
+
+        vars.debtToLiquidate = Math.min(
+            debtToCover,
+            vars.userDebt.percentMul(LIQUIDATION_CLOSE_FACTOR_PERCENT)
+        );
+        vars.collateralToLiquidate = vars
+            .debtPrice
+            .mul(vars.debtToLiquidate)
+            .mul(vars.collateralUnit)
+            .percentMul(vars.liquidationBonus)
+            .div(vars.collateralPrice.mul(vars.debtUnit));
+
+        // Not enough collateral, take all of it and repay only what it covers
+        if (vars.collateralToLiquidate > vars.userCollateral) {
+            vars.collateralToLiquidate = vars.userCollateral;
+            vars.debtToLiquidate = vars
+                .collateralPrice
+                .mul(vars.collateralToLiquidate)
+                .mul(vars.debtUnit)
+                .div(vars.debtPrice.mul(vars.collateralUnit))
+                .percentDiv(vars.liquidationBonus);
+        }
+
+        MockScaledToken(debtReserve.variableDebtTokenAddress).burn(
+            user,
+            vars.debtToLiquidate,
+            debtReserve.variableBorrowIndex
+        );
+        MockScaledToken(collateralReserve.aTokenAddress).burn(
+            user,
+            vars.collateralToLiquidate,
+            collateralReserve.liquidityIndex
+        );
+
+        IERC20(debtAsset).safeTransferFrom(
+            msg.sender,
+            address(this),
+            vars.debtToLiquidate
+        );
+        IERC20(collateralAsset).safeTransfer(
+            msg.sender,
+            vars.collateralToLiquidate
+        );
+    }
+
+    /* Internal */
+    function _liquidationVars(
+        DataTypes.ReserveData storage collateralReserve,
+        DataTypes.ReserveData storage debtReserve,
+        address user
+    ) internal view returns (LiquidationVars memory vars) {
+        IPriceOracle oracle =
+            IPriceOracle(ADDRESSES_PROVIDER.getPriceOracle());
+
+        vars.userCollateral = MockScaledToken(collateralReserve.aTokenAddress)
+            .balanceOf(user);
+        vars.userDebt = MockScaledToken(debtReserve.variableDebtTokenAddress)
+            .balanceOf(user);
+        vars.collateralPrice = oracle.getAssetPrice(
+            MockScaledToken(collateralReserve.aTokenAddress)
+                .UNDERLYING_ASSET_ADDRESS()
+        );
+        vars.debtPrice = oracle.getAssetPrice(
+            MockScaledToken(debtReserve.variableDebtTokenAddress)
+                .UNDERLYING_ASSET_ADDRESS()
+        );
+        vars.collateralUnit =
+            10**((collateralReserve.configuration.data >> 48) & 0xFF);
+        vars.debtUnit = 10**((debtReserve.configuration.data >> 48) & 0xFF);
+        vars.liquidationBonus =
+            (collateralReserve.configuration.data >> 32) &
+            0xFFFF;
+    }
+
+    // Sum of collateral and debt in ETH, and ETH weighted ltv and liquidation threshold
+    function _accountVars(address user)
+        internal
+        view
+        returns (AccountVars memory vars)
+    {
+        IPriceOracle oracle =
+            IPriceOracle(ADDRESSES_PROVIDER.getPriceOracle());
+
+        for (uint256 i = 0; i < _reservesList.length; i++) {
+            DataTypes.ReserveData storage reserve = _reserves[_reservesList[i]];
+            vars.aBalance = MockScaledToken(reserve.aTokenAddress).balanceOf(
+                user
+            );
+            vars.vBalance = MockScaledToken(reserve.variableDebtTokenAddress)
+                .balanceOf(user);
+            if (vars.aBalance == 0 && vars.vBalance == 0) {
+                continue;
+            }
+
+            vars.configuration = reserve.configuration.data;
+            vars.tokenUnit = 10**((vars.configuration >> 48) & 0xFF);
+            vars.price = oracle.getAssetPrice(_reservesList[i]);
+
+            if (vars.aBalance > 0) {
+                vars.balanceETH = vars.price.mul(vars.aBalance).div(
+                    vars.tokenUnit
+                );
+                vars.totalCollateralETH = vars.totalCollateralETH.add(
+                    vars.balanceETH
+                );
+                vars.avgLtv = vars.avgLtv.add(
+                    vars.balanceETH.mul(vars.configuration & 0xFFFF)
+                );
+                vars.avgLiquidationThreshold = vars.avgLiquidationThreshold.add(
+                    vars.balanceETH.mul((vars.configuration >> 16) & 0xFFFF)
+                );
+            }
+
+            if (vars.vBalance > 0) {
+                vars.totalDebtETH = vars.totalDebtETH.add(
+                    vars.price.mul(vars.vBalance).div(vars.tokenUnit)
+                );
+            }
+        }
+    }
+
+    function _executeBorrow(
+        address asset,
+        address user,
+        uint256 amount
+    ) internal {
+        require(amount != 0, "1"); // VL_INVALID_AMOUNT
+        DataTypes.ReserveData storage reserve = _reserves[asset];
+        _updateState(reserve);
+
+        (
+            uint256 totalCollateralETH,
+            uint256 totalDebtETH,
+            ,
+            ,
+            uint256 ltv,
+            uint256 healthFactor
+        ) = getUserAccountData(user);
+        require(totalCollateralETH > 0, "9"); // VL_COLLATERAL_BALANCE_IS_0
+        require(healthFactor > HEALTH_FACTOR_LIQUIDATION_THRESHOLD, "10"); // VL_HEALTH_FACTOR_LOWER_THAN_LIQUIDATION_THRESHOLD
+
+        uint256 amountInETH =
+            IPriceOracle(ADDRESSES_PROVIDER.getPriceOracle())
+                .getAssetPrice(asset)
+                .mul(amount)
+                .div(10**((reserve.configuration.data >> 48) & 0xFF));
+        require(
+            totalDebtETH.add(amountInETH).percentDiv(ltv) <= totalCollateralETH,
+            "11" // VL_COLLATERAL_CANNOT_COVER_NEW_BORROW
+        );
+
+        MockScaledToken(reserve.variableDebtTokenAddress).mint(
+            user,
+            amount,
+            reserve.variableBorrowIndex
+        );
+    }
+
+    function _normalizedIncome(DataTypes.ReserveData storage reserve)
+        internal
+        view
+        returns (uint256)
+    {
+        if (reserve.lastUpdateTimestamp == block.timestamp) {
+            return reserve.liquidityIndex;
+        }
+        return
+            MockMath
+                .linearInterest(
+                reserve.currentLiquidityRate,
+                reserve.lastUpdateTimestamp
+            )
+                .rayMul(reserve.liquidityIndex);
+    }
+
+    function _normalizedDebt(DataTypes.ReserveData storage reserve)
+        internal
+        view
+        returns (uint256)
+    {
+        if (reserve.lastUpdateTimestamp == block.timestamp) {
+            return reserve.variableBorrowIndex;
+        }
+        return
+            MockMath
+                .compoundedInterest(
+                reserve.currentVariableBorrowRate,
+                reserve.lastUpdateTimestamp
+            )
+                .rayMul(reserve.variableBorrowIndex);
+    }
+
+    function _updateState(DataTypes.ReserveData storage reserve) internal {
+        reserve.liquidityIndex = uint128(_normalizedIncome(reserve));
+        reserve.variableBorrowIndex = uint128(_normalizedDebt(reserve));
+        reserve.lastUpdateTimestamp = uint40(block.timestamp);
+    }
+
+    // Flash loan premiums go to depositors, like ReserveLogic.cumulateToLiquidityIndex
+    function _cumulateToLiquidityIndex(
+        DataTypes.ReserveData storage reserve,
+        uint256 amount
+    ) internal {
+        uint256 totalLiquidity =
+            MockScaledToken(reserve.aTokenAddress).totalSupply();
+        if (totalLiquidity == 0 || amount == 0) {
+            return;
+        }
+
+        uint256 result = amount.rayDiv(totalLiquidity).add(MockMath.RAY);
+        reserve.liquidityIndex = uint128(
+            result.rayMul(reserve.liquidityIndex)
+        );
+    }
+}
@@ -0,0 +1,84 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {SafeMath} from "@openzeppelin/contracts/math/SafeMath.sol";
+
+// WadRayMath, PercentageMath and MathUtils from AAVE V2, rounding half up
+library MockMath {
+    using SafeMath for uint256;
+
+    uint256 internal constant WAD = 1e18;
+    uint256 internal constant RAY = 1e27;
+    uint256 internal constant PERCENTAGE_FACTOR = 1e4;
+    uint256 internal constant SECONDS_PER_YEAR = 365 days;
+
+    function rayMul(uint256 a, uint256 b) internal pure returns (uint256) {
+        if (a == 0 || b == 0) {
+            return 0;
+        }
+        return a.mul(b).add(RAY / 2).div(RAY);
+    }
+
+    function rayDiv(uint256 a, uint256 b) internal pure returns (uint256) {
+        return a.mul(RAY).add(b / 2).div(b);
+    }
+
+    function wadDiv(uint256 a, uint256 b) internal pure returns (uint256) {
+        return a.mul(WAD).add(b / 2).div(b);
+    }
+
+    function percentMul(uint256 value, uint256 percentage)
+        internal
+        pure
+        returns (uint256)
+    {
+        if (value == 0 || percentage == 0) {
+            return 0;
+        }
+        return
+            value.mul(percentage).add(PERCENTAGE_FACTOR / 2).div(
+                PERCENTAGE_FACTOR
+            );
+    }
+
+    function percentDiv(uint256 value, uint256 percentage)
+        internal
+        pure
+        returns (uint256)
+    {
+        return value.mul(PERCENTAGE_FACTOR).add(percentage / 2).div(percentage);
+    }
+
+    function linearInterest(uint256 rate, uint256 lastUpdateTimestamp)
+        internal
+        view
+        returns (uint256)
+    {
+        uint256 timeDifference = block.timestamp.sub(lastUpdateTimestamp);
+        return rate.mul(timeDifference).div(SECONDS_PER_YEAR).add(RAY);
+    }
+
+    function compoundedInterest(uint256 rate, uint256 lastUpdateTimestamp)
+        internal
+        view
+        returns (uint256)
+    {
+        uint256 exp = block.timestamp.sub(lastUpdateTimestamp);
+        if (exp == 0) {
+            return RAY;
+        }
+
+        uint256 expMinusOne = exp - 1;
+        uint256 expMinusTwo = exp > 2 ? exp - 2 : 0;
+
+        uint256 ratePerSecond = rate / SECONDS_PER_YEAR;
+        uint256 basePowerTwo = rayMul(ratePerSecond, ratePerSecond);
+        uint256 basePowerThree = rayMul(basePowerTwo, ratePerSecond);
+
+        uint256 secondTerm = exp.mul(expMinusOne).mul(basePowerTwo) / 2;
+        uint256 thirdTerm =
+            exp.mul(expMinusOne).mul(expMinusTwo).mul(basePowerThree) / 6;
+
+        return RAY.add(ratePerSecond.mul(exp)).add(secondTerm).add(thirdTerm);
+    }
+}
@@ -0,0 +1,22 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+// Prices in ETH wei for one whole token, set by hand
+contract MockPriceOracle {
+    mapping(address => uint256) public getAssetPrice;
+
+    function setAssetPrice(address asset, uint256 price) external {
+        getAssetPrice[asset] = price;
+    }
+
+    function getAssetsPrices(address[] calldata assets)
+        external
+        view
+        returns (uint256[] memory prices)
+    {
+        prices = new uint256[](assets.length);
+        for (uint256 i = 0; i < assets.length; i++) {
+            prices[i] = getAssetPrice[assets[i]];
+        }
+    }
+}
@@ -0,0 +1,147 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {SafeMath} from "@openzeppelin/contracts/math/SafeMath.sol";
+
+import {MockMath} from "./MockMath.sol";
+
+interface IMockLendingPool {
+    function getReserveNormalizedIncome(address asset)
+        external
+        view
+        returns (uint256);
+
+    function getReserveNormalizedVariableDebt(address asset)
+        external
+        view
+        returns (uint256);
+}
+
+interface IIncentivesHandler {
+    function handleAction(
+        address user,
+        uint256 totalSupply,
+        uint256 userBalance
+    ) external;
+}
+
+// aToken or variable debt token, balances are stored scaled by the reserve index
+// Like IncentivizedERC20 it tells the incentives controller about every balance change
+contract MockScaledToken {
+    using SafeMath for uint256;
+    using MockMath for uint256;
+
+    address public immutable POOL;
+    address public immutable UNDERLYING_ASSET_ADDRESS;
+    bool public immutable isDebtToken;
+    uint8 public immutable decimals;
+    address public immutable INCENTIVES_CONTROLLER;
+
+    mapping(address => uint256) internal _scaledBalances;
+    uint256 internal _scaledTotalSupply;
+
+    event Transfer(address indexed from, address indexed to, uint256 value);
+
+    constructor(
+        address pool,
+        address underlying,
+        uint8 _decimals,
+        bool _isDebtToken,
+        address incentivesController
+    ) public {
+        POOL = pool;
+        UNDERLYING_ASSET_ADDRESS = underlying;
+        decimals = _decimals;
+        isDebtToken = _isDebtToken;
+        INCENTIVES_CONTROLLER = incentivesController;
+    }
+
+    modifier onlyPool() {
+        require(msg.sender == POOL); // dev: !pool
+        _;
+    }
+
+    function _index() internal view returns (uint256) {
+        if (isDebtToken) {
+            return
+                IMockLendingPool(POOL).getReserveNormalizedVariableDebt(
+                    UNDERLYING_ASSET_ADDRESS
+                );
+        }
+        return
+            IMockLendingPool(POOL).getReserveNormalizedIncome(
+                UNDERLYING_ASSET_ADDRESS
+            );
+    }
+
+    function balanceOf(address user) public view returns (uint256) {
+        return _scaledBalances[user].rayMul(_index());
+    }
+
+    function totalSupply() public view returns (uint256) {
+        return _scaledTotalSupply.rayMul(_index());
+    }
+
+    function scaledBalanceOf(address user) external view returns (uint256) {
+        return _scaledBalances[user];
+    }
+
+    function scaledTotalSupply() external view returns (uint256) {
+        return _scaledTotalSupply;
+    }
+
+    function mint(
+        address user,
+        uint256 amount,
+        uint256 index
+    ) external onlyPool {
+        uint256 amountScaled = amount.rayDiv(index);
+        require(amountScaled != 0, "56"); // CT_INVALID_MINT_AMOUNT
+        _handleAction(user);
+
+        _scaledBalances[user] = _scaledBalances[user].add(amountScaled);
+        _scaledTotalSupply = _scaledTotalSupply.add(amountScaled);
+        emit Transfer(address(0), user, amount);
+    }
+
+    function burn(
+        address user,
+        uint256 amount,
+        uint256 index
+    ) external onlyPool {
+        uint256 amountScaled = amount.rayDiv(index);
+        require(amountScaled != 0, "57"); // CT_INVALID_BURN_AMOUNT
+        _handleAction(user);
+
+        _scaledBalances[user] = _scaledBalances[user].sub(amountScaled);
+        _scaledTotalSupply = _scaledTotalSupply.sub(amountScaled);
+        emit Transfer(user, address(0), amount);
+    }
+
+    // Called before the balance changes, with the scaled values, like AAVE
+    function _handleAction(address user) internal {
+        if (INCENTIVES_CONTROLLER != address(0)) {
+            IIncentivesHandler(INCENTIVES_CONTROLLER).handleAction(
+                user,
+                _scaledTotalSupply,
+                _scaledBalances[user]
+            );
+        }
+    }
+
+    // NOTE: Unlike AAVE we don't check the sender's health factor
+    function transfer(address to, uint256 amount) external returns (bool) {
+        require(!isDebtToken); // dev: debt is not transferable
+
+        uint256 amountScaled = amount.rayDiv(_index());
+        _handleAction(msg.sender);
+        _handleAction(to);
+
+        _scaledBalances[msg.sender] = _scaledBalances[msg.sender].sub(
+            amountScaled
+        );
+        _scaledBalances[to] = _scaledBalances[to].add(amountScaled);
+        emit Transfer(msg.sender, to, amount);
+        return true;
+    }
+}
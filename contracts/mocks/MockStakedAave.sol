@@ -0,0 +1,89 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {
+    SafeERC20,
+    SafeMath,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+import {MockERC20} from "./MockERC20.sol";
+
+// stkAAVE: AAVE staked 1:1, redeemable after the cooldown, within the unstake window
+// NOTE: No staking rewards and staking doesn't move the cooldown like StakedToken does
+contract MockStakedAave is MockERC20 {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint256 public constant COOLDOWN_SECONDS = 10 days;
+    uint256 public constant UNSTAKE_WINDOW = 2 days;
+
+    address public immutable STAKED_TOKEN;
+
+    mapping(address => uint256) public stakersCooldowns;
+
+    event Staked(
+        address indexed from,
+        address indexed onBehalfOf,
+        uint256 amount
+    );
+    event Redeem(address indexed from, address indexed to, uint256 amount);
+    event Cooldown(address indexed user);
+
+    constructor(address stakedToken)
+        public
+        MockERC20("Staked Aave", "stkAAVE", 18)
+    {
+        STAKED_TOKEN = stakedToken;
+    }
+
+    function stake(address onBehalfOf, uint256 amount) external {
+        require(amount != 0, "INVALID_ZERO_AMOUNT");
+
+        mint(onBehalfOf, amount);
+        IERC20(STAKED_TOKEN).safeTransferFrom(
+            msg.sender,
+            address(this),
+            amount
+        );
+        emit Staked(msg.sender, onBehalfOf, amount);
+    }
+
+    function redeem(address to, uint256 amount) external {
+        require(amount != 0, "INVALID_ZERO_AMOUNT");
+        uint256 cooldownStartTimestamp = stakersCooldowns[msg.sender];
+        require(
+            block.timestamp > cooldownStartTimestamp.add(COOLDOWN_SECONDS),
+            "INSUFFICIENT_COOLDOWN"
+        );
+        require(
+            block.timestamp.sub(cooldownStartTimestamp.add(COOLDOWN_SECONDS)) <=
+                UNSTAKE_WINDOW,
+            "UNSTAKE_WINDOW_FINISHED"
+        );
+
+        uint256 balance = balanceOf[msg.sender];
+        uint256 amountToRedeem = amount > balance ? balance : amount;
+
+        burn(msg.sender, amountToRedeem);
+        if (balance.sub(amountToRedeem) == 0) {
+            stakersCooldowns[msg.sender] = 0;
+        }
+
+        IERC20(STAKED_TOKEN).safeTransfer(to, amountToRedeem);
+        emit Redeem(msg.sender, to, amountToRedeem);
+    }
+
+    function cooldown() external {
+        require(balanceOf[msg.sender] != 0, "INVALID_BALANCE_ON_COOLDOWN");
+        stakersCooldowns[msg.sender] = block.timestamp;
+        emit Cooldown(msg.sender);
+    }
+
+    // Staking rewards, there are none
+    function claimRewards(address, uint256) external pure {}
+
+    function getTotalRewardsBalance(address) external pure returns (uint256) {
+        return 0;
+    }
+}
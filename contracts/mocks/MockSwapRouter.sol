@@ -0,0 +1,150 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import {
+    SafeERC20,
+    SafeMath,
+    IERC20
+} from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+import {ERC20} from "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+import {
+    ILendingPoolAddressesProvider
+} from "../../interfaces/aave/ILendingPoolAddressesProvider.sol";
+import {IPriceOracle} from "../../interfaces/aave/IPriceOracle.sol";
+import {ISwapRouter} from "../../interfaces/uniswap/ISwapRouter.sol";
+
+interface IMintable {
+    function mint(address to, uint256 amount) external;
+}
+
+// Uniswap V3 SwapRouter with infinitely deep pools: every hop trades at the AAVE oracle
+// price minus the pool fee. Input is kept, output is minted so tokens out must be mocks
+contract MockSwapRouter {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint256 internal constant FEE_DENOMINATOR = 1e6;
+    uint256 internal constant ADDR_SIZE = 20;
+    uint256 internal constant NEXT_OFFSET = 23; // address + uint24 fee
+
+    ILendingPoolAddressesProvider public immutable ADDRESSES_PROVIDER;
+
+    constructor(address addressesProvider) public {
+        ADDRESSES_PROVIDER = ILendingPoolAddressesProvider(addressesProvider);
+    }
+
+    function exactInputSingle(ISwapRouter.ExactInputSingleParams calldata params)
+        external
+        payable
+        returns (uint256 amountOut)
+    {
+        require(block.timestamp <= params.deadline, "Transaction too old");
+
+        amountOut = quote(
+            params.tokenIn,
+            params.tokenOut,
+            params.fee,
+            params.amountIn
+        );
+        _swap(
+            params.tokenIn,
+            params.tokenOut,
+            params.recipient,
+            params.amountIn,
+            amountOut,
+            params.amountOutMinimum
+        );
+    }
+
+    function exactInput(ISwapRouter.ExactInputParams memory params)
+        external
+        payable
+        returns (uint256 amountOut)
+    {
+        require(block.timestamp <= params.deadline, "Transaction too old");
+
+        uint256 hops = (params.path.length - ADDR_SIZE) / NEXT_OFFSET;
+        address tokenIn = _tokenAt(params.path, 0);
+        address tokenOut = tokenIn;
+
+        amountOut = params.amountIn;
+        for (uint256 i = 0; i < hops; i++) {
+            address hopIn = tokenOut;
+            tokenOut = _tokenAt(params.path, (i + 1) * NEXT_OFFSET);
+            amountOut = quote(
+                hopIn,
+                tokenOut,
+                _feeAt(params.path, i * NEXT_OFFSET + ADDR_SIZE),
+                amountOut
+            );
+        }
+
+        _swap(
+            tokenIn,
+            tokenOut,
+            params.recipient,
+            params.amountIn,
+            amountOut,
+            params.amountOutMinimum
+        );
+    }
+
+    // amountIn at the oracle price, less the pool fee (in hundredths of a bip, like V3)
+    function quote(
+        address tokenIn,
+        address tokenOut,
+        uint24 fee,
+        uint256 amountIn
+    ) public view returns (uint256) {
+        IPriceOracle oracle =
+            IPriceOracle(ADDRESSES_PROVIDER.getPriceOracle());
+
+        return
+            amountIn
+                .mul(oracle.getAssetPrice(tokenIn))
+                .mul(10**uint256(ERC20(tokenOut).decimals()))
+                .div(
+                oracle.getAssetPrice(tokenOut).mul(
+                    10**uint256(ERC20(tokenIn).decimals())
+                )
+            )
+                .mul(FEE_DENOMINATOR.sub(fee))
+                .div(FEE_DENOMINATOR);
+    }
+
+    function _swap(
+        address tokenIn,
+        address tokenOut,
+        address recipient,
+        uint256 amountIn,
+        uint256 amountOut,
+        uint256 amountOutMinimum
+    ) internal {
+        require(amountOut >= amountOutMinimum, "Too little received");
+
+        IERC20(tokenIn).safeTransferFrom(msg.sender, address(this), amountIn);
+        IMintable(tokenOut).mint(recipient, amountOut);
+    }
+
+    function _tokenAt(bytes memory path, uint256 offset)
+        internal
+        pure
+        returns (address token)
+    {
+        assembly {
+            token := shr(96, mload(add(add(path, 32), offset)))
+        }
+    }
+
+    function _feeAt(bytes memory path, uint256 offset)
+        internal
+        pure
+        returns (uint24 fee)
+    {
+        assembly {
+            fee := shr(232, mload(add(add(path, 32), offset)))
+        }
+    }
+}
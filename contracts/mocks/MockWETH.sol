@@ -0,0 +1,22 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import {MockERC20} from "./MockERC20.sol";
+
+// WETH9, sending ETH wraps it
+contract MockWETH is MockERC20 {
+    constructor() public MockERC20("Wrapped Ether", "WETH", 18) {}
+
+    receive() external payable {
+        deposit();
+    }
+
+    function deposit() public payable {
+        mint(msg.sender, msg.value);
+    }
+
+    function withdraw(uint256 amount) external {
+        burn(msg.sender, amount);
+        msg.sender.transfer(amount);
+    }
+}
@@ -3,4 +3,9 @@ pragma solidity 0.6.12;
 
 interface IPriceOracle {
     function getAssetPrice(address _asset) external view returns (uint256);
+
+    function getAssetsPrices(address[] calldata _assets)
+        external
+        view
+        returns (uint256[] memory);
 }
@@ -0,0 +1,18 @@
+// SPDX-License-Identifier: agpl-3.0
+pragma solidity 0.6.12;
+
+interface IScaledBalanceToken {
+    /**
+     * @dev Returns the scaled balance of the user. The scaled balance is the sum of all the
+     * updated stored balance divided by the reserve's liquidity index at the moment of the update
+     * @param user The user whose balance is calculated
+     * @return The scaled balance of the user
+     **/
+    function scaledBalanceOf(address user) external view returns (uint256);
+
+    /**
+     * @dev Returns the scaled total supply of the variable debt token. Represents sum(debt/index)
+     * @return The scaled total supply
+     **/
+    function scaledTotalSupply() external view returns (uint256);
+}
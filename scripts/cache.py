@@ -0,0 +1,258 @@
+"""
+On-disk cache of eth_call results at past blocks
+
+A call pinned to a block that can't be reorged anymore always returns the same thing,
+so its result is kept in SQLite, keyed by (chain id, block, contract, calldata), and
+the node is only asked once. Multicalls are cached as one call. Calls at "latest",
+"pending" or any other tag, and blocks less than `confirmations` behind the head, go
+to the node every time.
+
+The file is bounded to `max_bytes` of results, the least recently used are dropped
+first.
+
+    >>> from scripts import cache
+    >>> cache.install()  ## On brownie's web3, until uninstall()
+    >>> stats.report(addresses, block=15_000_000)  ## The second run doesn't hit the node
+
+`brownie run stats` installs it, STATS_CACHE=0 turns it off:
+
+    $ STATS_BLOCK=15000000 brownie run stats --network mainnet
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+try:
+    ## web3 v7 (brownie >= 1.22) only takes class based middleware
+    from web3.middleware import Web3Middleware
+except ImportError:
+    ## web3 v5 / v6, `make_request` is wrapped by a plain function, see install
+    Web3Middleware = object
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_PATH = ROOT / "reports" / "cache.sqlite"
+
+MAX_BYTES = 256 * 1024 * 1024
+
+## Blocks behind the head before a result is cached, same as the ledger's REORG_DEPTH
+CONFIRMATIONS = 64
+
+## How long the head we know is trusted, about a block
+HEAD_TTL = 12
+
+NAME = "response_cache"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    chain_id INTEGER NOT NULL,
+    block_number INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    calldata TEXT NOT NULL,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, block_number, address, calldata)
+);
+CREATE INDEX IF NOT EXISTS responses_by_use ON responses (last_used);
+"""
+
+
+def block_number(identifier):
+    ## The block an eth_call is pinned to, None for tags and block hashes
+    if isinstance(identifier, int):
+        return identifier
+    if isinstance(identifier, str) and identifier.startswith("0x"):
+        return int(identifier, 16)
+    return None
+
+
+class ResponseCache:
+    """
+    eth_call results by (chain id, block, contract, calldata), least recently used out
+    Safe to share between threads
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_BYTES):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        ## It's a cache, losing the last writes on a crash is fine
+        self.db = sqlite3.connect(
+            str(path), check_same_thread=False, isolation_level=None
+        )
+        self.db.execute("PRAGMA synchronous = OFF")
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self.max_bytes = max_bytes
+
+        (size, last_used) = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM responses"
+        ).fetchone()
+        self.size = size
+        self.clock = last_used
+        self.hits = 0
+        self.misses = 0
+
+    def _tick(self):
+        self.clock += 1
+        return self.clock
+
+    def get(self, chain_id, block, address, calldata):
+        key = (chain_id, block, address.lower(), calldata.lower())
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result FROM responses WHERE chain_id = ? AND block_number = ?"
+                " AND address = ? AND calldata = ?",
+                key,
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.db.execute(
+                "UPDATE responses SET last_used = ? WHERE chain_id = ? AND block_number = ?"
+                " AND address = ? AND calldata = ?",
+                (self._tick(),) + key,
+            )
+            return json.loads(row[0])
+
+    def put(self, chain_id, block, address, calldata, result):
+        key = (chain_id, block, address.lower(), calldata.lower())
+        value = json.dumps(result)
+        size = len(value) + len(key[3])
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            previous = self.db.execute(
+                "SELECT size FROM responses WHERE chain_id = ? AND block_number = ?"
+                " AND address = ? AND calldata = ?",
+                key,
+            ).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                key + (value, size, self._tick()),
+            )
+            self.size += size - (previous[0] if previous else 0)
+            self._evict()
+
+    def _evict(self):
+        ## Drop the least recently used until we fit
+        while self.size > self.max_bytes:
+            rows = self.db.execute(
+                "SELECT rowid, size FROM responses ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                self.size = 0
+                return
+
+            freed = []
+            for (rowid, size) in rows:
+                if self.size <= self.max_bytes:
+                    break
+                freed.append(rowid)
+                self.size -= size
+            self.db.execute(
+                f"DELETE FROM responses WHERE rowid IN ({','.join('?' * len(freed))})",
+                freed,
+            )
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.size = 0
+
+    def close(self):
+        self.db.close()
+
+
+class CacheMiddleware(Web3Middleware):
+    """
+    Answers eth_call at confirmed blocks from a ResponseCache, see install
+    """
+
+    def __init__(self, w3, cache, confirmations=CONFIRMATIONS):
+        if Web3Middleware is not object:
+            super().__init__(w3)
+        self.cache = cache
+        self.confirmations = confirmations
+        self.chain_id = None
+        self.head = None
+        self.head_time = 0
+
+    def _confirmed(self, make_request, block):
+        ## Only ask for the head again when the one we know is too old for this block
+        if self.confirmations == 0:
+            return True
+        if self.head is None or (
+            block + self.confirmations > self.head
+            and time.monotonic() - self.head_time > HEAD_TTL
+        ):
+            self.head = int(make_request("eth_blockNumber", [])["result"], 16)
+            self.head_time = time.monotonic()
+        return block + self.confirmations <= self.head
+
+    def wrap_make_request(self, make_request):
+        def middleware(method, params):
+            if method != "eth_call" or len(params) != 2:
+                ## State overrides and everything else go through
+                return make_request(method, params)
+
+            (transaction, identifier) = params
+            block = block_number(identifier)
+            if block is None or "to" not in transaction:
+                return make_request(method, params)
+
+            if self.chain_id is None:
+                self.chain_id = int(make_request("eth_chainId", [])["result"], 16)
+            ## The sender can change what a view returns, keep it in the key
+            address = transaction["to"]
+            if transaction.get("from"):
+                address = f"{address}:{transaction['from']}"
+            calldata = transaction.get("data") or transaction.get("input") or "0x"
+
+            result = self.cache.get(self.chain_id, block, address, calldata)
+            if result is not None:
+                return {"jsonrpc": "2.0", "id": 0, "result": result}
+
+            response = make_request(method, params)
+            if "result" in response and self._confirmed(make_request, block):
+                self.cache.put(
+                    self.chain_id, block, address, calldata, response["result"]
+                )
+            return response
+
+        return middleware
+
+
+def install(w3=None, path=CACHE_PATH, max_bytes=MAX_BYTES, confirmations=CONFIRMATIONS):
+    """
+    Cache eth_call at past blocks on `w3` (brownie's by default)
+    Returns the middleware, its `cache` has the hit and miss counts
+    """
+    if w3 is None:
+        from brownie import web3 as w3
+
+    uninstall(w3)
+    middleware = CacheMiddleware(
+        w3, ResponseCache(path, max_bytes), confirmations=confirmations
+    )
+    ## Outermost, a hit skips every other middleware
+    if Web3Middleware is object:
+        w3.middleware_onion.add(
+            lambda make_request, _w3: middleware.wrap_make_request(make_request),
+            name=NAME,
+        )
+    else:
+        w3.middleware_onion.add(lambda _w3: middleware, name=NAME)
+    return middleware
+
+
+def uninstall(w3=None):
+    if w3 is None:
+        from brownie import web3 as w3
+
+    if NAME in w3.middleware_onion:
+        w3.middleware_onion.remove(NAME)
@@ -1,13 +1,66 @@
+"""
+Deploy the Strategy
+
+Interactive by default, one strategy per run. With DEPLOY_MANIFEST set, every strategy
+of a JSON manifest is deployed and configured in one run, without prompts:
+
+    $ DEPLOY_ACCOUNT=deployer DEPLOY_MANIFEST=deploy.json brownie run deploy --network mainnet
+
+    {
+      "defaults": {"keeper": "0x...", "healthCheck": "0x...", "settings": {"setMaxIterations": 10}},
+      "strategies": [
+        {"name": "wbtc", "vault": "0x...", "settings": {"setHealthBand": [1.1e18, 1.2e18]}},
+        {"name": "wbtc-flash", "vault": "0x...", "settings": {"setUseFlashLoan": true},
+         "addStrategy": {"debtRatio": 5000}}
+      ]
+    }
+
+Each strategy is deployed, then gets setKeeper, setHealthCheck, its settings in order and
+vault.addStrategy last (`"addStrategy": false` leaves that to governance). Transactions
+are sent back to back with local nonces and the strategy's address computed from the
+deploy nonce, receipts are only waited for at the end.
+
+Progress is kept in DEPLOY_STATE (the manifest's name with .state.json), a run after a
+failure only sends the steps that didn't go through. Steps already done are not sent
+again, even if the manifest changed. A step the account isn't allowed to send is left
+with its calldata, for governance.
+"""
+import json
+import os
+from dataclasses import dataclass
 from pathlib import Path
 
-from brownie import Strategy, accounts, config, network, project, web3
-from eth_utils import is_checksum_address
+import rlp
+from brownie import Contract, Strategy, accounts, config, network, project, web3
+from eth_utils import is_checksum_address, keccak, to_bytes, to_checksum_address
+from web3.exceptions import TimeExhausted, TransactionNotFound
 import click
 
+from scripts.nonces import NonceManager
+
 API_VERSION = config["dependencies"][0].split("@")[-1]
-Vault = project.load(
-    Path.home() / ".brownie" / "packages" / config["dependencies"][0]
-).Vault
+
+MAX_UINT256 = 2 ** 256 - 1
+DEPLOY_GAS = 12_000_000
+# Calls to a strategy that isn't mined yet can't be estimated
+CALL_GAS = 500_000
+# Seconds to wait for each receipt at the end, still pending after is left to a rerun
+WAIT_TIMEOUT = 600
+
+# vault.addStrategy arguments, in order
+ADD_STRATEGY = {
+    "debtRatio": 10_000,
+    "minDebtPerHarvest": 0,
+    "maxDebtPerHarvest": MAX_UINT256,
+    "performanceFee": 1_000,
+}
+
+
+def load_vault():
+    # Loading the Vault package compiles it, only do it when we deploy
+    return project.load(
+        Path.home() / ".brownie" / "packages" / config["dependencies"][0]
+    ).Vault
 
 
 def get_address(msg: str, default: str = None) -> str:
@@ -31,11 +84,20 @@ def get_address(msg: str, default: str = None) -> str:
 
 def main():
     print(f"You are using the '{network.show_active()}' network")
+    if "DEPLOY_MANIFEST" in os.environ:
+        dev = accounts.load(os.environ["DEPLOY_ACCOUNT"])
+        deploy_manifest(
+            dev,
+            os.environ["DEPLOY_MANIFEST"],
+            state_path=os.environ.get("DEPLOY_STATE"),
+        )
+        return
+
     dev = accounts.load(click.prompt("Account", type=click.Choice(accounts.load())))
     print(f"You are using: 'dev' [{dev.address}]")
 
     if input("Is there a Vault for this strategy already? y/[N]: ").lower() == "y":
-        vault = Vault.at(get_address("Deployed Vault: "))
+        vault = load_vault().at(get_address("Deployed Vault: "))
         assert vault.apiVersion() == API_VERSION
     else:
         print("You should deploy one vault using scripts from Vault project")
@@ -58,3 +120,208 @@ def main():
     strategy = Strategy.deploy(
         vault, {"from": dev, "gas_limit": 12000000}, publish_source=publish_source
     )
+
+
+def create_address(sender: str, nonce: int) -> str:
+    # Where a contract deployed by `sender` with `nonce` ends up
+    return to_checksum_address(
+        keccak(rlp.encode([to_bytes(hexstr=sender), nonce]))[12:]
+    )
+
+
+@dataclass
+class Step:
+    name: str  # "deploy", a Strategy setter or "addStrategy"
+    target: str  # "strategy" or "vault"
+    args: list
+
+
+def plan(entry: dict, defaults: dict) -> list:
+    """
+    Steps of one manifest entry, in the order they are sent
+    """
+    settings = {**defaults.get("settings", {}), **entry.get("settings", {})}
+    entry = {**defaults, **entry}
+
+    steps = [Step("deploy", "strategy", [entry["vault"]])]
+    if entry.get("keeper"):
+        steps.append(Step("setKeeper", "strategy", [entry["keeper"]]))
+    if entry.get("healthCheck"):
+        steps.append(Step("setHealthCheck", "strategy", [entry["healthCheck"]]))
+    for (setter, args) in settings.items():
+        args = args if isinstance(args, list) else [args]
+        # 1.1e18 is read as a float, it meant the int
+        args = [int(arg) if isinstance(arg, float) else arg for arg in args]
+        steps.append(Step(setter, "strategy", args))
+
+    if entry.get("addStrategy", {}) is not False:
+        params = {
+            **ADD_STRATEGY,
+            **defaults.get("addStrategy", {}),
+            **(entry.get("addStrategy") or {}),
+        }
+        steps.append(Step("addStrategy", "vault", [params[k] for k in ADD_STRATEGY]))
+    return steps
+
+
+def tx_status(txid: str) -> str:
+    # "done", "failed", "pending" or "dropped", without waiting
+    try:
+        receipt = web3.eth.get_transaction_receipt(txid)
+    except TransactionNotFound:
+        try:
+            web3.eth.get_transaction(txid)
+            return "pending"
+        except TransactionNotFound:
+            return "dropped"
+    return "done" if receipt["status"] == 1 else "failed"
+
+
+class BatchDeployer:
+    """
+    Deploys and configures every strategy of a manifest, see the module's docstring
+    """
+
+    def __init__(self, account, manifest: dict, Vault, state_path):
+        self.account = account
+        self.manifest = manifest
+        self.Vault = Vault
+        self.state_path = Path(state_path)
+        self.state = (
+            json.loads(self.state_path.read_text()) if self.state_path.exists() else {}
+        )
+        self.nonces = NonceManager(account)
+
+    def save(self):
+        # Written after every send, a crash loses at most the tx in flight
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, indent=2))
+        tmp.replace(self.state_path)
+
+    def _record(self, name: str) -> dict:
+        record = self.state.setdefault(name, {"address": None, "steps": {}})
+        for step in record["steps"].values():
+            if step["status"] == "pending":
+                step["status"] = tx_status(step["tx"])
+
+        deploy = record["steps"].get("deploy")
+        if deploy is None or deploy["status"] not in ("done", "pending"):
+            # Deployed again at another address, everything after it too
+            record["address"] = None
+            record["steps"] = {}
+        return record
+
+    def _allowed(self, step: Step, vault) -> bool:
+        if step.name in ("deploy", "setKeeper"):
+            # We are the strategist
+            return True
+        if step.target == "vault":
+            return vault.governance() == self.account.address
+        return self.account.address in (vault.governance(), vault.management())
+
+    def _contract(self, step: Step, record: dict, vault):
+        # The contract a step after deploy is sent to, and its arguments
+        if step.target == "vault":
+            return (vault, [record["address"]] + step.args)
+        # Not mined yet, so not from Strategy.at which checks the code
+        strategy = Contract.from_abi(
+            "Strategy", record["address"], Strategy.abi, persist=False
+        )
+        return (strategy, step.args)
+
+    def _send(self, step: Step, record: dict, vault):
+        tx = {
+            "from": self.account,
+            "nonce": self.nonces.take(),
+            "required_confs": 0,
+        }
+        if step.name == "deploy":
+            receipt = Strategy.deploy(*step.args, {**tx, "gas_limit": DEPLOY_GAS})
+            record["address"] = create_address(self.account.address, tx["nonce"])
+            return receipt
+
+        (contract, args) = self._contract(step, record, vault)
+        return getattr(contract, step.name)(*args, {**tx, "gas_limit": CALL_GAS})
+
+    def send_strategy(self, entry: dict):
+        name = entry["name"]
+        record = self._record(name)
+        defaults = self.manifest.get("defaults", {})
+        vault = self.Vault.at(entry.get("vault") or defaults["vault"])
+
+        for step in plan(entry, defaults):
+            done = record["steps"].get(step.name)
+            if done and done["status"] in ("done", "pending"):
+                continue
+
+            if not self._allowed(step, vault):
+                (contract, args) = self._contract(step, record, vault)
+                record["steps"][step.name] = {
+                    "status": "skipped",
+                    "to": contract.address,
+                    "data": getattr(contract, step.name).encode_input(*args),
+                }
+                print(f"{name}: {step.name} needs governance, left for it")
+                continue
+
+            try:
+                receipt = self._send(step, record, vault)
+            except Exception as e:
+                # It may or may not have used the nonce, ask the node again
+                self.nonces.reset()
+                record["steps"][step.name] = {"status": "failed", "error": str(e)}
+                print(f"{name}: {step.name} failed to send: {e}")
+                self.save()
+                if step.name == "deploy":
+                    return
+                continue
+
+            record["steps"][step.name] = {"status": "pending", "tx": receipt.txid}
+            self.save()
+            print(f"{name}: {step.name} sent in {receipt.txid}")
+
+    def wait(self):
+        # Every tx we sent, or that a previous run left pending
+        for record in self.state.values():
+            for step in record["steps"].values():
+                if step["status"] != "pending":
+                    continue
+                try:
+                    web3.eth.wait_for_transaction_receipt(step["tx"], WAIT_TIMEOUT)
+                except TimeExhausted:
+                    pass
+                step["status"] = tx_status(step["tx"])
+        self.save()
+
+    def run(self) -> dict:
+        """
+        Send everything, then wait for it
+        Returns name -> step -> status
+        """
+        for entry in self.manifest["strategies"]:
+            self.send_strategy(entry)
+        self.wait()
+        return self.statuses()
+
+    def statuses(self) -> dict:
+        return {
+            name: {step: info["status"] for (step, info) in record["steps"].items()}
+            for (name, record) in self.state.items()
+        }
+
+    def addresses(self) -> dict:
+        return {name: record["address"] for (name, record) in self.state.items()}
+
+
+def deploy_manifest(account, manifest_path, Vault=None, state_path=None):
+    manifest_path = Path(manifest_path)
+    state_path = state_path or manifest_path.with_suffix(".state.json")
+    deployer = BatchDeployer(
+        account,
+        json.loads(manifest_path.read_text()),
+        Vault or load_vault(),
+        state_path,
+    )
+    for (name, steps) in deployer.run().items():
+        print(f"{name} at {deployer.state[name]['address']}: {steps}")
+    return deployer
@@ -0,0 +1,110 @@
+"""
+Gas report for tests/test_benchmark.py
+
+Every entry point is recorded as `entry/case` -> gas used, the report is written to
+reports/gas.json and compared against the baseline stored in benchmarks/gas_baseline.json.
+A result above baseline * (1 + threshold) is a regression and fails the benchmark. A case
+with no baseline is skipped: regenerate it with --update-gas-baseline and commit it when
+entry points or cases change.
+
+    $ brownie test tests/test_benchmark.py --mocks --network hardhat
+    $ brownie test tests/test_benchmark.py --mocks --network hardhat --update-gas-baseline
+    $ brownie run gas_benchmark  ## Compare the last report with the baseline
+"""
+import json
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+REPORT_PATH = ROOT / "reports" / "gas.json"
+BASELINE_PATH = ROOT / "benchmarks" / "gas_baseline.json"
+
+## 2% above baseline fails
+DEFAULT_THRESHOLD = 0.02
+
+
+def load(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with path.open() as fp:
+        return json.load(fp)
+
+
+def save(path, data):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as fp:
+        json.dump(data, fp, indent=2, sort_keys=True)
+        fp.write("\n")
+
+
+class GasBenchmark:
+    def __init__(self, baseline, threshold=DEFAULT_THRESHOLD, update=False):
+        self.baseline = baseline
+        self.threshold = threshold
+        ## Recording a new baseline, nothing to compare against
+        self.update = update
+        self.results = {}
+
+    def record(self, entry, case, tx):
+        self.results[f"{entry}/{case}"] = tx.gas_used
+        return tx
+
+    def regressions(self, results=None):
+        ## {key: (baseline, gas)} for every result past the threshold
+        results = self.results if results is None else results
+        return {
+            key: (self.baseline[key], gas)
+            for (key, gas) in results.items()
+            if key in self.baseline and gas > self.baseline[key] * (1 + self.threshold)
+        }
+
+    def missing(self, results=None):
+        ## Results with no baseline to compare against
+        results = self.results if results is None else results
+        return sorted(set(results) - set(self.baseline))
+
+    def check(self, case):
+        ## Fail the test for `case` if any of its entry points regressed
+        ## Returns the entry points with no baseline, the caller skips on those
+        if self.update:
+            return []
+
+        results = {
+            key: gas for (key, gas) in self.results.items() if key.endswith(f"/{case}")
+        }
+        regressed = self.regressions(results)
+        assert not regressed, "Gas regressions (baseline, now): " + ", ".join(
+            f"{key} {old} -> {new}" for (key, (old, new)) in regressed.items()
+        )
+        return self.missing(results)
+
+    def report(self):
+        return {
+            "threshold": self.threshold,
+            "results": self.results,
+            "regressions": {
+                key: {"baseline": old, "gas": new}
+                for (key, (old, new)) in self.regressions().items()
+            },
+            "missing_from_baseline": self.missing(),
+        }
+
+
+def main():
+    report = load(REPORT_PATH)
+    if not report:
+        print(f"No report at {REPORT_PATH}, run tests/test_benchmark.py first")
+        return
+
+    benchmark = GasBenchmark(load(BASELINE_PATH), report["threshold"])
+    for (key, gas) in sorted(report["results"].items()):
+        old = benchmark.baseline.get(key)
+        change = f"{(gas - old) / old:+.2%}" if old else "new"
+        print(f"{key:<60} {gas:>10} {change:>8}")
+
+    regressed = benchmark.regressions(report["results"])
+    print(f"{len(regressed)} regressions above {benchmark.threshold:.0%}")
+    missing = benchmark.missing(report["results"])
+    if missing:
+        print(f"{len(missing)} results without a baseline")
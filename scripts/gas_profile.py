@@ -0,0 +1,203 @@
+"""
+Gas of a transaction, per internal function and external call
+
+Walks the transaction's trace (debug_traceTransaction, so hardhat, anvil or a local
+geth) and charges every opcode to the function it runs in. Each function gets:
+
+  - exclusive: the opcodes it runs itself, calls out included but not what the callee
+    spends
+  - inclusive: everything until it returns, callees included, counted once when it
+    recurses
+
+Functions are named like brownie's call trace, `Contract.function`, and external
+calls to contracts brownie doesn't know by address and selector. The folded output
+(one `frame;frame;frame gas` line per call stack) goes into flamegraph.pl, inferno
+or speedscope as is.
+
+    $ GAS_PROFILE_TX=0x... brownie run gas_profile --network hardhat
+    $ brownie test tests/test_harvest.py --network hardhat --gas-profile
+
+    >>> profile = Profile()
+    >>> profile.add(strategy.harvest({"from": gov}))
+    >>> print(profile.table())
+    >>> profile.write_folded("reports/harvest.folded")
+
+NOTE: Refunds (SSTORE clears) and the intrinsic gas of the tx are not charged to any
+function, they are in the `<intrinsic and refunds>` row.
+"""
+import os
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TABLE_PATH = ROOT / "reports" / "gas_profile.txt"
+FOLDED_PATH = ROOT / "reports" / "gas_profile.folded"
+
+UNCHARGED = "<intrinsic and refunds>"
+
+
+def label(step):
+    ## `Contract.function`, unknown contracts by address instead
+    fn = step["fn"]
+    if fn.startswith("<UnknownContract>"):
+        return f"{step['address']}{fn[len('<UnknownContract>'):]}"
+    return fn
+
+
+def step_costs(trace):
+    """
+    Gas each step costs its own frame, a call doesn't include what the callee spends
+    """
+    costs = [0] * len(trace)
+    ## Index of the call step waiting for each depth to return
+    calls = []
+    for (i, step) in enumerate(trace):
+        following = trace[i + 1] if i + 1 < len(trace) else None
+
+        if following is None or following["depth"] < step["depth"]:
+            ## Last opcode of a frame
+            costs[i] = step["gasCost"]
+            if following is not None and calls:
+                call = calls.pop()
+                ## What the caller lost over the call, minus what the callee used
+                callee_used = trace[call + 1]["gas"] - (step["gas"] - step["gasCost"])
+                costs[call] = trace[call]["gas"] - following["gas"] - callee_used
+        elif following["depth"] > step["depth"]:
+            ## Into another contract, settled when it returns
+            calls.append(i)
+        else:
+            costs[i] = step["gas"] - following["gas"]
+
+    return costs
+
+
+def frames(trace):
+    """
+    The call stack at each step, as a tuple of labels
+    A frame is an external call (`depth`) or an internal one (`jumpDepth`)
+    """
+    stack = []
+    for step in trace:
+        level = (step["depth"], step["jumpDepth"])
+        while stack and stack[-1][0] > level:
+            stack.pop()
+        if stack and stack[-1][0] == level and stack[-1][1] != label(step):
+            stack.pop()
+        if not stack or stack[-1][0] != level:
+            stack.append((level, label(step)))
+        yield tuple(name for (_, name) in stack)
+
+
+class Profile:
+    """
+    Gas of one or many transactions, added up per function and per call stack
+    """
+
+    def __init__(self):
+        self.transactions = 0
+        self.gas_used = 0
+        self.exclusive = Counter()
+        self.inclusive = Counter()
+        ## Times a function was entered
+        self.calls = Counter()
+        ## Function -> "external" or "internal"
+        self.kinds = {}
+        ## Call stack -> exclusive gas of its last frame
+        self.folded = Counter()
+
+    def add(self, tx):
+        trace = tx.trace
+        costs = step_costs(trace)
+        previous = ()
+        for (step, cost, stack) in zip(trace, costs, frames(trace)):
+            name = stack[-1]
+            self.exclusive[name] += cost
+            self.folded[stack] += cost
+            ## Once per function on the stack, recursion isn't counted twice
+            for function in set(stack):
+                self.inclusive[function] += cost
+
+            ## Entered every frame past the part of the stack we were already in
+            common = 0
+            while (
+                common < min(len(stack), len(previous))
+                and stack[common] == previous[common]
+            ):
+                common += 1
+            for function in stack[common:]:
+                self.calls[function] += 1
+            previous = stack
+
+            if name not in self.kinds:
+                self.kinds[name] = "internal" if step["jumpDepth"] else "external"
+
+        uncharged = tx.gas_used - sum(costs)
+        self.exclusive[UNCHARGED] += uncharged
+        self.inclusive[UNCHARGED] += uncharged
+        self.folded[(UNCHARGED,)] += uncharged
+        self.kinds[UNCHARGED] = "tx"
+        self.calls[UNCHARGED] += 1
+
+        self.transactions += 1
+        self.gas_used += tx.gas_used
+        return self
+
+    def rows(self):
+        ## (function, kind, calls, inclusive, exclusive), most inclusive gas first
+        return sorted(
+            (
+                (
+                    name,
+                    self.kinds[name],
+                    self.calls[name],
+                    inclusive,
+                    self.exclusive[name],
+                )
+                for (name, inclusive) in self.inclusive.items()
+            ),
+            key=lambda row: (-row[3], row[0]),
+        )
+
+    def table(self, limit=None):
+        rows = self.rows()[:limit]
+        width = max([len("function")] + [len(row[0]) for row in rows])
+        lines = [
+            f"{self.transactions} txs, {self.gas_used} gas",
+            f"{'function':<{width}}  {'kind':<8}  {'calls':>6}  {'inclusive':>10}  {'exclusive':>10}  {'share':>6}",
+        ]
+        for (name, kind, calls, inclusive, exclusive) in rows:
+            share = inclusive / self.gas_used if self.gas_used else 0
+            lines.append(
+                f"{name:<{width}}  {kind:<8}  {calls:>6}  {inclusive:>10}  {exclusive:>10}  {share:>6.1%}"
+            )
+        return "\n".join(lines)
+
+    def folded_lines(self):
+        ## flamegraph.pl's input, negative (refunds) and empty stacks left out
+        return [
+            f"{';'.join(stack)} {gas}"
+            for (stack, gas) in sorted(self.folded.items())
+            if gas > 0
+        ]
+
+    def write_folded(self, path=FOLDED_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(self.folded_lines()) + "\n")
+
+    def write_table(self, path=TABLE_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.table() + "\n")
+
+
+def main():
+    from brownie import chain
+
+    profile = Profile()
+    for txid in os.environ["GAS_PROFILE_TX"].split(","):
+        if txid.strip():
+            profile.add(chain.get_transaction(txid.strip()))
+
+    print(profile.table(int(os.environ.get("GAS_PROFILE_LIMIT", 40))))
+    profile.write_folded(os.environ.get("GAS_PROFILE_OUTPUT", FOLDED_PATH))
@@ -0,0 +1,277 @@
+"""
+Keeper for any number of Strategies
+
+Every new block, the state of all strategies is read with multicalls per batch, all at
+the same block: `getState` and the gas estimates, then `harvestTrigger`, `tendTrigger`
+and `sellRewardsTrigger` at what each call would cost at the current gas price
+(`harvestTrigger` takes the price of a plain harvest and scales it to its own path). Each
+strategy then gets at most one action:
+
+  - emergency: health is below `emergency_health`, `manualDivestFromAAVE`
+  - harvest: `harvestTrigger`, the rewards, interest and credit pay for the harvest
+  - tend: `tendTrigger`, the debt drifted past ltv or there's room to lever up
+  - sellRewards: `sellRewardsTrigger`, enough rewards built up to sell a chunk
+
+Transactions are sent without waiting for them to be mined. Nonces are handed out
+locally so they can be pipelined, and a strategy with a pending tx is left alone.
+Gas price is the network's, capped at `max_gas_price` (emergencies at
+`emergency_max_gas_price`), above the cap we wait for cheaper blocks.
+
+    $ KEEPER_ACCOUNT=keeper KEEPER_STRATEGIES=0x...,0x... brownie run keeper --network mainnet
+
+Or from a console / test, one block at a time:
+
+    >>> keeper = Keeper(accounts[0], [strategy.address])
+    >>> keeper.tick()
+"""
+import asyncio
+import os
+from dataclasses import dataclass
+
+import brownie
+from brownie import Strategy, accounts, chain, web3
+from brownie.network.transaction import Status
+
+from scripts.nonces import NonceManager
+
+GWEI = 10 ** 9
+## Strategy.HARVEST_GAS, what harvestTrigger expects the call cost to be priced at
+HARVEST_GAS = 250_000
+
+
+@dataclass
+class KeeperConfig:
+    ## Gas price we pay at most, emergencies pay more
+    max_gas_price: int = 150 * GWEI
+    emergency_max_gas_price: int = 1_000 * GWEI
+    ## Bid this much over the network's gas price, in BPS
+    gas_price_premium: int = 1_000
+    ## Divest all below this health, 18 decimals
+    emergency_health: int = 1_020_000_000_000_000_000
+    ## Strategies per multicall
+    batch_size: int = 25
+    ## At most this many new txs per block
+    max_txs_per_block: int = 10
+    ## Seconds between checks for a new block
+    poll_interval: float = 2.0
+    ## Don't send anything, just log what we would do
+    dry_run: bool = False
+
+
+@dataclass
+class Action:
+    strategy: str
+    name: str  ## "emergency", "harvest", "tend" or "sellRewards"
+    reason: str
+
+
+def decide(address, state, harvest_trigger, tend_trigger, config, sell_trigger=False):
+    """
+    What to do with one strategy, `state` is `Strategy.getState` as a dict
+    None if nothing
+    """
+    if state["borrowed"] > 0 and state["healthFactor"] < config.emergency_health:
+        return Action(
+            address,
+            "emergency",
+            f"health {state['healthFactor'] / 1e18:.4f} < {config.emergency_health / 1e18:.4f}",
+        )
+
+    if harvest_trigger:
+        return Action(
+            address,
+            "harvest",
+            f"rewards worth {state['valueOfRewards']}, vault debt {state['vaultTotalDebt']}",
+        )
+
+    if tend_trigger:
+        if state["debtBelowHealth"] > 0:
+            reason = f"debt below health {state['debtBelowHealth']}"
+        else:
+            reason = f"can borrow {state['canBorrow']}, idle {state['wantBalance']}"
+        return Action(address, "tend", reason)
+
+    if sell_trigger:
+        return Action(
+            address, "sellRewards", f"rewards worth {state['valueOfRewards']}"
+        )
+
+    return None
+
+
+class Keeper:
+    def __init__(self, account, strategies, config=None):
+        self.account = account
+        self.config = config or KeeperConfig()
+        ## Address -> Strategy
+        self.strategies = {
+            strat.address: strat for strat in map(Strategy.at, strategies)
+        }
+        self.nonces = NonceManager(account)
+        ## Strategy address -> tx we sent and that isn't mined yet
+        self.pending = {}
+        self.last_block = None
+
+    ## Gas
+    def gas_price(self, emergency=False):
+        network_price = web3.eth.gas_price
+        bid = network_price * (10_000 + self.config.gas_price_premium) // 10_000
+        cap = (
+            self.config.emergency_max_gas_price
+            if emergency
+            else self.config.max_gas_price
+        )
+        if network_price > cap:
+            ## Too expensive right now, wait for a cheaper block
+            return None
+        return min(bid, cap)
+
+    ## Reads
+    def read_batch(self, strategies, block, gas_price):
+        ## State and gas estimates, then the triggers at what each call would cost
+        ## Two multicalls for the whole batch, every value at the same block
+        with brownie.multicall(block_identifier=block):
+            states = [
+                (
+                    strat,
+                    strat.getState(),
+                    strat.tendGasEstimate(),
+                    strat.sellRewardsGasEstimate(),
+                )
+                for strat in strategies
+            ]
+        with brownie.multicall(block_identifier=block):
+            calls = [
+                (
+                    strat,
+                    state,
+                    strat.harvestTrigger(gas_price * HARVEST_GAS),
+                    strat.tendTrigger(gas_price * tend_gas),
+                    strat.sellRewardsTrigger(gas_price * sell_gas),
+                )
+                for (strat, state, tend_gas, sell_gas) in states
+            ]
+        return [
+            (strat.address, dict(state.dict()), bool(harvest), bool(tend), bool(sell))
+            for (strat, state, harvest, tend, sell) in calls
+        ]
+
+    def read_all(self, block, gas_price):
+        strategies = list(self.strategies.values())
+        size = self.config.batch_size
+        return [
+            row
+            for i in range(0, len(strategies), size)
+            for row in self.read_batch(strategies[i : i + size], block, gas_price)
+        ]
+
+    ## Pending txs
+    def clear_pending(self):
+        for (address, tx) in list(self.pending.items()):
+            if tx.status == Status.Pending:
+                continue
+            if tx.status == Status.Dropped:
+                self.nonces.reset()
+            if tx.status == Status.Reverted:
+                print(f"{address}: {tx.fn_name} reverted in {tx.txid}")
+            del self.pending[address]
+
+    ## Writes
+    def send(self, action, gas_price):
+        strat = self.strategies[action.strategy]
+        fn = {
+            "emergency": strat.manualDivestFromAAVE,
+            "harvest": strat.harvest,
+            "tend": strat.tend,
+            "sellRewards": strat.sellRewards,
+        }[action.name]
+
+        try:
+            tx = fn(
+                {
+                    "from": self.account,
+                    "nonce": self.nonces.take(),
+                    "gas_price": gas_price,
+                    "required_confs": 0,
+                }
+            )
+        except Exception as e:
+            ## The nonce wasn't used, start again from the node's
+            self.nonces.reset()
+            print(f"{action.strategy}: {action.name} failed to send: {e}")
+            return None
+
+        self.pending[action.strategy] = tx
+        return tx
+
+    def tick(self, block=None):
+        """
+        Check every strategy at `block` (latest by default) and send what's needed
+        Returns the actions we took
+        """
+        block = chain.height if block is None else block
+        self.clear_pending()
+
+        gas_price = self.gas_price()
+        emergency_gas_price = self.gas_price(emergency=True)
+        if emergency_gas_price is None:
+            print(f"Block {block}: gas {web3.eth.gas_price} above every cap, waiting")
+            return []
+
+        ## Triggers compare rewards against gas at the price we'd pay
+        rows = self.read_all(block, gas_price or emergency_gas_price)
+        actions = [
+            action
+            for action in (
+                decide(address, state, harvest, tend, self.config, sell)
+                for (address, state, harvest, tend, sell) in rows
+                if address not in self.pending
+            )
+            if action is not None
+        ]
+
+        ## Emergencies first, they also ignore the gas cap and the per block limit
+        actions.sort(key=lambda action: action.name != "emergency")
+        sent = []
+        for action in actions:
+            emergency = action.name == "emergency"
+            if not emergency and (
+                gas_price is None or len(sent) >= self.config.max_txs_per_block
+            ):
+                continue
+
+            print(f"Block {block}: {action.name} {action.strategy}, {action.reason}")
+            if self.config.dry_run:
+                sent.append(action)
+                continue
+
+            if self.send(action, emergency_gas_price if emergency else gas_price):
+                sent.append(action)
+
+        self.last_block = block
+        return sent
+
+    async def run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            block = await loop.run_in_executor(None, lambda: web3.eth.block_number)
+            ## Only ever look at the latest block, if we're slow we skip, never queue
+            if block != self.last_block:
+                await loop.run_in_executor(None, self.tick, block)
+            await asyncio.sleep(self.config.poll_interval)
+
+
+def main():
+    account = accounts.load(os.environ["KEEPER_ACCOUNT"])
+    strategies = [
+        address.strip()
+        for address in os.environ["KEEPER_STRATEGIES"].split(",")
+        if address.strip()
+    ]
+    config = KeeperConfig(dry_run=os.environ.get("KEEPER_DRY_RUN") == "1")
+    if "KEEPER_MAX_GAS_PRICE" in os.environ:
+        config.max_gas_price = int(os.environ["KEEPER_MAX_GAS_PRICE"]) * GWEI
+
+    print(f"Keeping {len(strategies)} strategies from {account.address}")
+    keeper = Keeper(account, strategies, config)
+    asyncio.get_event_loop().run_until_complete(keeper.run())
@@ -0,0 +1,274 @@
+"""
+Local ledger of every harvest, see BaseStrategy's `Harvested` event
+
+Harvests are indexed into SQLite with their profit, loss, debt payment and the gas the
+tx paid, so APY, loss history and gas per harvest are queried locally instead of
+scanning the whole history from the node every time.
+
+Each strategy has a checkpoint (last block indexed and its hash), a run only fetches
+the blocks after it, in chunks that grow while the node keeps up and shrink when it
+doesn't (too many results or a timeout, anything else is raised). If the checkpoint's
+block was reorged away or is past the head, the last REORG_DEPTH blocks are dropped and
+indexed again.
+
+    $ LEDGER_STRATEGIES=0x...,0x... brownie run ledger --network mainnet
+
+    >>> ledger = Ledger("reports/ledger.sqlite")
+    >>> ledger.index(strategy.address)
+    >>> ledger.harvests(strategy.address, since=timestamp)
+"""
+import os
+import sqlite3
+from pathlib import Path
+
+from brownie import web3
+from eth_utils import encode_hex, keccak, to_checksum_address
+from hexbytes import HexBytes
+from requests.exceptions import Timeout
+from web3.exceptions import BlockNotFound
+
+try:
+    from web3.exceptions import Web3RPCError
+except ImportError:
+    ## web3 < 7 raises the node's errors as ValueError
+    Web3RPCError = ValueError
+
+ROOT = Path(__file__).resolve().parent.parent
+LEDGER_PATH = ROOT / "reports" / "ledger.sqlite"
+
+HARVESTED = encode_hex(keccak(text="Harvested(uint256,uint256,uint256,uint256)"))
+
+## Blocks we re-index when the checkpoint is not on chain anymore
+REORG_DEPTH = 64
+
+## Blocks per eth_getLogs, adapted to what the node can serve
+MIN_CHUNK = 1
+START_CHUNK = 2_000
+MAX_CHUNK = 100_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS harvests (
+    strategy TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    profit TEXT NOT NULL,
+    loss TEXT NOT NULL,
+    debt_payment TEXT NOT NULL,
+    debt_outstanding TEXT NOT NULL,
+    gas_used INTEGER NOT NULL,
+    gas_price INTEGER NOT NULL,
+    PRIMARY KEY (strategy, block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS harvests_by_time ON harvests (strategy, timestamp);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    strategy TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL
+);
+"""
+
+## uint256 are stored as TEXT, SQLite integers are 64 bits
+UINT_COLUMNS = ["profit", "loss", "debt_payment", "debt_outstanding"]
+
+
+def decode_harvested(data):
+    ## profit, loss, debtPayment, debtOutstanding
+    data = HexBytes(data)
+    return [int.from_bytes(data[i : i + 32], "big") for i in range(0, 128, 32)]
+
+
+class Ledger:
+    def __init__(self, path=LEDGER_PATH, start_block=0):
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        ## Where a strategy we never indexed starts
+        self.start_block = start_block
+        self.chunk = START_CHUNK
+        self._blocks = {}
+
+    ## Checkpoints
+    def checkpoint(self, strategy):
+        row = self.db.execute(
+            "SELECT block_number, block_hash FROM checkpoints WHERE strategy = ?",
+            (strategy,),
+        ).fetchone()
+        return (row["block_number"], row["block_hash"]) if row else None
+
+    def _set_checkpoint(self, strategy, block_number, block_hash):
+        self.db.execute(
+            "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+            (strategy, block_number, block_hash),
+        )
+
+    def _block(self, number):
+        if number not in self._blocks:
+            self._blocks[number] = web3.eth.get_block(number)
+        return self._blocks[number]
+
+    def _rewind(self, strategy, to_block):
+        ## Forget everything after `to_block`, it's indexed again
+        self.db.execute(
+            "DELETE FROM harvests WHERE strategy = ? AND block_number > ?",
+            (strategy, to_block),
+        )
+        if to_block < self.start_block:
+            self.db.execute("DELETE FROM checkpoints WHERE strategy = ?", (strategy,))
+        else:
+            self._set_checkpoint(
+                strategy, to_block, encode_hex(self._block(to_block).hash)
+            )
+
+    def _resume_from(self, strategy):
+        ## First block to fetch, after the checkpoint unless it was reorged away
+        checkpoint = self.checkpoint(strategy)
+        if checkpoint is None:
+            return self.start_block
+
+        (block_number, block_hash) = checkpoint
+        try:
+            if encode_hex(self._block(block_number).hash) == block_hash:
+                return block_number + 1
+        except BlockNotFound:
+            ## Past the head, the chain got shorter (reorg, or a node that was reset)
+            pass
+
+        to_block = max(
+            min(block_number - REORG_DEPTH, web3.eth.block_number),
+            self.start_block - 1,
+        )
+        self._rewind(strategy, to_block)
+        return to_block + 1
+
+    ## Indexing
+    def _get_logs(self, strategy, from_block, to_block):
+        return web3.eth.get_logs(
+            {
+                "address": strategy,
+                "topics": [HARVESTED],
+                "fromBlock": from_block,
+                "toBlock": to_block,
+            }
+        )
+
+    def _store(self, strategy, log):
+        (profit, loss, debt_payment, debt_outstanding) = decode_harvested(log["data"])
+        receipt = web3.eth.get_transaction_receipt(log["transactionHash"])
+        gas_price = receipt.get("effectiveGasPrice")
+        if gas_price is None:
+            gas_price = web3.eth.get_transaction(log["transactionHash"])["gasPrice"]
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO harvests VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                strategy,
+                log["blockNumber"],
+                encode_hex(log["blockHash"]),
+                self._block(log["blockNumber"])["timestamp"],
+                encode_hex(log["transactionHash"]),
+                log["logIndex"],
+                str(profit),
+                str(loss),
+                str(debt_payment),
+                str(debt_outstanding),
+                receipt["gasUsed"],
+                gas_price,
+            ),
+        )
+
+    def index(self, strategy, to_block=None):
+        """
+        Index `strategy`'s harvests up to `to_block` (latest by default)
+        Returns how many were added
+        """
+        strategy = to_checksum_address(strategy)
+        self._blocks = {}
+        to_block = web3.eth.block_number if to_block is None else to_block
+        from_block = self._resume_from(strategy)
+        self.db.commit()
+
+        added = 0
+        while from_block <= to_block:
+            chunk_end = min(from_block + self.chunk - 1, to_block)
+            try:
+                logs = self._get_logs(strategy, from_block, chunk_end)
+            except (ValueError, Web3RPCError, Timeout):
+                ## Too many results or too slow, ask for less
+                if self.chunk == MIN_CHUNK:
+                    raise
+                self.chunk = max(self.chunk // 2, MIN_CHUNK)
+                continue
+
+            for log in logs:
+                self._store(strategy, log)
+            added += len(logs)
+
+            ## Chunk and checkpoint go in together, a crash resumes from here
+            self._set_checkpoint(
+                strategy, chunk_end, encode_hex(self._block(chunk_end).hash)
+            )
+            self.db.commit()
+
+            from_block = chunk_end + 1
+            self.chunk = min(self.chunk * 2, MAX_CHUNK)
+
+        return added
+
+    ## Queries
+    def harvests(self, strategy, since=None, until=None):
+        """
+        Harvests of `strategy` with since <= timestamp <= until, oldest first
+        """
+        rows = self.db.execute(
+            "SELECT * FROM harvests WHERE strategy = ? AND timestamp >= ? AND timestamp <= ?"
+            " ORDER BY block_number, log_index",
+            (
+                to_checksum_address(strategy),
+                0 if since is None else since,
+                2 ** 63 - 1 if until is None else until,
+            ),
+        ).fetchall()
+        return [
+            {
+                key: int(row[key]) if key in UINT_COLUMNS else row[key]
+                for key in row.keys()
+            }
+            for row in rows
+        ]
+
+    def summary(self, strategy, since=None, until=None):
+        harvests = self.harvests(strategy, since, until)
+        return {
+            "harvests": len(harvests),
+            "profit": sum(harvest["profit"] for harvest in harvests),
+            "loss": sum(harvest["loss"] for harvest in harvests),
+            "debt_payment": sum(harvest["debt_payment"] for harvest in harvests),
+            "gas_used": sum(harvest["gas_used"] for harvest in harvests),
+            "gas_cost": sum(
+                harvest["gas_used"] * harvest["gas_price"] for harvest in harvests
+            ),
+        }
+
+
+def main():
+    strategies = [
+        address.strip()
+        for address in os.environ["LEDGER_STRATEGIES"].split(",")
+        if address.strip()
+    ]
+    ledger = Ledger(
+        os.environ.get("LEDGER_PATH", LEDGER_PATH),
+        int(os.environ.get("LEDGER_START_BLOCK", 0)),
+    )
+    for strategy in strategies:
+        added = ledger.index(strategy)
+        summary = ledger.summary(strategy)
+        print(
+            f"{strategy}: {added} new harvests, {summary['harvests']} in total, "
+            f"profit {summary['profit']}, loss {summary['loss']}, gas {summary['gas_used']}"
+        )
@@ -0,0 +1,325 @@
+"""
+Read-only report on levered strategies, without brownie or web3
+
+stats.py loads the brownie project, compiler artifacts and web3 before its first call,
+seconds of startup for a cron job. This reads the same state from the ABI shipped in
+abi/, with plain JSON-RPC: every call of every strategy goes in one batch request,
+pinned to the same block. Nothing heavier than `json` is imported until the request is
+sent, it starts in about the time of `python` itself.
+
+Strategies deployed before getState, lowerHealth and upperHealth are read with a second
+batch of the individual views (deposited, borrowed, ...). Their total debt, health
+factor and health band are left empty.
+
+    $ python -m scripts.lite --rpc $RPC_URL 0x... 0x...
+    $ python scripts/lite.py --block 15000000 --format text 0x...
+
+    >>> from scripts import lite
+    >>> lite.report(rpc_url, [address])  ## Rows, as dicts
+
+--rpc defaults to WEB3_PROVIDER_URI. Rows are NDJSON (default) or text.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+ABI_PATH = Path(__file__).resolve().parent.parent / "abi"
+
+FORMATS = ["ndjson", "text"]
+
+## Columns of a row, in order
+FIELDS = [
+    "name",
+    "address",
+    "block",
+    "total_assets",
+    "rewards",
+    "deposited",
+    "borrowed",
+    "total_debt",
+    "leverage_ratio",
+    "ltv",
+    "health_factor",
+    "can_borrow",
+    "debt_below_health",
+    "lower_health",
+    "upper_health",
+]
+
+## Views of every strategy, and what older ones are read with instead
+VIEWS = ["name", "getState", "lowerHealth", "upperHealth"]
+FALLBACK_VIEWS = [
+    "estimatedTotalAssets",
+    "valueOfRewards",
+    "deposited",
+    "borrowed",
+    "canBorrow",
+    "debtBelowHealth",
+]
+
+TIMEOUT = 30
+
+
+def load_abi(name):
+    ## Function name -> ABI entry
+    abi = json.loads((ABI_PATH / f"{name}.json").read_text())
+    return {entry["name"]: entry for entry in abi if entry["type"] == "function"}
+
+
+def keccak(data):
+    ## pycryptodome is the light one, eth_hash pulls in more
+    try:
+        from Crypto.Hash import keccak as _keccak
+
+        return _keccak.new(data=data, digest_bits=256).digest()
+    except ImportError:
+        from eth_hash.auto import keccak as _keccak
+
+        return _keccak(data)
+
+
+def canonical_type(param):
+    if param["type"].startswith("tuple"):
+        inner = ",".join(canonical_type(c) for c in param["components"])
+        return f"({inner}){param['type'][len('tuple'):]}"
+    return param["type"]
+
+
+def selector(entry):
+    signature = (
+        f"{entry['name']}({','.join(canonical_type(i) for i in entry['inputs'])})"
+    )
+    return "0x" + keccak(signature.encode()).hex()[:8]
+
+
+## ABI decoding, the types our views return: uint, int, bool, address, string, bytes
+## and tuples of them. No shipped view returns an array, see tests/test_lite.py
+def supported(param):
+    if param["type"].endswith("]"):
+        return False
+    if param["type"] == "tuple":
+        return all(supported(c) for c in param["components"])
+    return True
+
+
+def is_dynamic(param):
+    if param["type"] in ("string", "bytes"):
+        return True
+    if param["type"] == "tuple":
+        return any(is_dynamic(c) for c in param["components"])
+    return False
+
+
+def decode_value(param, data, offset):
+    kind = param["type"]
+    word = data[offset : offset + 32]
+    if not supported(param):
+        raise ValueError(f"Can't decode {kind}, arrays are not in the ABI subset")
+    if kind == "tuple":
+        return decode_params(param["components"], data[offset:])
+    if kind in ("string", "bytes"):
+        length = int.from_bytes(word, "big")
+        raw = data[offset + 32 : offset + 32 + length]
+        return raw.decode("utf-8", "replace") if kind == "string" else raw
+    if kind == "bool":
+        return int.from_bytes(word, "big") != 0
+    if kind == "address":
+        return "0x" + word[12:].hex()
+    if kind.startswith("int"):
+        return int.from_bytes(word, "big", signed=True)
+    return int.from_bytes(word, "big")
+
+
+def decode_params(params, data):
+    ## Named like brownie's return values: by name when every output has one
+    values = []
+    head = 0
+    for param in params:
+        if is_dynamic(param):
+            offset = int.from_bytes(data[head : head + 32], "big")
+            values.append(decode_value(param, data, offset))
+            head += 32
+        else:
+            values.append(decode_value(param, data, head))
+            head += 32 * static_words(param)
+
+    if params and all(param.get("name") for param in params):
+        return {param["name"]: value for (param, value) in zip(params, values)}
+    return values
+
+
+def static_words(param):
+    if param["type"] == "tuple":
+        return sum(static_words(c) for c in param["components"])
+    return 1
+
+
+def decode_output(entry, result):
+    values = decode_params(entry["outputs"], bytes.fromhex(result[2:]))
+    ## Single output, unwrapped
+    if isinstance(values, dict) and len(values) == 1:
+        return next(iter(values.values()))
+    if isinstance(values, list) and len(values) == 1:
+        return values[0]
+    return values
+
+
+class Client:
+    """
+    Batched eth_call over HTTP JSON-RPC, urllib is only imported on the first request
+    """
+
+    def __init__(self, rpc_url, timeout=TIMEOUT):
+        self.rpc_url = rpc_url
+        self.timeout = timeout
+        self.requests = 0
+
+    def batch(self, calls, allow_errors=False):
+        ## [(method, params)] -> [result], raises on the first error
+        ## With allow_errors, a failed call's result is None instead
+        from urllib.request import Request, urlopen
+
+        body = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for (i, (method, params)) in enumerate(calls)
+        ]
+        request = Request(
+            self.rpc_url,
+            data=json.dumps(body).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urlopen(request, timeout=self.timeout) as response:
+            replies = json.loads(response.read())
+        self.requests += 1
+
+        if isinstance(replies, dict):
+            ## The whole batch was refused
+            raise RuntimeError(f"RPC error: {replies.get('error', replies)}")
+        replies = sorted(replies, key=lambda reply: int(reply["id"]))
+        for (reply, (method, _)) in zip(replies, calls):
+            if "error" in reply and not allow_errors:
+                raise RuntimeError(f"{method} failed: {reply['error']}")
+        return [reply.get("result") for reply in replies]
+
+    def block_number(self):
+        (result,) = self.batch([("eth_blockNumber", [])])
+        return int(result, 16)
+
+
+def call_views(client, abi, addresses, views, block, allow_errors=False):
+    ## One batch, {address: {view: value}}, None for a view the strategy doesn't have
+    calls = [
+        ("eth_call", [{"to": address, "data": selector(abi[view])}, hex(block)])
+        for address in addresses
+        for view in views
+    ]
+    results = client.batch(calls, allow_errors) if calls else []
+    return {
+        address: {
+            view: decode_output(abi[view], result)
+            if result not in (None, "0x")
+            else None
+            for (view, result) in zip(views, results[i * len(views) :])
+        }
+        for (i, address) in enumerate(addresses)
+    }
+
+
+def read_strategies(client, addresses, block):
+    ## One batch for every view of every strategy, at `block`
+    ## A second one for strategies without getState, see FALLBACK_VIEWS
+    abi = load_abi("Strategy")
+    values = call_views(client, abi, addresses, VIEWS, block, allow_errors=True)
+
+    older = [address for address in addresses if values[address]["getState"] is None]
+    for (address, fallback) in call_views(
+        client, abi, older, FALLBACK_VIEWS, block
+    ).items():
+        values[address].update(fallback)
+
+    rows = []
+    for address in addresses:
+        if values[address]["name"] is None:
+            raise RuntimeError(f"{address} is not a strategy")
+        rows.append(to_row(address, block, values[address]))
+    return rows
+
+
+def to_row(address, block, values):
+    state = values["getState"]
+    if state is None:
+        ## Older strategy, from the individual views
+        state = {
+            "estimatedTotalAssets": values["estimatedTotalAssets"],
+            "valueOfRewards": values["valueOfRewards"],
+            "deposited": values["deposited"],
+            "borrowed": values["borrowed"],
+            "vaultTotalDebt": None,
+            "healthFactor": None,
+            "canBorrow": values["canBorrow"],
+            "debtBelowHealth": values["debtBelowHealth"],
+        }
+    deposited = state["deposited"]
+    borrowed = state["borrowed"]
+    total_debt = state["vaultTotalDebt"]
+    health_factor = state["healthFactor"]
+    return {
+        "name": values["name"],
+        "address": address,
+        "block": block,
+        "total_assets": state["estimatedTotalAssets"],
+        "rewards": state["valueOfRewards"],
+        "deposited": deposited,
+        "borrowed": borrowed,
+        "total_debt": total_debt,
+        "leverage_ratio": deposited / total_debt if total_debt else None,
+        "ltv": borrowed / deposited if deposited > 0 else None,
+        "health_factor": None if health_factor is None else health_factor / 10 ** 18,
+        "can_borrow": state["canBorrow"],
+        "debt_below_health": state["debtBelowHealth"],
+        "lower_health": values["lowerHealth"],
+        "upper_health": values["upperHealth"],
+    }
+
+
+def report(rpc_url, addresses, block=None):
+    client = Client(rpc_url)
+    block = client.block_number() if block is None else block
+    return read_strategies(client, addresses, block)
+
+
+def write_rows(rows, fmt, out):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}, one of {FORMATS}")
+
+    for row in rows:
+        if fmt == "ndjson":
+            out.write(json.dumps(row) + "\n")
+        else:
+            for key in FIELDS:
+                out.write(f"{key}: {row[key]}\n")
+            out.write("\n")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Read-only report on levered strategies",
+        epilog="Strategies without getState are read from their individual views, "
+        "total debt, health factor and health band are left empty",
+    )
+    parser.add_argument("strategies", nargs="+")
+    parser.add_argument("--rpc", default=os.environ.get("WEB3_PROVIDER_URI"))
+    parser.add_argument("--block", type=int)
+    parser.add_argument("--format", default="ndjson", choices=FORMATS)
+    args = parser.parse_args(argv)
+    if not args.rpc:
+        parser.error("--rpc or WEB3_PROVIDER_URI is needed")
+
+    write_rows(report(args.rpc, args.strategies, args.block), args.format, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
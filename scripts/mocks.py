@@ -0,0 +1,154 @@
+"""
+Local stand-ins for AAVE, stkAAVE, Uniswap V3 and the tokens, at the addresses Strategy.sol hardcodes
+
+Mocks are deployed normally and their code is copied to the mainnet address the
+Strategy expects, so the real Strategy runs unchanged on a local chain.
+Copying code needs hardhat, anvil or ganache >= 7 (`brownie networks` to add one).
+
+    $ brownie run mocks --network hardhat
+    $ brownie test --mocks --network hardhat  ## The whole suite, no fork
+"""
+from types import SimpleNamespace
+
+from brownie import (
+    Contract,
+    MockAddressesProvider,
+    MockERC20,
+    MockHealthCheck,
+    MockIncentivesController,
+    MockLendingPool,
+    MockPriceOracle,
+    MockScaledToken,
+    MockStakedAave,
+    MockSwapRouter,
+    MockWETH,
+    accounts,
+    web3,
+)
+from eth_utils import encode_hex
+
+## Same as the constants in Strategy.sol
+ADDRESS_PROVIDER = "0xB53C1a33016B2DC2fF3653530bfF1848a515c8c5"
+STK_AAVE = "0x4da27a545c0c5B758a6BA100e3a049001de870f5"
+INCENTIVES_CONTROLLER = "0xd784927Ff2f95ba542BfC824c8a8a98F3495f6b5"
+AAVE_TOKEN = "0x7Fc66500c84A76Ad7e9c93437bFc5Ac33E2DDaE9"
+ROUTER = "0xE592427A0AEce92De3Edee1F18E0157C05861564"
+WETH_TOKEN = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+## Same as tests/conftest.py
+HEALTH_CHECK = "0xDDCea799fF1699e98EDF118e0629A974Df7DF012"
+
+## Reserve parameters and prices (ETH wei per token) close to mainnet wBTC
+WBTC_LTV = 7_000
+WBTC_LIQUIDATION_THRESHOLD = 7_500
+WBTC_LIQUIDATION_BONUS = 10_650
+WBTC_PRICE = 15 * 10 ** 18
+AAVE_PRICE = 10 ** 17
+WETH_PRICE = 10 ** 18
+
+## Per year, in ray, roughly what wBTC paid / cost when the strategy was written
+RAY = 10 ** 27
+LIQUIDITY_RATE = RAY * 2 // 1000  ## 0.2%
+VARIABLE_BORROW_RATE = RAY * 15 // 1000  ## 1.5%
+
+## AAVE per second to all depositors / all borrowers of wBTC
+SECONDS_PER_YEAR = 365 * 24 * 3600
+A_TOKEN_EMISSION = 10_000 * 10 ** 18 // SECONDS_PER_YEAR
+DEBT_TOKEN_EMISSION = 10_000 * 10 ** 18 // SECONDS_PER_YEAR
+
+## What other users deposited, available to borrow and flash loan
+POOL_LIQUIDITY = 100_000 * 10 ** 8
+
+
+def set_code(address, code):
+    for method in ("hardhat_setCode", "anvil_setCode", "evm_setAccountCode"):
+        response = web3.provider.make_request(method, [address, code])
+        if "error" not in response:
+            return
+
+    raise NotImplementedError(
+        f"{web3.clientVersion} can't set code, use hardhat or anvil"
+    )
+
+
+def deploy_at(container, address, deployer, *args):
+    ## Deploy, then copy the runtime code (not the storage!) to `address`
+    mock = container.deploy(*args, {"from": deployer})
+    set_code(address, encode_hex(web3.eth.get_code(mock.address)))
+    return Contract.from_abi(container._name, address, container.abi)
+
+
+def deploy_mocks(deployer):
+    provider = deploy_at(MockAddressesProvider, ADDRESS_PROVIDER, deployer)
+    oracle = MockPriceOracle.deploy({"from": deployer})
+    pool = MockLendingPool.deploy(provider, {"from": deployer})
+    provider.setLendingPool(pool, {"from": deployer})
+    provider.setPriceOracle(oracle, {"from": deployer})
+
+    want = MockERC20.deploy("Wrapped BTC", "WBTC", 8, {"from": deployer})
+
+    ## Etched code has no storage, ERC20 metadata is set again
+    aave = deploy_at(MockERC20, AAVE_TOKEN, deployer, "Aave Token", "AAVE", 18)
+    aave.initialize("Aave Token", "AAVE", 18, {"from": deployer})
+    stk_aave = deploy_at(MockStakedAave, STK_AAVE, deployer, AAVE_TOKEN)
+    stk_aave.initialize("Staked Aave", "stkAAVE", 18, {"from": deployer})
+    weth = deploy_at(MockWETH, WETH_TOKEN, deployer)
+    weth.initialize("Wrapped Ether", "WETH", 18, {"from": deployer})
+
+    incentives_controller = deploy_at(
+        MockIncentivesController, INCENTIVES_CONTROLLER, deployer, STK_AAVE
+    )
+    router = deploy_at(MockSwapRouter, ROUTER, deployer, ADDRESS_PROVIDER)
+    health_check = deploy_at(MockHealthCheck, HEALTH_CHECK, deployer)
+
+    pool.initReserve(
+        want,
+        WBTC_LTV,
+        WBTC_LIQUIDATION_THRESHOLD,
+        WBTC_LIQUIDATION_BONUS,
+        incentives_controller,
+        {"from": deployer},
+    )
+    pool.setRates(want, LIQUIDITY_RATE, VARIABLE_BORROW_RATE, {"from": deployer})
+    for (token, price) in [
+        (want, WBTC_PRICE),
+        (aave, AAVE_PRICE),
+        (stk_aave, AAVE_PRICE),
+        (weth, WETH_PRICE),
+    ]:
+        oracle.setAssetPrice(token, price, {"from": deployer})
+
+    want.mint(deployer, POOL_LIQUIDITY, {"from": deployer})
+    want.approve(pool, POOL_LIQUIDITY, {"from": deployer})
+    pool.deposit(want, POOL_LIQUIDITY, deployer, 0, {"from": deployer})
+
+    reserve_data = pool.getReserveData(want)
+    a_token = Contract.from_abi("MockScaledToken", reserve_data[7], MockScaledToken.abi)
+    debt_token = Contract.from_abi(
+        "MockScaledToken", reserve_data[9], MockScaledToken.abi
+    )
+    incentives_controller.configureAssets(
+        [a_token, debt_token],
+        [A_TOKEN_EMISSION, DEBT_TOKEN_EMISSION],
+        {"from": deployer},
+    )
+
+    return SimpleNamespace(
+        provider=provider,
+        oracle=oracle,
+        pool=pool,
+        want=want,
+        a_token=a_token,
+        debt_token=debt_token,
+        stk_aave=stk_aave,
+        aave=aave,
+        weth=weth,
+        incentives_controller=incentives_controller,
+        router=router,
+        health_check=health_check,
+    )
+
+
+def main():
+    mocks = deploy_mocks(accounts[0])
+    for (name, contract) in vars(mocks).items():
+        print(f"{name}: {contract.address}")
@@ -0,0 +1,27 @@
+"""
+Local nonces, shared by the scripts that pipeline transactions (keeper.py, deploy.py)
+"""
+from brownie import web3
+
+
+class NonceManager:
+    """
+    Hands out nonces locally so we can send one tx after the other without waiting
+    Resynced from the node when a tx is dropped or fails to send
+    """
+
+    def __init__(self, account):
+        self.account = account
+        self.next_nonce = None
+
+    def take(self):
+        if self.next_nonce is None:
+            self.next_nonce = web3.eth.get_transaction_count(
+                self.account.address, "pending"
+            )
+        nonce = self.next_nonce
+        self.next_nonce += 1
+        return nonce
+
+    def reset(self):
+        self.next_nonce = None
@@ -0,0 +1,329 @@
+"""
+Offline search of `minHealth`, `maxIterations` and `minRebalanceAmount`
+
+Every combination of the three is evaluated at once with NumPy against the current
+rates, reward emissions and a gas price:
+
+- The leverage `_invest` reaches: the borrow / deposit loop stops at `maxIterations`,
+  when health is down to `minHealth` or when `canBorrow` is below `minRebalanceAmount`
+- The yearly yield of that position: supply interest and rewards on the deposit,
+  minus borrow interest plus rewards on the debt
+- The gas: depositing and levering up once, the harvests, and the repays that keep
+  the position at `ltv` as the debt grows faster than the deposit (`_driftToRepay`
+  waits for health below `minHealth` and `minRebalanceAmount` worth to repay)
+- The risk margin: days until liquidation from the lowest health the position
+  reaches between two repays, if the keeper stopped there and rates went to
+  `stress_borrow_rate`
+
+The recommended values have the highest net yield with at least `min_days` of margin,
+the frontier is every combination that no other beats on both yield and margin.
+
+    >>> market = Market(supply_rate=0.002, borrow_rate=0.015, borrow_reward_rate=0.02)
+    >>> result = optimize(market, deposit=100, gas_price=50 * 10 ** 9)
+    >>> result.recommended, result.frontier
+
+    $ OPTIMIZER_STRATEGY=0x... OPTIMIZER_GAS_PRICE=50 OPTIMIZER_REWARD_RATES=0.001,0.02 brownie run optimizer --network mainnet
+
+NOTE: This is float math on a single reserve, good for ranking parameters. Check the
+pick with scripts/simulator.py, which uses the contract's integer math. Rewards are
+assumed sold at the given rates, harvest profits are not re-levered.
+"""
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+DAY = 24 * 3600
+MAX_BPS = 10_000
+WAD = 10 ** 18
+
+## Same as the estimates in Strategy.sol
+HARVEST_GAS = 250_000
+REWARDS_GAS = 450_000
+DEPOSIT_GAS = 160_000
+LEVER_STEP_GAS = 420_000
+REPAY_STEP_GAS = 330_000
+
+## Default search space, minRebalanceAmount in whole tokens
+MIN_HEALTHS = np.round(np.arange(1.0, 1.5001, 0.005), 3)
+MAX_ITERATIONS = np.arange(1, 21)
+MIN_REBALANCE_AMOUNTS = np.geomspace(0.01, 10, 31)
+
+
+@dataclass
+class Market:
+    """
+    The reserve of `want`, rates per year as fractions (currentLiquidityRate / RAY)
+    Reward rates are the yearly value of the emissions, in want, per want supplied or
+    borrowed. `want_price` is the price of one whole token in ETH.
+    """
+
+    supply_rate: float
+    borrow_rate: float
+    supply_reward_rate: float = 0.0
+    borrow_reward_rate: float = 0.0
+    ltv: int = 7_000
+    liquidation_threshold: int = 7_500
+    want_price: float = 15.0
+    decimals: int = 8
+
+
+@dataclass
+class Result:
+    ## One array per metric, shaped like the grid (min_health, max_iterations, min_rebalance_amount)
+    grid: dict
+    ## Best net yield with enough margin, setter ready values
+    recommended: dict
+    ## Combinations no other beats on both net yield and margin, least risky first
+    frontier: list = field(default_factory=list)
+
+
+def reward_rate(emission_per_second, total, reward_price, want_price):
+    """
+    Yearly reward value per token of `want`, from the incentives controller's
+    emission per second for the aToken / debt token and its total supply (whole tokens)
+    Prices are in ETH.
+    """
+    if total == 0:
+        return 0.0
+    return emission_per_second * SECONDS_PER_YEAR * reward_price / (total * want_price)
+
+
+def evaluate(
+    market,
+    deposit,
+    gas_price,
+    min_health,
+    max_iterations,
+    min_rebalance_amount,
+    years=1,
+    harvest_interval=7 * DAY,
+    stress_borrow_rate=None,
+):
+    """
+    Metrics for each `min_health` (as a float), `max_iterations` and
+    `min_rebalance_amount` (whole tokens), broadcast against each other
+    `deposit` is the vault's debt to the strategy in whole tokens, `gas_price` in wei.
+    Yields are per year, over the deposit, gas is amortized over `years`.
+    """
+    (min_health, max_iterations, min_rebalance_amount) = np.broadcast_arrays(
+        np.asarray(min_health, dtype=float),
+        np.asarray(max_iterations),
+        np.asarray(min_rebalance_amount, dtype=float),
+    )
+    ltv = market.ltv / MAX_BPS
+    liquidation_threshold = market.liquidation_threshold / MAX_BPS
+
+    ## _invest, every combination one loop iteration at a time
+    deposited = np.full(min_health.shape, float(deposit))
+    borrowed = np.zeros(min_health.shape)
+    steps = np.zeros(min_health.shape, dtype=int)
+    for i in range(int(max_iterations.max(initial=0))):
+        with np.errstate(divide="ignore"):
+            health = deposited * liquidation_threshold / borrowed
+        to_borrow = deposited * ltv - borrowed
+        step = (
+            (i < max_iterations)
+            & (health > min_health)
+            & (to_borrow >= min_rebalance_amount)
+        )
+        to_borrow = np.where(step, to_borrow, 0)
+        deposited += to_borrow
+        borrowed += to_borrow
+        steps += step
+
+    interest = deposited * market.supply_rate - borrowed * market.borrow_rate
+    rewards = (
+        deposited * market.supply_reward_rate + borrowed * market.borrow_reward_rate
+    )
+
+    ## Repays: the debt grows past `ltv`, until health < minHealth and the repay is
+    ## worth minRebalanceAmount, then goes back to `ltv`
+    drift = borrowed * market.borrow_rate - deposited * ltv * market.supply_rate
+    repay_at = np.maximum(
+        deposited * ltv + min_rebalance_amount * (1 - ltv),
+        deposited * liquidation_threshold / min_health,
+    )
+    repay_at = np.maximum(repay_at, borrowed)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_repay = np.where(drift > 0, (repay_at - borrowed) / drift, np.inf)
+        per_repay = (repay_at - deposited * ltv) / drift
+        repays = np.where(
+            first_repay <= years, 1 + (years - first_repay) / per_repay, 0
+        )
+    repays = np.nan_to_num(repays, posinf=0)
+
+    gas = (
+        DEPOSIT_GAS
+        + steps * LEVER_STEP_GAS
+        + repays * REPAY_STEP_GAS
+        + years * SECONDS_PER_YEAR / harvest_interval * (HARVEST_GAS + REWARDS_GAS)
+    )
+    gas_cost = gas * gas_price / WAD / market.want_price / years
+
+    ## Lowest health between two repays, then no keeper at stressed rates
+    with np.errstate(divide="ignore"):
+        lowest_health = np.where(
+            borrowed > 0, deposited * liquidation_threshold / repay_at, np.inf
+        )
+    stress = market.borrow_rate if stress_borrow_rate is None else stress_borrow_rate
+    ## The supply rate follows the borrow rate (both follow utilization)
+    stress_supply = (
+        market.supply_rate * stress / market.borrow_rate
+        if market.borrow_rate > 0
+        else market.supply_rate
+    )
+    erosion = SECONDS_PER_YEAR * (
+        np.log1p(stress / SECONDS_PER_YEAR) - np.log1p(stress_supply / SECONDS_PER_YEAR)
+    )
+    with np.errstate(divide="ignore"):
+        days_to_liquidation = np.maximum(
+            np.log(lowest_health) / erosion * 365 if erosion > 0 else np.inf, 0
+        ) * np.ones(min_health.shape)
+
+    return {
+        "min_health": min_health,
+        "max_iterations": max_iterations,
+        "min_rebalance_amount": min_rebalance_amount,
+        "deposited": deposited,
+        "borrowed": borrowed,
+        "iterations": steps,
+        "leverage": deposited / deposit,
+        "repays_per_year": repays / years,
+        "gas_per_year": gas / years,
+        "gross_apy": (interest + rewards) / deposit,
+        "net_apy": (interest + rewards - gas_cost) / deposit,
+        "lowest_health": lowest_health,
+        "days_to_liquidation": days_to_liquidation,
+    }
+
+
+def _row(grid, index, decimals):
+    ## One combination, setter ready
+    row = {key: values[index].item() for (key, values) in grid.items()}
+    ## The grid is in steps of 0.001 at most, don't leak float noise into the setter
+    row["min_health"] = int(round(row["min_health"] * 10 ** 6)) * 10 ** 12
+    row["min_rebalance_amount"] = int(row["min_rebalance_amount"] * 10 ** decimals)
+    return row
+
+
+def optimize(
+    market,
+    deposit,
+    gas_price,
+    min_healths=MIN_HEALTHS,
+    max_iterations=MAX_ITERATIONS,
+    min_rebalance_amounts=MIN_REBALANCE_AMOUNTS,
+    min_days=30,
+    **kwargs,
+):
+    """
+    Grid search, see `evaluate` for the arguments
+    `min_days` is the margin the recommended values must keep
+    """
+    grid = evaluate(
+        market,
+        deposit,
+        gas_price,
+        *np.meshgrid(min_healths, max_iterations, min_rebalance_amounts, indexing="ij"),
+        **kwargs,
+    )
+    net_apy = grid["net_apy"].ravel()
+    days = grid["days_to_liquidation"].ravel()
+
+    ## Best yield with enough margin, or the most margin if nothing has enough
+    ## Same yield, more margin: a low minHealth the loop never reaches buys nothing
+    safe = days >= min_days
+    if safe.any():
+        candidates = np.flatnonzero(safe)
+        best = candidates[np.lexsort((-days[safe], -net_apy[safe]))[0]]
+    else:
+        best = np.argmax(days)
+
+    ## Pareto frontier: walking down the margin, keep what beats everything before
+    ## Ties on margin go highest yield first
+    order = np.lexsort((-net_apy, -days))
+    running_best = np.maximum.accumulate(net_apy[order])
+    improves = np.ones(len(order), dtype=bool)
+    improves[1:] = net_apy[order][1:] > running_best[:-1]
+    frontier = order[improves]
+
+    shape = grid["net_apy"].shape
+    return Result(
+        grid,
+        _row(grid, np.unravel_index(best, shape), market.decimals),
+        [
+            _row(grid, np.unravel_index(index, shape), market.decimals)
+            for index in frontier
+        ],
+    )
+
+
+def from_strategy(strategy, supply_reward_rate=0.0, borrow_reward_rate=0.0):
+    """
+    Market and deposit (whole tokens) of a deployed Strategy at the current block
+    """
+    from brownie import interface
+
+    lending_pool = interface.ILendingPool(strategy.LENDING_POOL())
+    oracle = interface.IPriceOracle(
+        interface.ILendingPoolAddressesProvider(
+            strategy.ADDRESS_PROVIDER()
+        ).getPriceOracle()
+    )
+    want = strategy.want()
+    data = lending_pool.getReserveData(want)
+    configuration = data[0][0]
+    decimals = (configuration >> 48) & 0xFF
+    total_debt = interface.VaultAPI(strategy.vault()).strategies(strategy)[6]
+
+    market = Market(
+        supply_rate=data[3] / 10 ** 27,
+        borrow_rate=data[4] / 10 ** 27,
+        supply_reward_rate=supply_reward_rate,
+        borrow_reward_rate=borrow_reward_rate,
+        ltv=configuration & 0xFFFF,
+        liquidation_threshold=(configuration >> 16) & 0xFFFF,
+        want_price=oracle.getAssetPrice(want) / WAD,
+        decimals=decimals,
+    )
+    return (market, total_debt / 10 ** decimals)
+
+
+def main():
+    from brownie import Strategy, web3
+
+    strategy = Strategy.at(os.environ["OPTIMIZER_STRATEGY"])
+    gas_price = (
+        int(float(os.environ["OPTIMIZER_GAS_PRICE"]) * 10 ** 9)
+        if "OPTIMIZER_GAS_PRICE" in os.environ
+        else web3.eth.gas_price
+    )
+    (supply_reward_rate, borrow_reward_rate) = [
+        float(rate)
+        for rate in os.environ.get("OPTIMIZER_REWARD_RATES", "0,0").split(",")
+    ]
+    (market, deposit) = from_strategy(strategy, supply_reward_rate, borrow_reward_rate)
+    result = optimize(
+        market,
+        deposit,
+        gas_price,
+        min_days=float(os.environ.get("OPTIMIZER_MIN_DAYS", 30)),
+    )
+
+    print("days to liquidation, net apy, minHealth, maxIterations, minRebalanceAmount")
+    for row in result.frontier:
+        print(
+            f"{row['days_to_liquidation']:.0f}, {row['net_apy']:.4%}, "
+            f"{row['min_health']}, {row['max_iterations']}, {row['min_rebalance_amount']}"
+        )
+
+    best = result.recommended
+    print()
+    print(
+        f"Recommended, {best['net_apy']:.4%} net apy, leverage {best['leverage']:.2f}"
+    )
+    print(f"strategy.setMinHealth({best['min_health']})")
+    print(f"strategy.setMaxIterations({best['max_iterations']})")
+    print(f"strategy.setMinRebalanceAmount({best['min_rebalance_amount']})")
@@ -0,0 +1,852 @@
+"""
+Pure Python model of the Strategy leverage loops
+
+Replicates `_invest`, `canBorrow`, `canRepay`, `debtBelowHealth`, `_divestFromAAVE`
+and `_repayAAVEBorrow` using the same integer math as the contract and AAVE V2
+(WadRayMath, PercentageMath, MathUtils), against a single in-memory reserve.
+
+No chain is needed, a scenario is just a few hundred integer operations:
+
+    >>> from scripts.simulator import Reserve, LendingPoolModel, StrategyModel
+    >>> pool = LendingPoolModel(Reserve(price=15 * 10 ** 18))
+    >>> strat = StrategyModel(pool, want=1_000 * 10 ** 8, total_debt=1_000 * 10 ** 8)
+    >>> strat.adjust_position(0)
+    >>> strat.health_factor(), strat.estimate_gas()
+
+Use `from_strategy` to load the model from a live strategy (mainnet fork or mainnet),
+tests/test_simulator.py checks the model against the contract transaction by transaction.
+
+With `use_flash_loan` the model levers up like the contract's flash loan mode, straight
+to min(ltv, liquidationThreshold / minHealth). The loop instead borrows up to ltv on each
+step that starts over minHealth, with enough iterations it ends past minHealth.
+
+NOTE: Only the strategy account is modelled, rates are kept constant between actions
+(no interest rate strategy) and rewards / swaps are out of scope, pass them in as want.
+"""
+from dataclasses import dataclass, field, replace
+from collections import Counter
+
+RAY = 10 ** 27
+HALF_RAY = RAY // 2
+WAD = 10 ** 18
+MAX_BPS = 10_000  # Same as PercentageMath.PERCENTAGE_FACTOR
+HALF_PERCENT = MAX_BPS // 2
+SECONDS_PER_YEAR = 365 * 24 * 3600
+MAX_UINT256 = 2 ** 256 - 1
+HEALTH_FACTOR_LIQUIDATION_THRESHOLD = WAD
+
+## Rough gas per external call, calibrate with tests/test_simulator.py
+GAS_COSTS = {
+    "getUserAccountData": 35_000,
+    "getConfiguration": 5_000,
+    "balanceOf": 9_000,
+    "deposit": 160_000,
+    "withdraw": 190_000,
+    "borrow": 260_000,
+    "repay": 140_000,
+    "flashLoan": 120_000,
+}
+
+## AAVE V2 FLASHLOAN_PREMIUM_TOTAL
+FLASH_LOAN_PREMIUM = 9
+
+
+class Revert(Exception):
+    """
+    Raised wherever the contract (or AAVE) would revert
+    """
+
+
+## WadRayMath / PercentageMath from AAVE V2, rounding half up
+def ray_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return (a * b + HALF_RAY) // RAY
+
+
+def ray_div(a, b):
+    return (a * RAY + b // 2) // b
+
+
+def wad_div(a, b):
+    return (a * WAD + b // 2) // b
+
+
+def percent_mul(value, percentage):
+    if value == 0 or percentage == 0:
+        return 0
+    return (value * percentage + HALF_PERCENT) // MAX_BPS
+
+
+def percent_div(value, percentage):
+    return (value * MAX_BPS + percentage // 2) // percentage
+
+
+## SafeMath
+def safe_sub(a, b):
+    if b > a:
+        raise Revert("SafeMath: subtraction overflow")
+    return a - b
+
+
+def health_factor_of(a_balance, v_balance, liquidation_threshold):
+    ## Strategy._healthFactor, AAVE's formula in want instead of ETH
+    if v_balance == 0:
+        return MAX_UINT256
+    return a_balance * liquidation_threshold * WAD // (v_balance * MAX_BPS)
+
+
+def linear_interest(rate, last_update, now):
+    return rate * (now - last_update) // SECONDS_PER_YEAR + RAY
+
+
+def compounded_interest(rate, last_update, now):
+    exp = now - last_update
+    if exp == 0:
+        return RAY
+
+    exp_minus_one = exp - 1
+    exp_minus_two = exp - 2 if exp > 2 else 0
+
+    rate_per_second = rate // SECONDS_PER_YEAR
+    base_power_two = ray_mul(rate_per_second, rate_per_second)
+    base_power_three = ray_mul(base_power_two, rate_per_second)
+
+    second_term = exp * exp_minus_one * base_power_two // 2
+    third_term = exp * exp_minus_one * exp_minus_two * base_power_three // 6
+
+    return RAY + rate_per_second * exp + second_term + third_term
+
+
+@dataclass
+class Reserve:
+    """
+    AAVE V2 reserve of `want`, rates and indexes are in ray, ltv and threshold in bps
+    `price` is the oracle price of one whole token in ETH wei
+    """
+
+    price: int
+    ltv: int = 7_000
+    liquidation_threshold: int = 7_500
+    decimals: int = 8
+    liquidity_index: int = RAY
+    variable_borrow_index: int = RAY
+    liquidity_rate: int = 0
+    variable_borrow_rate: int = 0
+    last_update: int = 0
+    timestamp: int = 0  # block.timestamp
+
+    def normalized_income(self):
+        if self.last_update == self.timestamp:
+            return self.liquidity_index
+        return ray_mul(
+            linear_interest(self.liquidity_rate, self.last_update, self.timestamp),
+            self.liquidity_index,
+        )
+
+    def normalized_debt(self):
+        if self.last_update == self.timestamp:
+            return self.variable_borrow_index
+        return ray_mul(
+            compounded_interest(
+                self.variable_borrow_rate, self.last_update, self.timestamp
+            ),
+            self.variable_borrow_index,
+        )
+
+    def update_state(self):
+        ## ReserveLogic.updateState, minus the treasury mint which doesn't affect users
+        self.liquidity_index = self.normalized_income()
+        self.variable_borrow_index = self.normalized_debt()
+        self.last_update = self.timestamp
+
+    def sleep(self, seconds):
+        self.timestamp += seconds
+
+    def to_eth(self, amount):
+        return self.price * amount // 10 ** self.decimals
+
+
+@dataclass
+class LendingPoolModel:
+    """
+    The LendingPool as seen by the strategy, balances are kept scaled like the aToken / vToken
+    Every external call is counted in `calls` for gas estimates
+    """
+
+    reserve: Reserve
+    scaled_deposited: int = 0
+    scaled_borrowed: int = 0
+    calls: Counter = field(default_factory=Counter)
+
+    def clone(self):
+        return replace(self, reserve=replace(self.reserve), calls=Counter(self.calls))
+
+    ## aToken.balanceOf / vToken.balanceOf
+    def deposited(self):
+        self.calls["balanceOf"] += 1
+        return ray_mul(self.scaled_deposited, self.reserve.normalized_income())
+
+    def borrowed(self):
+        self.calls["balanceOf"] += 1
+        return ray_mul(self.scaled_borrowed, self.reserve.normalized_debt())
+
+    def _account_data(self):
+        reserve = self.reserve
+        collateral = reserve.to_eth(
+            ray_mul(self.scaled_deposited, reserve.normalized_income())
+        )
+        debt = reserve.to_eth(ray_mul(self.scaled_borrowed, reserve.normalized_debt()))
+        return collateral, debt
+
+    def get_configuration(self):
+        self.calls["getConfiguration"] += 1
+        return (self.reserve.ltv, self.reserve.liquidation_threshold)
+
+    def get_user_account_data(self):
+        ## GenericLogic.calculateUserAccountData for a single reserve
+        self.calls["getUserAccountData"] += 1
+        reserve = self.reserve
+        collateral, debt = self._account_data()
+
+        ltv = reserve.ltv if collateral > 0 else 0
+        liquidation_threshold = reserve.liquidation_threshold if collateral > 0 else 0
+
+        available_borrows = percent_mul(collateral, ltv)
+        available_borrows = available_borrows - debt if available_borrows > debt else 0
+
+        if debt == 0:
+            health_factor = MAX_UINT256
+        else:
+            health_factor = wad_div(
+                percent_mul(collateral, liquidation_threshold), debt
+            )
+
+        return (
+            collateral,
+            debt,
+            available_borrows,
+            liquidation_threshold,
+            ltv,
+            health_factor,
+        )
+
+    def deposit(self, amount):
+        self.calls["deposit"] += 1
+        if amount == 0:
+            raise Revert("VL_INVALID_AMOUNT")
+        self.reserve.update_state()
+        scaled = ray_div(amount, self.reserve.liquidity_index)
+        if scaled == 0:
+            raise Revert("CT_INVALID_MINT_AMOUNT")
+        self.scaled_deposited += scaled
+
+    def withdraw(self, amount):
+        self.calls["withdraw"] += 1
+        reserve = self.reserve
+        balance = ray_mul(self.scaled_deposited, reserve.normalized_income())
+        if amount == MAX_UINT256:
+            amount = balance
+        if amount == 0:
+            raise Revert("VL_INVALID_AMOUNT")
+        if amount > balance:
+            raise Revert("VL_NOT_ENOUGH_AVAILABLE_USER_BALANCE")
+
+        ## GenericLogic.balanceDecreaseAllowed
+        collateral, debt = self._account_data()
+        if debt > 0:
+            collateral_after = collateral - reserve.to_eth(amount)
+            if collateral_after == 0:
+                raise Revert("VL_TRANSFER_NOT_ALLOWED")
+            health_after = wad_div(
+                percent_mul(collateral_after, reserve.liquidation_threshold), debt
+            )
+            if health_after < HEALTH_FACTOR_LIQUIDATION_THRESHOLD:
+                raise Revert("VL_TRANSFER_NOT_ALLOWED")
+
+        reserve.update_state()
+        scaled = ray_div(amount, reserve.liquidity_index)
+        if scaled == 0:
+            raise Revert("CT_INVALID_BURN_AMOUNT")
+        self.scaled_deposited = safe_sub(self.scaled_deposited, scaled)
+        return amount
+
+    def borrow(self, amount):
+        self.calls["borrow"] += 1
+        reserve = self.reserve
+        if amount == 0:
+            raise Revert("VL_INVALID_AMOUNT")
+
+        ## ValidationLogic.validateBorrow
+        collateral, debt = self._account_data()
+        if collateral == 0:
+            raise Revert("VL_COLLATERAL_BALANCE_IS_0")
+        if debt > 0:
+            health_factor = wad_div(
+                percent_mul(collateral, reserve.liquidation_threshold), debt
+            )
+            if health_factor <= HEALTH_FACTOR_LIQUIDATION_THRESHOLD:
+                raise Revert("VL_HEALTH_FACTOR_LOWER_THAN_LIQUIDATION_THRESHOLD")
+        needed = percent_div(debt + reserve.to_eth(amount), reserve.ltv)
+        if needed > collateral:
+            raise Revert("VL_COLLATERAL_CANNOT_COVER_NEW_BORROW")
+
+        reserve.update_state()
+        scaled = ray_div(amount, reserve.variable_borrow_index)
+        if scaled == 0:
+            raise Revert("CT_INVALID_MINT_AMOUNT")
+        self.scaled_borrowed += scaled
+
+    def repay(self, amount):
+        self.calls["repay"] += 1
+        reserve = self.reserve
+        debt = ray_mul(self.scaled_borrowed, reserve.normalized_debt())
+        if amount == 0:
+            raise Revert("VL_INVALID_AMOUNT")
+        if debt == 0:
+            raise Revert("VL_NO_DEBT_OF_SELECTED_TYPE")
+
+        payback = min(amount, debt)
+        reserve.update_state()
+        self.scaled_borrowed = safe_sub(
+            self.scaled_borrowed, ray_div(payback, reserve.variable_borrow_index)
+        )
+        return payback
+
+
+@dataclass
+class Position:
+    """
+    Same as `Strategy.Position`, the snapshot threaded through harvest
+    """
+
+    deposited: int
+    borrowed: int
+    ltv: int
+    liquidation_threshold: int
+    vault_total_debt: int = 0
+
+
+@dataclass
+class StrategyModel:
+    """
+    The leverage logic of Strategy.sol, method for method
+    `want` is the idle balance, `total_debt` is `vault.strategies(strat).totalDebt`
+    """
+
+    pool: LendingPoolModel
+    want: int = 0
+    total_debt: int = 0
+    min_health: int = 1080000000000000000
+    min_rebalance_amount: int = 50000000
+    ## Target health band, off when both are 0, see Strategy.lowerHealth
+    lower_health: int = 0
+    upper_health: int = 0
+    max_iterations: int = 5
+    use_flash_loan: bool = False
+    ## Guard against `_divestFromAAVE` looping until the tx runs out of gas
+    max_divest_steps: int = 200
+
+    def clone(self):
+        return replace(self, pool=self.pool.clone())
+
+    def deposited(self):
+        return self.pool.deposited()
+
+    def borrowed(self):
+        return self.pool.borrowed()
+
+    def health_factor(self):
+        return self.pool.get_user_account_data()[5]
+
+    def estimated_total_assets(self):
+        ## NOTE: Rewards are not modelled
+        return safe_sub(self.want + self.deposited(), self.borrowed())
+
+    def estimate_gas(self, costs=GAS_COSTS):
+        return sum(costs[call] * count for (call, count) in self.pool.calls.items())
+
+    ## Views
+    def debt_below_health(self):
+        (_, _, _, _, ltv, health_factor) = self.pool.get_user_account_data()
+
+        return self._debt_below_health(
+            self.deposited(), self.borrowed(), ltv, health_factor
+        )
+
+    def _debt_below_health(self, a_balance, v_balance, ltv, health_factor):
+        max_borrow = a_balance * ltv // MAX_BPS
+
+        if health_factor < self.min_health and v_balance > max_borrow:
+            return v_balance - max_borrow
+
+        return 0
+
+    def drift_to_repay(self, position):
+        health_factor = health_factor_of(
+            position.deposited, position.borrowed, position.liquidation_threshold
+        )
+        if health_factor >= (
+            self.min_health if self.upper_health == 0 else self.lower_health
+        ):
+            return 0
+
+        target = self.target_ltv(position.ltv, position.liquidation_threshold)
+        max_debt = position.deposited * target // WAD
+        if position.borrowed <= max_debt:
+            return 0
+
+        to_repay = (position.borrowed - max_debt) * WAD // (WAD - target)
+
+        if to_repay < self.min_rebalance_amount:
+            return 0
+
+        return min(to_repay + 1, position.borrowed)
+
+    def can_borrow(self):
+        (
+            _,
+            _,
+            _,
+            liquidation_threshold,
+            ltv,
+            health_factor,
+        ) = self.pool.get_user_account_data()
+
+        return self._can_borrow(
+            self.deposited(), self.borrowed(), ltv, liquidation_threshold, health_factor
+        )
+
+    def _can_borrow(
+        self, a_balance, v_balance, ltv, liquidation_threshold, health_factor
+    ):
+        if not self.should_lever_up(health_factor):
+            return 0
+
+        ## The flash loan lands on min(ltv, LT / target health), the loop can go up to ltv
+        if self.use_flash_loan:
+            to_borrow = self.flash_borrow_amount(
+                a_balance, v_balance, ltv, liquidation_threshold
+            )
+            return 0 if to_borrow < self.min_rebalance_amount else to_borrow
+
+        return self.borrow_to_target(
+            a_balance, v_balance, ltv, liquidation_threshold, health_factor
+        )
+
+    def borrow_to_target(
+        self, a_balance, v_balance, ltv, liquidation_threshold, health_factor
+    ):
+        if health_factor > self.target_health():
+            max_value = safe_sub(a_balance * ltv // MAX_BPS, v_balance)
+            if self.upper_health > 0:
+                max_value = min(
+                    max_value,
+                    self.flash_borrow_amount(
+                        a_balance, v_balance, ltv, liquidation_threshold
+                    ),
+                )
+
+            if max_value < self.min_rebalance_amount:
+                return 0
+
+            return max_value
+
+        return 0
+
+    def should_lever_up(self, health_factor):
+        return self.upper_health == 0 or health_factor > self.upper_health
+
+    def target_health(self):
+        if self.upper_health == 0:
+            return self.min_health
+        return (self.lower_health + self.upper_health) // 2
+
+    def target_ltv(self, ltv, liquidation_threshold):
+        max_ltv = ltv * WAD // MAX_BPS
+        if self.upper_health == 0:
+            return max_ltv
+        return min(
+            max_ltv,
+            liquidation_threshold * WAD * WAD // (self.target_health() * MAX_BPS),
+        )
+
+    def can_repay(self):
+        (_, _, _, liquidation_threshold, _, _) = self.pool.get_user_account_data()
+
+        return self._can_repay(self.deposited(), self.borrowed(), liquidation_threshold)
+
+    def _can_repay(self, a_balance, v_balance, liquidation_threshold):
+        if v_balance == 0:
+            return (False, 0)
+
+        if liquidation_threshold == 0:
+            raise Revert("SafeMath: division by zero")
+
+        diff = safe_sub(a_balance, v_balance * MAX_BPS // liquidation_threshold)
+        return (True, diff * 95 // 100)
+
+    ## Pool interactions
+    def _deposit(self, amount):
+        if amount > self.want:
+            raise Revert("ERC20: transfer amount exceeds balance")
+        self.pool.deposit(amount)
+        self.want -= amount
+
+    def _withdraw(self, amount):
+        self.want += self.pool.withdraw(amount)
+
+    def _borrow(self, amount):
+        self.pool.borrow(amount)
+        self.want += amount
+
+    def _repay(self, amount):
+        if min(amount, self.pool.borrowed()) > self.want:
+            raise Revert("ERC20: transfer amount exceeds balance")
+        self.want -= self.pool.repay(amount)
+
+    ## Internal functions
+    def load_position(self):
+        (ltv, liquidation_threshold) = self.pool.get_configuration()
+        return Position(self.deposited(), self.borrowed(), ltv, liquidation_threshold)
+
+    def invest(self, position=None):
+        position = position or self.load_position()
+        if not self.should_lever_up(
+            health_factor_of(
+                position.deposited, position.borrowed, position.liquidation_threshold
+            )
+        ):
+            return
+
+        if self.use_flash_loan:
+            return self.lever_up_with_flash_loan(position)
+
+        a_balance = position.deposited
+        v_balance = position.borrowed
+
+        for _ in range(self.max_iterations):
+            to_borrow = self.borrow_to_target(
+                a_balance,
+                v_balance,
+                position.ltv,
+                position.liquidation_threshold,
+                health_factor_of(a_balance, v_balance, position.liquidation_threshold),
+            )
+            if to_borrow > 0:
+                self._borrow(to_borrow)
+                self._deposit(to_borrow)
+
+                a_balance = a_balance + to_borrow - 1
+                v_balance = v_balance + to_borrow + 1
+            else:
+                break
+
+        position.deposited = a_balance
+        position.borrowed = v_balance
+
+    def lever_up_with_flash_loan(self, position):
+        to_borrow = self.flash_borrow_amount(
+            position.deposited,
+            position.borrowed,
+            position.ltv,
+            position.liquidation_threshold,
+        )
+        if to_borrow < self.min_rebalance_amount:
+            return
+
+        ## Mode 2: the flash loaned amount is deposited then opened as variable debt
+        self.pool.calls["flashLoan"] += 1
+        self.want += to_borrow
+        self._deposit(to_borrow)
+        self.pool.borrow(to_borrow)
+
+    def flash_borrow_amount(self, a_balance, v_balance, ltv, liquidation_threshold):
+        target = min(
+            self.target_ltv(ltv, liquidation_threshold),
+            liquidation_threshold * WAD * WAD // (self.target_health() * MAX_BPS),
+        )
+        max_debt = a_balance * target // WAD
+        if max_debt <= v_balance:
+            return 0
+        return (max_debt - v_balance) * WAD // (WAD - target)
+
+    def flash_deleverage(self, amount):
+        ## Mode 0: repay with the flash loan, withdraw enough to pay it back plus premium
+        ## NOTE: The premium going back to depositors (liquidity index) is not modelled
+        premium = amount * FLASH_LOAN_PREMIUM // MAX_BPS
+        self.pool.calls["flashLoan"] += 1
+        self.want += amount
+        self._repay(amount)
+        self._withdraw(amount + premium)
+        self.want -= amount + premium
+
+    def withdraw_step(self, repay_amount):
+        if repay_amount > 0:
+            self._withdraw(repay_amount)
+            self._repay(repay_amount)
+
+    def divest_from_aave(self, position=None):
+        position = position or self.load_position()
+        if self.use_flash_loan:
+            v_balance = self.borrowed()
+            if v_balance > 0:
+                self.flash_deleverage(v_balance)
+        else:
+            a_balance = position.deposited
+            v_balance = position.borrowed
+            (should_repay, repay_amount) = self._can_repay(
+                a_balance, v_balance, position.liquidation_threshold
+            )
+
+            steps = 0
+            while should_repay:
+                steps += 1
+                if steps > self.max_divest_steps:
+                    raise Revert("out of gas")
+                self.withdraw_step(repay_amount)
+
+                a_balance = safe_sub(a_balance, repay_amount)
+                v_balance = (
+                    v_balance - repay_amount + 1 if v_balance > repay_amount else 0
+                )
+                (should_repay, repay_amount) = self._can_repay(
+                    a_balance, v_balance, position.liquidation_threshold
+                )
+
+        if self.deposited() > 0:
+            self._withdraw(MAX_UINT256)
+
+    def repay_aave_borrow(self, before_balance, position):
+        profit = 0
+        loss = 0
+
+        current_want_in_aave = safe_sub(position.deposited, position.borrowed)
+        if current_want_in_aave > position.vault_total_debt:
+            interest_profit = current_want_in_aave - position.vault_total_debt
+            self._withdraw(interest_profit)
+            position.deposited -= interest_profit
+
+        want_earned = safe_sub(self.want, before_balance)
+
+        to_repay = self._debt_below_health(
+            position.deposited,
+            position.borrowed,
+            position.ltv,
+            health_factor_of(
+                position.deposited, position.borrowed, position.liquidation_threshold
+            ),
+        )
+        repay_amount = to_repay
+
+        if to_repay > want_earned:
+            repay_amount = want_earned
+            ## The rest is stepped down later, lost only if the collateral can't back it
+            borrowed_after = position.borrowed - repay_amount
+            if borrowed_after > position.deposited:
+                loss = min(to_repay - repay_amount, borrowed_after - position.deposited)
+        else:
+            profit = want_earned - repay_amount
+
+        if repay_amount > 0:
+            self._repay(repay_amount)
+            position.borrowed = position.borrowed - repay_amount + 1
+
+        return (profit, loss)
+
+    ## Entry points
+    def adjust_position(self, debt_outstanding):
+        position = self.load_position()
+
+        ## Interest pushed the debt past ltv, withdraw and repay back to it
+        to_repay = self.drift_to_repay(position)
+        if to_repay > 0:
+            repaid = self.step_down(
+                position.deposited,
+                position.borrowed,
+                to_repay,
+                position.liquidation_threshold,
+            )
+            position.deposited -= repaid
+            position.borrowed = position.borrowed - repaid + 1
+
+        want_available = self.want
+        if want_available > debt_outstanding:
+            to_deposit = want_available - debt_outstanding
+
+            self._deposit(to_deposit)
+            position.deposited = position.deposited + to_deposit - 1
+
+        if want_available >= debt_outstanding:
+            self.invest(position)
+
+    def prepare_return(self, debt_outstanding, reward_want=0):
+        """
+        `reward_want` is the want bought with the claimed rewards
+        """
+        before_balance = self.want
+        self.want += reward_want
+
+        position = self.load_position()
+        position.vault_total_debt = self.total_debt
+
+        (earned, lost) = self.repay_aave_borrow(before_balance, position)
+
+        if debt_outstanding == 0:
+            return (earned, lost, 0)
+
+        self.divest_from_aave(position)
+
+        profit = 0
+        loss = 0
+        max_repay = self.want
+        if debt_outstanding > max_repay:
+            loss = debt_outstanding - max_repay
+            debt_payment = max_repay
+        else:
+            debt_payment = debt_outstanding
+            if max_repay > self.total_debt:
+                profit = min(max_repay - self.total_debt, max_repay - debt_outstanding)
+            else:
+                loss = self.total_debt - max_repay
+
+        return (profit, loss, debt_payment)
+
+    def harvest(self, debt_outstanding=0, reward_want=0, credit=0):
+        """
+        prepareReturn, vault.report and adjustPosition
+        The vault takes `profit + debtPayment` and sends `credit`
+        """
+        (profit, loss, debt_payment) = self.prepare_return(
+            debt_outstanding, reward_want
+        )
+
+        self.want = safe_sub(self.want, profit + debt_payment) + credit
+        self.total_debt = safe_sub(self.total_debt, loss + debt_payment) + credit
+
+        self.adjust_position(max(debt_outstanding - debt_payment, 0))
+        return (profit, loss, debt_payment)
+
+    def free_want(self, amount, position=None):
+        position = position or self.load_position()
+        a_balance = position.deposited
+        v_balance = position.borrowed
+        if amount + v_balance >= a_balance:
+            return self.divest_from_aave(position)
+
+        liquidation_threshold = position.liquidation_threshold
+        premium = FLASH_LOAN_PREMIUM if self.use_flash_loan else 0
+        repay_amount = self.repay_amount_to_free(
+            a_balance, v_balance, amount, liquidation_threshold, premium
+        )
+
+        if repay_amount > 0:
+            if self.use_flash_loan:
+                self.flash_deleverage(repay_amount)
+            else:
+                repaid = self.step_down(
+                    a_balance, v_balance, repay_amount, liquidation_threshold
+                )
+
+                ## AAVE stopped us short, only withdraw what keeps health above 1
+                if repaid < repay_amount:
+                    (_, can_withdraw) = self._can_repay(
+                        a_balance - repaid, v_balance - repaid, liquidation_threshold
+                    )
+                    amount = min(amount, can_withdraw)
+
+        if amount > 0:
+            self._withdraw(amount)
+
+    def repay_amount_to_free(
+        self, a_balance, v_balance, amount, liquidation_threshold, premium
+    ):
+        k = liquidation_threshold * WAD * WAD // (self.target_health() * MAX_BPS)
+        max_debt = (a_balance - amount) * k // WAD
+        if max_debt >= v_balance:
+            return 0
+
+        k_with_premium = k * (MAX_BPS + premium) // MAX_BPS
+        to_repay = (v_balance - max_debt) * WAD // (WAD - k_with_premium)
+        return min(to_repay + 1, v_balance)
+
+    def step_down(self, a_balance, v_balance, repay_amount, liquidation_threshold):
+        ## Returns what was repaid
+        repaid = 0
+        while repay_amount > 0:
+            (_, step) = self._can_repay(a_balance, v_balance, liquidation_threshold)
+            if step == 0:
+                break
+            step = min(step, repay_amount)
+
+            self.withdraw_step(step)
+
+            a_balance -= step
+            v_balance -= step
+            repay_amount -= step
+            repaid += step
+
+        return repaid
+
+    def liquidate_position(self, amount_needed):
+        ## Use idle want first, then lever down just enough for the rest
+        if amount_needed > self.want:
+            self.free_want(amount_needed - self.want)
+
+        if amount_needed > self.want:
+            return (self.want, amount_needed - self.want)
+        return (amount_needed, 0)
+
+
+def from_strategy(strategy, block_identifier=None):
+    """
+    Load a StrategyModel with the on-chain state of a deployed Strategy
+    """
+    from brownie import interface, web3
+
+    call = {"block_identifier": block_identifier}
+    want = strategy.want(**call)
+    lending_pool = interface.ILendingPool(strategy.LENDING_POOL(**call))
+    address_provider = interface.ILendingPoolAddressesProvider(
+        strategy.ADDRESS_PROVIDER(**call)
+    )
+    oracle = interface.IPriceOracle(address_provider.getPriceOracle(**call))
+    vault = interface.VaultAPI(strategy.vault(**call))
+
+    data = lending_pool.getReserveData(want, **call)
+    configuration = data[0][0]
+    block = web3.eth.get_block(block_identifier or "latest")
+
+    reserve = Reserve(
+        price=oracle.getAssetPrice(want, **call),
+        ltv=configuration & 0xFFFF,
+        liquidation_threshold=(configuration >> 16) & 0xFFFF,
+        decimals=(configuration >> 48) & 0xFF,
+        liquidity_index=data[1],
+        variable_borrow_index=data[2],
+        liquidity_rate=data[3],
+        variable_borrow_rate=data[4],
+        last_update=data[6],
+        timestamp=block.timestamp,
+    )
+    pool = LendingPoolModel(
+        reserve,
+        scaled_deposited=interface.IScaledBalanceToken(
+            strategy.aToken(**call)
+        ).scaledBalanceOf(strategy, **call),
+        scaled_borrowed=interface.IScaledBalanceToken(
+            strategy.vToken(**call)
+        ).scaledBalanceOf(strategy, **call),
+    )
+
+    return StrategyModel(
+        pool,
+        want=interface.ERC20(want).balanceOf(strategy, **call),
+        total_debt=vault.strategies(strategy, **call)[6],
+        min_health=strategy.minHealth(**call),
+        min_rebalance_amount=strategy.minRebalanceAmount(**call),
+        lower_health=strategy.lowerHealth(**call),
+        upper_health=strategy.upperHealth(**call),
+        max_iterations=strategy.maxIterations(**call),
+        use_flash_loan=strategy.useFlashLoan(**call),
+    )
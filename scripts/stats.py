@@ -1,64 +1,128 @@
-import brownie
-from brownie import *
+"""
+Report on one or many levered strategies
 
-AT = "0xDD387F2fe0D9B1E5768fc941e7E48AA8BfAf5e41"
+Strategies are read BATCH_SIZE at a time, with two multicalls per batch (the immutable
+addresses, then everything else), every value at the same block. Rows are written as
+soon as their batch is read, in the order the strategies were given.
 
+    $ brownie run stats --network mainnet
+    $ STATS_STRATEGIES=0x...,0x... STATS_FORMAT=ndjson STATS_OUTPUT=stats.ndjson brownie run stats --network mainnet
 
-def main():
+STATS_FORMAT is one of `text` (default), `ndjson`, `csv` or `json`
+STATS_BLOCK reports at a past block, calls there are cached on disk (scripts/cache.py)
+so running it again doesn't hit the node. STATS_CACHE is the cache file, 0 turns it off
+"""
+import csv
+import json
+import math
+import os
+import sys
 
-    strat = Strategy.at(AT)
-    vault = interface.VaultAPI(strat.vault())
+import brownie
+from brownie import Contract, Strategy, interface, web3
 
-    [
-        performanceFee,
-        activation,
-        debtRatio,
-        minDebtPerHarvest,
-        maxDebtPerHarvest,
-        lastReport,
-        totalDebt,
-        totalGain,
-        totalLoss,
-    ] = vault.strategies(strat)
+from scripts import cache, time_to_liquidation
 
-    print("Reporting for wBTC Strat")
-    print(strat.name())
+AT = "0xDD387F2fe0D9B1E5768fc941e7E48AA8BfAf5e41"
 
-    print("Address")
-    print(AT)
+## Strategies per multicall
+BATCH_SIZE = 25
 
-    print("Total Assets Estimated")
-    print(strat.estimatedTotalAssets())
+FORMATS = ["text", "ndjson", "csv", "json"]
 
-    print("Of which rewards")
-    print(strat.valueOfRewards())
+## How far the time to liquidation is simulated
+LIQUIDATION_YEARS = 2
+DAY = 24 * 3600
 
-    print("Total deposited")
-    print(strat.deposited())
+## Columns of a row, in order
+FIELDS = [
+    "name",
+    "address",
+    "block",
+    "total_assets",
+    "rewards",
+    "deposited",
+    "borrowed",
+    "total_debt",
+    "leverage_ratio",
+    "ltv",
+    "health_factor",
+    "can_borrow",
+    "current_variable_borrow_rate",
+    "current_liquidity_rate",
+    "debt_to_liquidation",
+    "days_to_liquidation",
+    "days_to_liquidation_p5",
+    "liquidation_probability",
+]
 
-    print("Total borrowed")
-    print(strat.borrowed())
 
-    print("Total Underlying tokens, i.e. totalDebt")
-    print(totalDebt)
+def finite(value):
+    ## None instead of inf, JSON has no infinity
+    return value if math.isfinite(value) else None
 
-    leverage_ratio = strat.deposited() / totalDebt
 
-    print("Leverage Ratio")
-    print(leverage_ratio)
+def read_batch(addresses, block):
+    ## Two multicalls for the whole batch, every value at the same block
+    strategies = [
+        Contract.from_abi("Strategy", address, Strategy.abi, persist=False)
+        for address in addresses
+    ]
 
-    print("LTV")
-    print(strat.borrowed() / strat.deposited())
+    ## Immutable, read at `block` too so a rerun finds them in the cache
+    with brownie.multicall(block_identifier=block):
+        immutables = [
+            (strat.vault(), strat.LENDING_POOL(), strat.want()) for strat in strategies
+        ]
 
-    print("Can lever up with another")
-    print(strat.canBorrow())
+    with brownie.multicall(block_identifier=block):
+        values = []
+        for (strat, (vault_address, lending_pool_address, want)) in zip(
+            strategies, immutables
+        ):
+            vault = interface.VaultAPI(vault_address)
+            lending_pool = interface.ILendingPool(lending_pool_address)
+            values.append(
+                (
+                    strat.name(),
+                    strat.estimatedTotalAssets(),
+                    strat.valueOfRewards(),
+                    strat.deposited(),
+                    strat.borrowed(),
+                    strat.canBorrow(),
+                    vault.strategies(strat),
+                    lending_pool.getReserveData(want),
+                    lending_pool.getUserAccountData(strat),
+                )
+            )
 
-    """
-    TODO
-    Expected Profit: 26,620.334323
-    Time to liquidation: 101.72 weeks
-  """
-    lending_pool = interface.ILendingPool(strat.LENDING_POOL())
+    return [to_row(address, block, *row) for (address, row) in zip(addresses, values)]
+
+
+def to_row(
+    address,
+    block,
+    name,
+    total_assets,
+    rewards,
+    deposited,
+    borrowed,
+    can_borrow,
+    params,
+    reserve_data,
+    account_data,
+):
+    [
+        performanceFee,
+        activation,
+        debtRatio,
+        minDebtPerHarvest,
+        maxDebtPerHarvest,
+        lastReport,
+        totalDebt,
+        totalGain,
+        totalLoss,
+    ] = params
 
     [
         configuration,
@@ -73,33 +137,128 @@ def main():
         variableDebtTokenAddress,
         interestRateStrategyAddress,
         id,
-    ] = lending_pool.getReserveData(strat.want())
-
-    print("currentVariableBorrowRate")
-    print(currentVariableBorrowRate)
-
-    print("currentLiquidityRate")
-    print(currentLiquidityRate)
+    ] = reserve_data
 
-    liquidation_amount = strat.deposited() * 0.75
+    """
+    TODO
+    Expected Profit: 26,620.334323
+    """
+    ## Liquidation threshold of our position, in BPS
+    liquidation_amount = deposited * account_data[3] / 10_000
 
     debt_to_liquidation = (
-        liquidation_amount - strat.borrowed()
+        liquidation_amount - borrowed
     )  ## The debt that will liquidate us
 
-    print("debt_to_liquidation")
-    print(debt_to_liquidation)
+    ## Compounding, supply interest and random rates, see scripts/time_to_liquidation.py
+    simulation = time_to_liquidation.from_account(
+        deposited, borrowed, account_data, reserve_data, years=LIQUIDATION_YEARS
+    )
+
+    return {
+        "name": str(name),
+        "address": str(address),
+        "block": block,
+        "total_assets": int(total_assets),
+        "rewards": int(rewards),
+        "deposited": int(deposited),
+        "borrowed": int(borrowed),
+        "total_debt": int(totalDebt),
+        "leverage_ratio": deposited / totalDebt if totalDebt > 0 else None,
+        "ltv": borrowed / deposited if deposited > 0 else None,
+        "health_factor": account_data[5] / 10 ** 18,
+        "can_borrow": int(can_borrow),
+        "current_variable_borrow_rate": int(currentVariableBorrowRate),
+        "current_liquidity_rate": int(currentLiquidityRate),
+        "debt_to_liquidation": debt_to_liquidation,
+        ## Median and 5th percentile, None past LIQUIDATION_YEARS
+        "days_to_liquidation": finite(simulation.percentile(50) / DAY),
+        "days_to_liquidation_p5": finite(simulation.percentile(5) / DAY),
+        "liquidation_probability": simulation.liquidation_probability(),
+    }
+
 
-    debt_per_year = (
-        strat.borrowed() * currentVariableBorrowRate / (10 ** 27)
-    )  ## Not compounding so technically underestimate
-    years_to_liquidation = (
-        debt_to_liquidation / debt_per_year
-    )  ## The years to liquidation
-    days_to_liquidation = years_to_liquidation * 365
+def read_strategies(addresses, block, batch_size=BATCH_SIZE):
+    ## Rows in the order of `addresses`, a batch at a time
+    for i in range(0, len(addresses), batch_size):
+        yield from read_batch(addresses[i : i + batch_size], block)
+
+
+def print_text(row, out):
+    for (label, key) in [
+        ("Reporting for wBTC Strat", "name"),
+        ("Address", "address"),
+        ("At block", "block"),
+        ("Total Assets Estimated", "total_assets"),
+        ("Of which rewards", "rewards"),
+        ("Total deposited", "deposited"),
+        ("Total borrowed", "borrowed"),
+        ("Total Underlying tokens, i.e. totalDebt", "total_debt"),
+        ("Leverage Ratio", "leverage_ratio"),
+        ("LTV", "ltv"),
+        ("Health Factor", "health_factor"),
+        ("Can lever up with another", "can_borrow"),
+        ("currentVariableBorrowRate", "current_variable_borrow_rate"),
+        ("currentLiquidityRate", "current_liquidity_rate"),
+        ("debt_to_liquidation", "debt_to_liquidation"),
+        ("days to liquidation", "days_to_liquidation"),
+        ("days to liquidation, 5th percentile", "days_to_liquidation_p5"),
+        (
+            f"chance of liquidation within {LIQUIDATION_YEARS} years",
+            "liquidation_probability",
+        ),
+        ("Current Rewards", "rewards"),
+    ]:
+        print(label, file=out)
+        print(row[key], file=out)
+    print(file=out)
+
+
+def write_rows(rows, fmt, out):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}, one of {FORMATS}")
+
+    if fmt == "json":
+        ## Not streamed, one document
+        json.dump(list(rows), out, indent=2)
+        out.write("\n")
+        return
+
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+
+    for row in rows:
+        if fmt == "text":
+            print_text(row, out)
+        elif fmt == "ndjson":
+            out.write(json.dumps(row) + "\n")
+        else:
+            writer.writerow(row)
+        out.flush()
+
+
+def report(addresses, fmt="text", out=None, block=None):
+    block = web3.eth.block_number if block is None else block
+    write_rows(read_strategies(addresses, block), fmt, out or sys.stdout)
+
+
+def main():
+    addresses = [
+        address.strip()
+        for address in os.environ.get("STATS_STRATEGIES", AT).split(",")
+        if address.strip()
+    ]
+    fmt = os.environ.get("STATS_FORMAT", "text")
+    block = int(os.environ["STATS_BLOCK"]) if "STATS_BLOCK" in os.environ else None
 
-    print("days to liquidation")
-    print(days_to_liquidation)
+    cache_path = os.environ.get("STATS_CACHE", cache.CACHE_PATH)
+    if str(cache_path) != "0":
+        cache.install(path=cache_path)
 
-    print("Current Rewards")
-    print(strat.valueOfRewards())
+    if "STATS_OUTPUT" in os.environ:
+        with open(os.environ["STATS_OUTPUT"], "w") as out:
+            report(addresses, fmt, out, block)
+    else:
+        report(addresses, fmt, block=block)
@@ -0,0 +1,125 @@
+"""
+Monte Carlo time to liquidation of a levered position
+
+With a single asset, price doesn't move health, interest does: the deposit grows at the
+supply rate, the debt at the borrow rate, and health = deposited * LT / borrowed falls
+as long as the borrow rate is above the supply rate.
+
+The borrow rate follows a mean reverting random walk (Ornstein-Uhlenbeck, floored at 0),
+the supply rate moves with it at the current supply / borrow ratio (both follow
+utilization). Interest compounds per second like AAVE's, every path is simulated at
+once with NumPy, one vector step per `step` seconds.
+
+    >>> sim = simulate(deposited, borrowed, liquidation_threshold, borrow_rate, supply_rate)
+    >>> sim.time_to_liquidation  ## Seconds, inf if not liquidated within `years`
+    >>> sim.health[SECONDS_PER_YEAR]  ## Health of every path in a year
+"""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+RAY = 10 ** 27
+MAX_BPS = 10_000
+
+
+@dataclass
+class Simulation:
+    ## Seconds until health < 1 for each path, inf if it stays above for the whole run
+    time_to_liquidation: np.ndarray
+    ## Horizon in seconds -> health of each path at that time
+    health: dict = field(default_factory=dict)
+
+    def liquidation_probability(self, seconds=None):
+        ## Share of paths liquidated within `seconds` (the whole run by default)
+        if seconds is None:
+            return float(np.isfinite(self.time_to_liquidation).mean())
+        return float((self.time_to_liquidation <= seconds).mean())
+
+    def percentile(self, q):
+        ## q-th percentile of time to liquidation in seconds, nearest rank as some are inf
+        ranked = np.sort(self.time_to_liquidation)
+        return float(ranked[int(np.ceil(q / 100 * (len(ranked) - 1)))])
+
+
+def simulate(
+    deposited,
+    borrowed,
+    liquidation_threshold,
+    borrow_rate,
+    supply_rate,
+    years=2,
+    paths=10_000,
+    step=24 * 3600,
+    volatility=0.02,
+    mean_reversion=2.0,
+    mean_borrow_rate=None,
+    horizons=(),
+    seed=None,
+):
+    """
+    `liquidation_threshold` in BPS like getUserAccountData, rates per year as fractions
+    (currentVariableBorrowRate / RAY). `volatility` is the yearly standard deviation of
+    the borrow rate, `mean_reversion` how fast (per year) it goes back to
+    `mean_borrow_rate` (the current one by default). `horizons` are the times, in
+    seconds, at which to record every path's health.
+    """
+    steps = int(np.ceil(years * SECONDS_PER_YEAR / step))
+    dt = step / SECONDS_PER_YEAR
+    mean = borrow_rate if mean_borrow_rate is None else mean_borrow_rate
+    supply_ratio = supply_rate / borrow_rate if borrow_rate > 0 else 0.0
+
+    if borrowed == 0:
+        return Simulation(
+            np.full(paths, np.inf), {h: np.full(paths, np.inf) for h in horizons}
+        )
+
+    ## Keep the logs, health = exp(log_health), liquidated below 0
+    log_health = np.full(
+        paths, np.log(deposited * liquidation_threshold / (borrowed * MAX_BPS))
+    )
+
+    rng = np.random.default_rng(seed)
+    shock = volatility * np.sqrt(dt)
+    rates = np.full(paths, float(borrow_rate))
+    time_to_liquidation = np.full(paths, np.inf)
+    time_to_liquidation[log_health < 0] = 0
+
+    ## Horizons land on the step at or after them
+    at_step = {}
+    for horizon in horizons:
+        at_step.setdefault(min(int(np.ceil(horizon / step)), steps), []).append(horizon)
+    health = {horizon: np.exp(log_health) for horizon in at_step.pop(0, [])}
+
+    for i in range(1, steps + 1):
+        ## Per second compounding over the step: (1 + r / year) ** step
+        borrow_growth = step * np.log1p(rates / SECONDS_PER_YEAR)
+        supply_growth = step * np.log1p(rates * supply_ratio / SECONDS_PER_YEAR)
+        log_health += supply_growth - borrow_growth
+
+        liquidated = (log_health < 0) & np.isinf(time_to_liquidation)
+        time_to_liquidation[liquidated] = i * step
+
+        for horizon in at_step.get(i, []):
+            health[horizon] = np.exp(log_health)
+
+        rates += mean_reversion * (mean - rates) * dt
+        rates += shock * rng.standard_normal(paths)
+        np.maximum(rates, 0, out=rates)
+
+    return Simulation(time_to_liquidation, health)
+
+
+def from_account(deposited, borrowed, account_data, reserve_data, **kwargs):
+    """
+    Same as simulate, from getUserAccountData and getReserveData of want
+    Uses the real liquidation threshold and the current rates
+    """
+    return simulate(
+        deposited,
+        borrowed,
+        account_data[3],
+        reserve_data[4] / RAY,  ## currentVariableBorrowRate
+        reserve_data[3] / RAY,  ## currentLiquidityRate
+        **kwargs,
+    )
@@ -1,81 +1,156 @@
 import pytest
-from brownie import config, chain, Contract
-
-
-@pytest.fixture
-def gov(accounts):
-    yield accounts.at("0xFEB4acf3df3cDEA7399794D0869ef76A6EfAff52", force=True)
-
-
-@pytest.fixture
+from brownie import config, chain, history, Contract
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-gas-baseline",
+        action="store_true",
+        help="Store this run of tests/test_benchmark.py as the gas baseline",
+    )
+    parser.addoption(
+        "--gas-threshold",
+        type=float,
+        default=None,
+        help="Fail a benchmark when gas grows by more than this ratio, e.g. 0.02",
+    )
+    parser.addoption(
+        "--mocks",
+        action="store_true",
+        help="Run on local AAVE / Uniswap mocks (scripts/mocks.py) instead of a mainnet fork",
+    )
+    parser.addoption(
+        "--gas-profile",
+        action="store_true",
+        help="Profile the gas of every Strategy tx (scripts/gas_profile.py) into reports/",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "mainnet: needs the deployed contracts, skipped with --mocks"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    ## levered_strat levers the module's strategy once for the rest of the module
+    ## so within a module the tests that don't use it have to run first
+    modules = {}
+    for item in items:
+        modules.setdefault(item.fspath, len(modules))
+    items.sort(
+        key=lambda item: (
+            modules[item.fspath],
+            "levered_strat" in getattr(item, "fixturenames", ()),
+        )
+    )
+
+    if not config.getoption("--mocks"):
+        ## The mocks are etched at mainnet addresses, the fork's contracts are there
+        skip = pytest.mark.skip(reason="Needs --mocks and a node that can set code")
+        for item in items:
+            if "mocks" in getattr(item, "fixturenames", ()):
+                item.add_marker(skip)
+        return
+
+    skip = pytest.mark.skip(reason="Needs a mainnet fork")
+    for item in items:
+        if "mainnet" in item.keywords:
+            item.add_marker(skip)
+
+
+## The mock with that name under --mocks, else the mainnet contract
+def mock_or_contract(request, name, address):
+    if request.config.getoption("--mocks"):
+        return getattr(request.getfixturevalue("mocks"), name)
+    return Contract(address)
+
+
+@pytest.fixture(scope="module")
+def gov(accounts, request):
+    gov = accounts.at("0xFEB4acf3df3cDEA7399794D0869ef76A6EfAff52", force=True)
+    if request.config.getoption("--mocks"):
+        ## On a fresh chain the impersonated account has no ETH
+        accounts[9].transfer(gov, 10 ** 19)
+    yield gov
+
+
+@pytest.fixture(scope="module")
 def user(accounts):
     yield accounts[0]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def rewards(accounts):
     yield accounts[1]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def guardian(accounts):
     yield accounts[2]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def management(accounts):
     yield accounts[3]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def strategist(accounts):
     yield accounts[4]
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def keeper(accounts):
     yield accounts[5]
 
 
-@pytest.fixture
-def token():
+@pytest.fixture(scope="module")
+def token(request):
     token_address = "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
-    yield Contract(token_address)
+    yield mock_or_contract(request, "want", token_address)
 
 
-@pytest.fixture
-def lpComponent():
+@pytest.fixture(scope="module")
+def lpComponent(request):
     token_address = "0x9ff58f4ffb29fa2266ab25e75e2a8b3503311656"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
-    yield Contract(token_address)
+    yield mock_or_contract(request, "a_token", token_address)
 
 
-@pytest.fixture
-def borrowed():
+@pytest.fixture(scope="module")
+def borrowed(request):
     token_address = "0x9c39809Dec7F95F5e0713634a4D0701329B3b4d2"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
-    yield Contract(token_address)
+    yield mock_or_contract(request, "debt_token", token_address)
 
 
-@pytest.fixture
-def incentivesController():
+@pytest.fixture(scope="module")
+def incentivesController(request):
     token_address = "0xd784927Ff2f95ba542BfC824c8a8a98F3495f6b5"
-    yield Contract(token_address)
+    yield mock_or_contract(request, "incentives_controller", token_address)
 
 
-@pytest.fixture
-def reward():
+@pytest.fixture(scope="module")
+def reward(request):
     token_address = "0x4da27a545c0c5b758a6ba100e3a049001de870f5"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
-    yield Contract(token_address)
+    yield mock_or_contract(request, "stk_aave", token_address)
 
 
-@pytest.fixture
-def aave():
+@pytest.fixture(scope="module")
+def aave(request):
     token_address = "0x7Fc66500c84A76Ad7e9c93437bFc5Ac33E2DDaE9"  # this should be the address of the ERC-20 used by the strategy/vault (DAI)
-    yield Contract(token_address)
+    yield mock_or_contract(request, "aave", token_address)
 
 
-@pytest.fixture
-def amount(accounts, token, user, gov, management):
+@pytest.fixture(scope="module")
+def amount(accounts, token, user, gov, management, request):
     amount = 1_000 * 10 ** token.decimals()
+    if request.config.getoption("--mocks"):
+        token.mint(user, amount, {"from": user})
+        token.mint(gov, 100 * 10 ** token.decimals(), {"from": user})
+        token.mint(management, 100 * 10 ** token.decimals(), {"from": user})
+        yield amount
+        return
+
     # In order to get some funds for the token you are about to use,
     # it impersonate an exchange address to use it's funds.
     reserve = accounts.at("0x9ff58f4ffb29fa2266ab25e75e2a8b3503311656", force=True)
@@ -87,10 +162,10 @@ def amount(accounts, token, user, gov, management):
     yield amount
 
 
-@pytest.fixture
-def weth():
+@pytest.fixture(scope="module")
+def weth(request):
     token_address = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
-    yield Contract(token_address)
+    yield mock_or_contract(request, "weth", token_address)
 
 
 @pytest.fixture
@@ -100,7 +175,7 @@ def weth_amout(user, weth):
     yield weth_amout
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def vault(pm, gov, rewards, guardian, management, token):
     Vault = pm(config["dependencies"][0]).Vault
     vault = guardian.deploy(Vault)
@@ -110,7 +185,7 @@ def vault(pm, gov, rewards, guardian, management, token):
     yield vault
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def strategy(strategist, keeper, vault, Strategy, gov):
     strategy = strategist.deploy(Strategy, vault)
     strategy.setKeeper(keeper)
@@ -119,12 +194,15 @@ def strategy(strategist, keeper, vault, Strategy, gov):
     yield strategy
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def RELATIVE_APPROX():
     yield 1e-5
 
 
-@pytest.fixture
+## Accounts, tokens, vault and strategy are built once per module and
+## levered_strat levers the strategy once per module, each test reverts to that
+## snapshot through fn_isolation so it starts from the same state as before
+@pytest.fixture(scope="module")
 def levered_strat(vault, user, token, strategy, RELATIVE_APPROX, amount):
     # Deposit to the vault and harvest
     token.approve(vault.address, amount, {"from": user})
@@ -137,7 +215,93 @@ def levered_strat(vault, user, token, strategy, RELATIVE_APPROX, amount):
     return strategy
 
 
+## Local AAVE mocks, see scripts/mocks.py
+## Deployed once per module, the chain is reset around each module
+@pytest.fixture(scope="module")
+def mocks(module_isolation, accounts):
+    from scripts.mocks import deploy_mocks
+
+    yield deploy_mocks(accounts[4])
+
+
+## With --mocks, deploy them before each test's snapshot so they survive the revert
+@pytest.fixture(scope="module", autouse=True)
+def mocked(request):
+    if request.config.getoption("--mocks"):
+        request.getfixturevalue("mocks")
+
+
+@pytest.fixture
+def mock_strategy(
+    pm, gov, rewards, guardian, management, strategist, user, mocks, Strategy
+):
+    ## Vault and Strategy on the mock lending pool, with `amount` deposited
+    def deploy(use_flash_loan=False, amount=1_000 * 10 ** 8):
+        Vault = pm(config["dependencies"][0]).Vault
+        vault = guardian.deploy(Vault)
+        vault.initialize(mocks.want, gov, rewards, "", "", guardian, management)
+        vault.setDepositLimit(2 ** 256 - 1, {"from": gov})
+
+        strategy = strategist.deploy(Strategy, vault)
+        strategy.setUseFlashLoan(use_flash_loan, {"from": gov})
+        vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+
+        mocks.want.mint(user, amount, {"from": user})
+        mocks.want.approve(vault, amount, {"from": user})
+        vault.deposit(amount, {"from": user})
+        return strategy
+
+    yield deploy
+
+
+## Gas benchmark, see scripts/gas_benchmark.py
+@pytest.fixture(scope="session")
+def gas_benchmark(request):
+    from scripts import gas_benchmark
+
+    update = request.config.getoption("--update-gas-baseline")
+    threshold = request.config.getoption("--gas-threshold")
+    benchmark = gas_benchmark.GasBenchmark(
+        {} if update else gas_benchmark.load(gas_benchmark.BASELINE_PATH),
+        gas_benchmark.DEFAULT_THRESHOLD if threshold is None else threshold,
+        update=update,
+    )
+    yield benchmark
+
+    gas_benchmark.save(gas_benchmark.REPORT_PATH, benchmark.report())
+    if update:
+        gas_benchmark.save(gas_benchmark.BASELINE_PATH, benchmark.results)
+
+
 ## Forces reset before each test
 @pytest.fixture(autouse=True)
 def isolation(fn_isolation):
     pass
+
+
+## Gas profile of every Strategy tx with --gas-profile, see scripts/gas_profile.py
+@pytest.fixture(scope="session")
+def gas_profile():
+    from scripts import gas_profile
+
+    profile = gas_profile.Profile()
+    yield profile
+
+    if profile.transactions:
+        profile.write_table()
+        profile.write_folded()
+
+
+## Needs isolation so it reads the test's txs before they are reverted
+@pytest.fixture(autouse=True)
+def profile_strategy_txs(request, isolation):
+    if not request.config.getoption("--gas-profile"):
+        yield
+        return
+
+    profile = request.getfixturevalue("gas_profile")
+    start = len(history)
+    yield
+    for tx in history[start:]:
+        if tx.contract_name == "Strategy":
+            profile.add(tx)
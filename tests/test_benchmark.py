@@ -0,0 +1,99 @@
+import pytest
+from brownie import chain, config
+from scripts import gas_benchmark
+
+"""
+Gas benchmark of every entry point over deposit size, leverage (minHealth) and maxIterations
+Runs on the local mock lending pool, writes reports/gas.json and fails past the baseline threshold
+Cases missing from benchmarks/gas_baseline.json are skipped
+See scripts/gas_benchmark.py
+"""
+
+SIZES = [1, 10, 100, 1_000, 10_000]  ## wBTC
+MIN_HEALTHS = [1.08, 1.25, 1.5]
+MAX_ITERATIONS = [1, 5, 10]
+
+
+@pytest.mark.parametrize("max_iterations", MAX_ITERATIONS)
+@pytest.mark.parametrize("min_health", MIN_HEALTHS)
+@pytest.mark.parametrize("size", SIZES)
+def test_benchmark(
+    pm,
+    gov,
+    user,
+    strategist,
+    mock_strategy,
+    gas_benchmark,
+    Strategy,
+    size,
+    min_health,
+    max_iterations,
+):
+    case = f"{size}wBTC-health{min_health}-iterations{max_iterations}"
+    strategy = mock_strategy(amount=size * 10 ** 8)
+    vault = pm(config["dependencies"][0]).Vault.at(strategy.vault())
+
+    strategy.setMinHealth(int(min_health * 10 ** 18), {"from": gov})
+    strategy.setMaxIterations(max_iterations, {"from": gov})
+
+    ## First harvest deposits and levers up
+    gas_benchmark.record("harvest", case, strategy.harvest({"from": gov}))
+
+    ## Second one reports
+    chain.sleep(3600 * 24)
+    chain.mine(1)
+    gas_benchmark.record("harvest_report", case, strategy.harvest({"from": gov}))
+
+    ## A tenth of the deposit
+    gas_benchmark.record(
+        "withdraw", case, vault.withdraw(vault.balanceOf(user) // 10, {"from": user})
+    )
+
+    ## Delever one step so there is something to lever up
+    (_, repay_amount) = strategy.canRepay()
+    strategy.manualWithdrawStepFromAAVE(repay_amount, {"from": gov})
+    gas_benchmark.record("manualLeverUp", case, strategy.manualLeverUp({"from": gov}))
+
+    gas_benchmark.record(
+        "manualDivestFromAAVE", case, strategy.manualDivestFromAAVE({"from": gov})
+    )
+
+    ## Deposits what we divested and levers up from scratch
+    gas_benchmark.record("tend", case, strategy.tend({"from": gov}))
+
+    new_strategy = strategist.deploy(Strategy, vault)
+    gas_benchmark.record(
+        "migrate", case, vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    )
+
+    missing = gas_benchmark.check(case)
+    if missing:
+        pytest.skip(
+            "No gas baseline for "
+            + ", ".join(missing)
+            + ", run with --update-gas-baseline and commit benchmarks/gas_baseline.json"
+        )
+
+
+def test_check_reports_missing_baseline():
+    class Tx:
+        gas_used = 100_000
+
+    benchmark = gas_benchmark.GasBenchmark({"harvest/a": 100_000})
+    benchmark.record("harvest", "a", Tx())
+    assert benchmark.check("a") == []
+
+    ## No baseline for it, handed back so the case is skipped rather than passed
+    benchmark.record("tend", "a", Tx())
+    assert benchmark.check("a") == ["tend/a"]
+    assert benchmark.report()["missing_from_baseline"] == ["tend/a"]
+
+    ## Past the threshold
+    Tx.gas_used = 103_000
+    benchmark.results = {}
+    benchmark.record("harvest", "a", Tx())
+    with pytest.raises(AssertionError, match="Gas regressions"):
+        benchmark.check("a")
+
+    ## Nothing to compare against while recording a new baseline
+    assert gas_benchmark.GasBenchmark({}, update=True).check("a") == []
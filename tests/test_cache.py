@@ -0,0 +1,116 @@
+import io
+import json
+from collections import Counter
+
+from brownie import chain, web3
+from scripts import cache, stats
+from web3 import Web3
+from web3.providers import BaseProvider
+
+"""
+On-disk eth_call cache, see scripts/cache.py
+"""
+
+CONTRACT = "0x" + "11" * 20
+
+
+class FakeNode(BaseProvider):
+    ## Returns the block it was asked about, counts every request
+    def __init__(self, head=1_000):
+        super().__init__()
+        self.requests = Counter()
+        self.head = head
+
+    def make_request(self, method, params):
+        self.requests[method] += 1
+        if method == "eth_chainId":
+            result = "0x1"
+        elif method == "eth_blockNumber":
+            result = hex(self.head)
+        else:
+            block = params[1] if params[1].startswith("0x") else hex(self.head)
+            result = "0x" + block[2:].rjust(64, "0")
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+def call(w3, block="latest", data="0x1234"):
+    return int.from_bytes(
+        w3.eth.call({"to": CONTRACT, "data": data}, block_identifier=block), "big"
+    )
+
+
+def test_past_blocks_hit_the_node_once(tmp_path):
+    node = FakeNode()
+    w3 = Web3(node)
+    middleware = cache.install(w3, tmp_path / "cache.sqlite")
+
+    assert call(w3, 100) == call(w3, 100) == 100
+    assert node.requests["eth_call"] == 1
+    assert (middleware.cache.hits, middleware.cache.misses) == (1, 1)
+
+    ## Other calldata, other block, other entry
+    call(w3, 100, "0x5678")
+    call(w3, 101)
+    assert node.requests["eth_call"] == 3
+
+    ## Latest and blocks that can still be reorged always go to the node
+    call(w3)
+    call(w3)
+    call(w3, node.head - cache.CONFIRMATIONS + 1)
+    call(w3, node.head - cache.CONFIRMATIONS + 1)
+    assert node.requests["eth_call"] == 7
+
+    ## Still there after a restart
+    cache.uninstall(w3)
+    node = FakeNode()
+    w3 = Web3(node)
+    cache.install(w3, tmp_path / "cache.sqlite")
+    assert call(w3, 100) == 100
+    assert node.requests["eth_call"] == 0
+
+
+def test_least_recently_used_out(tmp_path):
+    store = cache.ResponseCache(tmp_path / "cache.sqlite", max_bytes=10_000)
+    result = "0x" + "00" * 1_000
+    for block in range(4):
+        store.put(1, block, CONTRACT, "0x1234", result)
+    assert store.size <= 10_000
+
+    ## Block 0 was read last, 1 goes first
+    store.get(1, 0, CONTRACT, "0x1234")
+    store.put(1, 4, CONTRACT, "0x1234", result)
+    store.put(1, 5, CONTRACT, "0x1234", result)
+    assert store.get(1, 0, CONTRACT, "0x1234") == result
+    assert store.get(1, 1, CONTRACT, "0x1234") is None
+    assert store.get(1, 5, CONTRACT, "0x1234") == result
+    assert store.size <= 10_000
+
+    ## Same size once reopened
+    size = store.size
+    store.close()
+    assert cache.ResponseCache(tmp_path / "cache.sqlite", 10_000).size == size
+
+
+def test_stats_from_cache(mock_strategy, gov, tmp_path):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    chain.mine(1)
+    block = chain.height
+
+    middleware = cache.install(web3, tmp_path / "cache.sqlite", confirmations=0)
+    try:
+        first = io.StringIO()
+        stats.report([strategy.address], "ndjson", first, block)
+        misses = middleware.cache.misses
+        assert misses > 0
+
+        second = io.StringIO()
+        stats.report([strategy.address], "ndjson", second, block)
+        assert middleware.cache.misses == misses
+        assert json.loads(second.getvalue()) == json.loads(first.getvalue())
+    finally:
+        cache.uninstall(web3)
@@ -0,0 +1,147 @@
+import json
+
+from brownie import Strategy, config, web3
+from scripts import deploy
+
+"""
+Batch deploy from a manifest, see scripts/deploy.py
+Deploys on the local chain next to the mock lending pool
+"""
+
+LOWER = 1_100_000_000_000_000_000
+UPPER = 1_200_000_000_000_000_000
+
+
+def vault_container(pm):
+    return pm(config["dependencies"][0]).Vault
+
+
+def new_vault(pm, mocks, gov, rewards, guardian, management):
+    vault = guardian.deploy(vault_container(pm))
+    vault.initialize(mocks.want, gov, rewards, "", "", guardian, management)
+    return vault
+
+
+def write_manifest(path, manifest):
+    path.write_text(json.dumps(manifest))
+    return path
+
+
+def test_plan():
+    defaults = {"vault": "0x1", "keeper": "0x2", "settings": {"setMaxIterations": 10}}
+    entry = {
+        "name": "a",
+        "settings": {"setHealthBand": [1.1e18, 1.2e18]},
+        "addStrategy": {"debtRatio": 5_000},
+    }
+    steps = deploy.plan(entry, defaults)
+
+    assert [step.name for step in steps] == [
+        "deploy",
+        "setKeeper",
+        "setMaxIterations",
+        "setHealthBand",
+        "addStrategy",
+    ]
+    assert steps[3].args == [LOWER, UPPER]
+    assert steps[-1].args == [5_000, 0, 2 ** 256 - 1, 1_000]
+    ## Left to governance
+    entry["addStrategy"] = False
+    assert deploy.plan(entry, defaults)[-1].name == "setHealthBand"
+
+
+def test_deploy_manifest(
+    pm, mocks, gov, rewards, guardian, management, keeper, tmp_path
+):
+    vaults = [
+        new_vault(pm, mocks, gov, rewards, guardian, management) for _ in range(2)
+    ]
+    manifest = write_manifest(
+        tmp_path / "deploy.json",
+        {
+            "defaults": {"keeper": keeper.address, "settings": {"setMaxIterations": 8}},
+            "strategies": [
+                {"name": "a", "vault": vaults[0].address},
+                {
+                    "name": "b",
+                    "vault": vaults[1].address,
+                    "settings": {"setUseFlashLoan": True},
+                    "addStrategy": {"debtRatio": 5_000},
+                },
+            ],
+        },
+    )
+    nonce = web3.eth.get_transaction_count(gov.address)
+    deployer = deploy.deploy_manifest(gov, manifest, Vault=vault_container(pm))
+
+    ## One nonce after the other, 4 txs per strategy
+    assert web3.eth.get_transaction_count(gov.address) == nonce + 8
+    ## Everything went through, running again sends nothing
+    statuses = deployer.run()
+    assert all(
+        status == "done" for steps in statuses.values() for status in steps.values()
+    )
+    assert web3.eth.get_transaction_count(gov.address) == nonce + 8
+
+    (a, b) = [Strategy.at(deployer.addresses()[name]) for name in ("a", "b")]
+    assert a.address == deploy.create_address(gov.address, nonce)
+    assert a.keeper() == b.keeper() == keeper
+    assert a.maxIterations() == b.maxIterations() == 8
+    assert not a.useFlashLoan() and b.useFlashLoan()
+    assert vaults[0].strategies(a)["activation"] > 0
+    assert vaults[1].strategies(b)["debtRatio"] == 5_000
+
+
+def test_resume_after_failure(pm, mocks, gov, rewards, guardian, management, tmp_path):
+    vault = new_vault(pm, mocks, gov, rewards, guardian, management)
+    entry = {
+        "name": "a",
+        "vault": vault.address,
+        "settings": {"setMaxIterations": 0, "setHealthBand": [LOWER, UPPER]},
+    }
+    manifest = write_manifest(tmp_path / "deploy.json", {"strategies": [entry]})
+    deployer = deploy.deploy_manifest(gov, manifest, Vault=vault_container(pm))
+
+    ## maxIterations can't be 0, the rest went through anyway
+    steps = deployer.statuses()["a"]
+    assert steps["setMaxIterations"] == "failed"
+    assert steps["setHealthBand"] == steps["addStrategy"] == "done"
+    address = deployer.addresses()["a"]
+
+    ## Fixed, only the failed step is sent again
+    entry["settings"]["setMaxIterations"] = 4
+    write_manifest(manifest, {"strategies": [entry]})
+    nonce = web3.eth.get_transaction_count(gov.address)
+    deployer = deploy.deploy_manifest(gov, manifest, Vault=vault_container(pm))
+
+    assert web3.eth.get_transaction_count(gov.address) == nonce + 1
+    assert deployer.addresses()["a"] == address
+    assert Strategy.at(address).maxIterations() == 4
+    assert Strategy.at(address).upperHealth() == UPPER
+
+
+def test_needs_governance(
+    pm, mocks, gov, rewards, guardian, management, strategist, tmp_path
+):
+    vault = new_vault(pm, mocks, gov, rewards, guardian, management)
+    manifest = write_manifest(
+        tmp_path / "deploy.json",
+        {
+            "strategies": [
+                {
+                    "name": "a",
+                    "vault": vault.address,
+                    "settings": {"setMaxIterations": 4},
+                }
+            ]
+        },
+    )
+    deployer = deploy.deploy_manifest(strategist, manifest, Vault=vault_container(pm))
+
+    ## The strategist deploys, the rest is left with its calldata
+    record = deployer.state["a"]
+    assert record["steps"]["deploy"]["status"] == "done"
+    skipped = record["steps"]["addStrategy"]
+    assert skipped["status"] == "skipped"
+    gov.transfer(skipped["to"], 0, data=skipped["data"])
+    assert vault.strategies(record["address"])["activation"] > 0
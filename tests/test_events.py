@@ -0,0 +1,89 @@
+from brownie import chain
+
+"""
+Leverage events, enough to follow the position from logs
+Runs against the local mock lending pool
+"""
+
+MAX_UINT256 = 2 ** 256 - 1
+
+
+def close(a, b):
+    ## Interest accrues between the tx and the calls after it
+    return abs(a - b) <= max(a, b) // 10 ** 6
+
+
+def assert_health(event, strategy, mocks):
+    ## The event's health is computed from our books, AAVE's is the same up to rounding
+    assert close(event["healthFactor"], mocks.pool.getUserAccountData(strategy)[5])
+
+
+def test_lever_up_and_down_events(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+
+    event = tx.events["LeveredUp"]
+    assert event["iterations"] == strategy.maxIterations()
+    assert close(event["amount"], strategy.borrowed())
+    assert_health(event, strategy, mocks)
+
+    borrowed = strategy.borrowed()
+    tx = strategy.manualDivestFromAAVE({"from": gov})
+    event = tx.events["LeveredDown"]
+    assert event["iterations"] > 1
+    assert close(event["amount"], borrowed)
+    assert event["healthFactor"] == MAX_UINT256
+
+
+def test_flash_loan_events(mock_strategy, mocks, gov):
+    strategy = mock_strategy(True)
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+
+    event = tx.events["LeveredUp"]
+    assert event["iterations"] == 1
+    assert close(event["amount"], strategy.borrowed())
+    assert_health(event, strategy, mocks)
+
+    borrowed = strategy.borrowed()
+    event = strategy.manualDivestFromAAVE({"from": gov}).events["LeveredDown"]
+    assert close(event["amount"], borrowed)
+    assert event["iterations"] == 1
+
+
+def test_drift_repay_events(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    while strategy.canBorrow() > 0:
+        strategy.manualLeverUp({"from": gov})
+
+    ## A year of interest puts the debt past ltv
+    chain.sleep(3600 * 24 * 365)
+    chain.mine(1)
+    debt_below_health = strategy.debtBelowHealth()
+    assert debt_below_health > 0
+
+    ## Harvest repays it with what it earned, the rest shows as shortfall
+    tx = strategy.harvest({"from": gov})
+    event = tx.events["RepaidBelowHealth"]
+    assert close(event["amount"] + event["shortfall"], debt_below_health)
+    ## The collateral backs it, it's stepped down in adjustPosition instead of lost
+    assert event["shortfall"] > 0
+    assert tx.events["Harvested"]["loss"] == 0
+    assert "LeveredDown" in tx.events
+
+
+def test_rewards_sold_event(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    chain.sleep(3600 * 24 * 3)
+    tx = strategy.harvest({"from": gov})
+
+    event = tx.events["RewardsSold"]
+    assert event["stkAAVEAmount"] > 0
+    assert event["aaveAmount"] > 0
+    assert event["wantOut"] > 0
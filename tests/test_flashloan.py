@@ -0,0 +1,69 @@
+import brownie
+import pytest
+from brownie import chain
+
+"""
+Levering up and down with one flash loan instead of looping
+Runs against the local mock lending pool, compares gas with the loop
+"""
+
+
+def health(mocks, strategy):
+    return mocks.pool.getUserAccountData(strategy)[5]
+
+
+def test_flash_loan_setter(mock_strategy, gov, user):
+    strategy = mock_strategy(False)
+    assert strategy.useFlashLoan() == False
+
+    with brownie.reverts():
+        strategy.setUseFlashLoan(True, {"from": user})
+
+    strategy.setUseFlashLoan(True, {"from": gov})
+    assert strategy.useFlashLoan() == True
+
+
+def test_flash_loan_only_from_pool(mock_strategy, mocks, user):
+    strategy = mock_strategy(True)
+
+    with brownie.reverts():
+        strategy.executeOperation(
+            [mocks.want], [10 ** 8], [0], strategy, "0x", {"from": user}
+        )
+
+
+def test_flash_loan_gas_vs_loop(mock_strategy, mocks, gov):
+    loop_strat = mock_strategy(False)
+    flash_strat = mock_strategy(True)
+    chain.sleep(1)
+
+    loop_harvest = loop_strat.harvest({"from": gov})
+    flash_harvest = flash_strat.harvest({"from": gov})
+
+    ## The loop stops after maxIterations, one flash loan lands on minHealth
+    assert flash_strat.borrowed() > loop_strat.borrowed()
+    assert health(mocks, flash_strat) >= flash_strat.minHealth()
+    assert (
+        pytest.approx(health(mocks, flash_strat), rel=1e-6) == flash_strat.minHealth()
+    )
+    assert pytest.approx(flash_strat.estimatedTotalAssets()) == (
+        loop_strat.estimatedTotalAssets()
+    )
+
+    ## Nothing left to borrow
+    borrowed_before = flash_strat.borrowed()
+    flash_strat.manualLeverUp({"from": gov})
+    assert flash_strat.borrowed() == borrowed_before
+
+    loop_divest = loop_strat.manualDivestFromAAVE({"from": gov})
+    flash_divest = flash_strat.manualDivestFromAAVE({"from": gov})
+    assert loop_strat.borrowed() == 0
+    assert flash_strat.borrowed() == 0
+    assert flash_strat.deposited() == 0
+
+    print(
+        "Lever up gas, loop:", loop_harvest.gas_used, "flash:", flash_harvest.gas_used
+    )
+    print("Divest gas, loop:", loop_divest.gas_used, "flash:", flash_divest.gas_used)
+    assert flash_harvest.gas_used < loop_harvest.gas_used
+    assert flash_divest.gas_used < loop_divest.gas_used
@@ -0,0 +1,121 @@
+from brownie import chain
+from collections import Counter
+
+"""
+Gas benchmark for the Position snapshot
+Harvest, tend and withdraw read the position from AAVE once and track it from there
+The lever loops are compared against one flash loan on the same state
+Run with `brownie test tests/test_gas.py -s` to see the numbers
+"""
+
+
+def strategy_calls(tx, strat):
+    ## Calls made by the strategy itself, AAVE's own internal calls don't count
+    return Counter(
+        str(call.get("function")).split(".")[-1].split("(")[0]
+        for call in tx.subcalls
+        if call["from"] == strat.address
+    )
+
+
+def report(name, tx, calls):
+    print(f"{name}: {tx.gas_used} gas, {dict(calls)}")
+
+
+def test_gas_harvest(chain, token, vault, levered_strat, user, amount):
+    ## Second deposit so harvest levers up again
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount // 2, {"from": user})
+    chain.sleep(3600 * 24)
+    chain.mine(1)
+
+    tx = levered_strat.harvest()
+    calls = strategy_calls(tx, levered_strat)
+    report("harvest", tx, calls)
+
+    ## One snapshot in prepareReturn, one in adjustPosition
+    assert calls["getUserAccountData"] == 0
+    assert calls["getConfiguration"] == 2
+    ## Ours plus BaseStrategy's health check
+    assert calls["strategies"] <= 2
+
+
+def test_gas_harvest_with_debt_outstanding(gov, vault, levered_strat):
+    vault.updateStrategyDebtRatio(levered_strat, 5_000, {"from": gov})
+    chain.sleep(1)
+
+    tx = levered_strat.harvest()
+    calls = strategy_calls(tx, levered_strat)
+    report("harvest (debt outstanding)", tx, calls)
+
+    ## The unwind loop runs on the snapshot, canRepay is never re-read
+    assert calls["getUserAccountData"] == 0
+    assert calls["repay"] > 1
+    assert calls["strategies"] <= 2
+
+
+def test_gas_tend(levered_strat, keeper):
+    chain.sleep(1)
+
+    tx = levered_strat.tend({"from": keeper})
+    calls = strategy_calls(tx, levered_strat)
+    report("tend", tx, calls)
+
+    assert calls["getUserAccountData"] == 0
+
+
+def test_gas_withdraw(vault, levered_strat, user):
+    chain.sleep(1)
+
+    tx = vault.withdraw(vault.balanceOf(user) // 10, {"from": user})
+    calls = strategy_calls(tx, levered_strat)
+    report("withdraw", tx, calls)
+
+    assert calls["getUserAccountData"] == 0
+    assert calls["getConfiguration"] == 1
+
+
+def loop_and_flash(strat, gov, send):
+    ## Gas of `send` with the loop, then from the same state with one flash loan
+    ## undo rather than snapshot, fn_isolation owns the snapshot
+    loop = send()
+    chain.undo()
+    strat.setUseFlashLoan(True, {"from": gov})
+    flash = send()
+    return (loop, flash)
+
+
+def test_gas_lever_up_loop_vs_flash(levered_strat, gov):
+    ## Delever one step so there is something to lever up
+    (_, max_repay) = levered_strat.canRepay()
+    levered_strat.manualWithdrawStepFromAAVE(max_repay, {"from": gov})
+    chain.sleep(1)
+
+    (loop, flash) = loop_and_flash(
+        levered_strat, gov, lambda: levered_strat.manualLeverUp({"from": gov})
+    )
+    report("lever up, loop", loop, strategy_calls(loop, levered_strat))
+    report("lever up, flash loan", flash, strategy_calls(flash, levered_strat))
+
+    assert loop.events["LeveredUp"]["iterations"] > 1
+    assert flash.gas_used < loop.gas_used
+
+
+def test_gas_lever_down_loop_vs_flash(gov, vault, levered_strat):
+    vault.updateStrategyDebtRatio(levered_strat, 5_000, {"from": gov})
+    chain.sleep(1)
+
+    (loop, flash) = loop_and_flash(
+        levered_strat, gov, lambda: levered_strat.harvest({"from": gov})
+    )
+    report(
+        "harvest (debt outstanding), loop", loop, strategy_calls(loop, levered_strat)
+    )
+    report(
+        "harvest (debt outstanding), flash loan",
+        flash,
+        strategy_calls(flash, levered_strat),
+    )
+
+    assert strategy_calls(loop, levered_strat)["repay"] > 1
+    assert flash.gas_used < loop.gas_used
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from brownie import chain
+from scripts import gas_profile
+
+"""
+Gas per internal function and external call, see scripts/gas_profile.py
+"""
+
+
+def step(fn, depth, jump_depth, gas, gas_cost, op="PUSH1"):
+    return {
+        "fn": fn,
+        "address": "0x0000000000000000000000000000000000000001",
+        "depth": depth,
+        "jumpDepth": jump_depth,
+        "gas": gas,
+        "gasCost": gas_cost,
+        "op": op,
+    }
+
+
+def fake_tx():
+    ## harvest -> _invest (internal) -> Pool.borrow (external) -> back to harvest
+    trace = [
+        step("Strategy.harvest", 0, 0, 1_000_000, 3),
+        step("Strategy.harvest", 0, 0, 999_997, 8, "JUMP"),
+        step("Strategy._invest", 0, 1, 999_989, 3),
+        ## The call forwards most of the gas, 700 is its own cost
+        step("Strategy._invest", 0, 1, 999_986, 900_000, "CALL"),
+        step("Pool.borrow", 1, 0, 899_986, 5_000, "SSTORE"),
+        step("Pool.borrow", 1, 0, 894_986, 0, "RETURN"),
+        step("Strategy._invest", 0, 1, 994_286, 8, "JUMP"),
+        step("Strategy.harvest", 0, 0, 994_278, 0, "STOP"),
+    ]
+    return SimpleNamespace(trace=trace, gas_used=30_000)
+
+
+def test_inclusive_and_exclusive_gas():
+    profile = gas_profile.Profile().add(fake_tx())
+
+    assert profile.exclusive["Pool.borrow"] == 5_000
+    assert profile.exclusive["Strategy._invest"] == 3 + 700 + 8
+    assert profile.exclusive["Strategy.harvest"] == 3 + 8 + 0
+    assert profile.inclusive["Strategy._invest"] == 3 + 700 + 5_000 + 8
+    assert profile.inclusive["Strategy.harvest"] == 1_000_000 - 994_278
+
+    ## Everything not charged to a function: intrinsic gas and refunds
+    uncharged = profile.exclusive[gas_profile.UNCHARGED]
+    assert uncharged + profile.inclusive["Strategy.harvest"] == 30_000
+
+    assert profile.kinds["Pool.borrow"] == "external"
+    assert profile.kinds["Strategy._invest"] == "internal"
+    assert profile.calls["Strategy._invest"] == 1
+
+
+def test_folded_output():
+    profile = gas_profile.Profile().add(fake_tx()).add(fake_tx())
+
+    lines = profile.folded_lines()
+    assert "Strategy.harvest;Strategy._invest;Pool.borrow 10000" in lines
+    assert "Strategy.harvest;Strategy._invest 1422" in lines
+    assert "Strategy.harvest 22" in lines
+    assert profile.transactions == 2
+
+    table = profile.table()
+    assert table.splitlines()[0] == "2 txs, 60000 gas"
+    ## Most inclusive first
+    assert table.splitlines()[2].startswith(gas_profile.UNCHARGED)
+
+
+def test_profile_harvest(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+
+    profile = gas_profile.Profile().add(tx)
+    total = sum(profile.exclusive.values())
+    assert total == tx.gas_used
+    assert profile.inclusive["Strategy.harvest"] <= tx.gas_used
+    assert profile.kinds["Strategy._invest"] == "internal"
+    assert profile.kinds["MockLendingPool.borrow"] == "external"
+    assert profile.calls["MockLendingPool.borrow"] == strategy.maxIterations()
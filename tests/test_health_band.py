@@ -0,0 +1,85 @@
+import brownie
+from brownie import chain
+
+"""
+Target health band: leverage is left alone inside it, back to the middle outside it
+Runs against the local mock lending pool
+"""
+
+LOWER = 1_100_000_000_000_000_000
+UPPER = 1_200_000_000_000_000_000
+
+
+def health(strategy, mocks):
+    return mocks.pool.getUserAccountData(strategy)[5]
+
+
+def test_set_health_band(mock_strategy, gov, user):
+    strategy = mock_strategy(False)
+    assert strategy.lowerHealth() == 0
+    assert strategy.upperHealth() == 0
+
+    with brownie.reverts():
+        strategy.setHealthBand(LOWER, UPPER, {"from": user})
+    with brownie.reverts("dev: healthBand"):
+        strategy.setHealthBand(UPPER, LOWER, {"from": gov})
+    ## Not under minHealth
+    with brownie.reverts("dev: healthBand"):
+        strategy.setHealthBand(10 ** 18, UPPER, {"from": gov})
+    with brownie.reverts("dev: healthBand"):
+        strategy.setHealthBand(LOWER, 0, {"from": gov})
+
+    strategy.setHealthBand(LOWER, UPPER, {"from": gov})
+    assert strategy.lowerHealth() == LOWER
+    assert strategy.upperHealth() == UPPER
+
+    ## minHealth can't go above the band
+    with brownie.reverts("dev: healthBand"):
+        strategy.setMinHealth(LOWER + 1, {"from": gov})
+    strategy.setMinHealth(LOWER, {"from": gov})
+
+    ## Off again, then it can
+    strategy.setHealthBand(0, 0, {"from": gov})
+    assert strategy.upperHealth() == 0
+    strategy.setMinHealth(LOWER + 1, {"from": gov})
+
+
+def test_lever_up_to_the_middle(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    strategy.setHealthBand(LOWER, UPPER, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    middle = (LOWER + UPPER) // 2
+    assert abs(health(strategy, mocks) - middle) < 10 ** 15
+    assert strategy.canBorrow() == 0
+
+
+def test_no_rebalance_inside_the_band(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    ## Levered up to minHealth, which is under the band
+    strategy.setHealthBand(LOWER, UPPER, {"from": gov})
+    assert health(strategy, mocks) < LOWER
+    tx = strategy.tend({"from": gov})
+    assert "LeveredDown" in tx.events
+    assert abs(health(strategy, mocks) - (LOWER + UPPER) // 2) < 10 ** 15
+
+    ## A wider band around where we are now, nothing to do
+    strategy.setHealthBand(LOWER, 1_300_000_000_000_000_000, {"from": gov})
+    assert not strategy.tendTrigger(0)
+    tx = strategy.tend({"from": gov})
+    assert "LeveredUp" not in tx.events
+    assert "LeveredDown" not in tx.events
+
+
+def test_flash_loan_to_the_middle(mock_strategy, mocks, gov):
+    strategy = mock_strategy(True)
+    strategy.setHealthBand(LOWER, UPPER, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+
+    assert tx.events["LeveredUp"]["iterations"] == 1
+    assert abs(health(strategy, mocks) - (LOWER + UPPER) // 2) < 10 ** 15
@@ -0,0 +1,103 @@
+from brownie import chain
+from scripts import keeper
+
+"""
+Keeper service, see scripts/keeper.py
+Runs block by block with `tick` against strategies on the local mock lending pool
+"""
+
+
+def state(**values):
+    ## A getState with nothing to do, overridden by `values`
+    return {
+        "borrowed": 0,
+        "healthFactor": 2 ** 256 - 1,
+        "debtBelowHealth": 0,
+        "canBorrow": 0,
+        "wantBalance": 0,
+        "valueOfRewards": 0,
+        "vaultTotalDebt": 0,
+        **values,
+    }
+
+
+def test_decide():
+    config = keeper.KeeperConfig()
+
+    assert keeper.decide("0x0", state(), False, False, config) is None
+    assert keeper.decide("0x0", state(), True, True, config).name == "harvest"
+    assert keeper.decide("0x0", state(), False, True, config).name == "tend"
+    assert (
+        keeper.decide("0x0", state(), False, False, config, True).name == "sellRewards"
+    )
+    ## Harvest sells them anyway
+    assert keeper.decide("0x0", state(), True, False, config, True).name == "harvest"
+
+    ## Low health beats everything else
+    low_health = state(borrowed=1, healthFactor=config.emergency_health - 1)
+    assert keeper.decide("0x0", low_health, True, True, config).name == "emergency"
+    ## No debt, nothing to divest
+    no_debt = state(borrowed=0, healthFactor=0)
+    assert keeper.decide("0x0", no_debt, False, False, config) is None
+
+
+def test_keeper_harvests_then_tends(mock_strategy, gov):
+    strategies = [mock_strategy(False), mock_strategy(False)]
+    bot = keeper.Keeper(gov, [strat.address for strat in strategies])
+
+    ## New funds in both vaults, one harvest each in the same block
+    actions = bot.tick()
+    assert [action.name for action in actions] == ["harvest", "harvest"]
+    txs = [bot.pending[strat.address] for strat in strategies]
+    assert txs[1].nonce == txs[0].nonce + 1
+    for tx in txs:
+        tx.wait(1)
+    assert all(strat.borrowed() > 0 for strat in strategies)
+
+    ## Then tends while maxIterations left room to lever up, and nothing after that
+    for _ in range(5):
+        chain.sleep(60)
+        chain.mine(1)
+        actions = bot.tick()
+        if not actions:
+            break
+        assert all(action.name == "tend" for action in actions)
+        for action in actions:
+            bot.pending[action.strategy].wait(1)
+
+    assert actions == []
+    assert bot.pending == {}
+
+
+def test_keeper_respects_gas_cap(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    bot = keeper.Keeper(gov, [strategy.address], keeper.KeeperConfig(max_gas_price=0))
+
+    ## Harvest can wait for cheaper gas
+    assert bot.tick() == []
+    assert strategy.borrowed() == 0
+
+
+def test_keeper_emergency_divest(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    ## Anything below 2 is an emergency for this keeper
+    config = keeper.KeeperConfig(emergency_health=2 * 10 ** 18, max_gas_price=0)
+    bot = keeper.Keeper(gov, [strategy.address], config)
+    actions = bot.tick()
+
+    ## Even above the gas cap
+    assert [action.name for action in actions] == ["emergency"]
+    bot.pending[strategy.address].wait(1)
+    assert strategy.borrowed() == 0
+
+
+def test_keeper_dry_run(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    bot = keeper.Keeper(gov, [strategy.address], keeper.KeeperConfig(dry_run=True))
+
+    assert [action.name for action in bot.tick()] == ["harvest"]
+    assert bot.pending == {}
+    assert strategy.borrowed() == 0
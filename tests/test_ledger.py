@@ -0,0 +1,116 @@
+import pytest
+from brownie import chain
+from scripts import ledger
+
+"""
+Harvest ledger, see scripts/ledger.py
+Indexes harvests of strategies on the local mock lending pool into a temporary SQLite
+"""
+
+
+def test_ledger_indexes_incrementally(mock_strategy, gov, tmp_path):
+    strategy = mock_strategy(False)
+    path = tmp_path / "ledger.sqlite"
+    book = ledger.Ledger(path, start_block=chain.height)
+
+    chain.sleep(1)
+    first = strategy.harvest({"from": gov})
+    assert book.index(strategy.address) == 1
+
+    (harvest,) = book.harvests(strategy.address)
+    assert harvest["tx_hash"] == first.txid
+    assert harvest["block_number"] == first.block_number
+    assert harvest["gas_used"] == first.gas_used
+    assert harvest["profit"] == first.events["Harvested"]["profit"]
+    assert harvest["debt_outstanding"] == first.events["Harvested"]["debtOutstanding"]
+
+    ## Nothing new, nothing fetched again
+    assert book.index(strategy.address) == 0
+    assert book.checkpoint(strategy.address)[0] == chain.height
+
+    chain.sleep(3600 * 24)
+    second = strategy.harvest({"from": gov})
+
+    ## Picks up from the checkpoint on disk
+    book = ledger.Ledger(path, start_block=0)
+    assert book.index(strategy.address) == 1
+    assert len(book.harvests(strategy.address)) == 2
+
+    ## Queries by time range
+    since_second = book.harvests(strategy.address, since=second.timestamp)
+    assert [harvest["tx_hash"] for harvest in since_second] == [second.txid]
+    until_first = book.harvests(strategy.address, until=first.timestamp)
+    assert [harvest["tx_hash"] for harvest in until_first] == [first.txid]
+    assert book.summary(strategy.address)["gas_used"] == (
+        first.gas_used + second.gas_used
+    )
+
+
+def test_ledger_handles_reorg(mock_strategy, gov, tmp_path):
+    strategy = mock_strategy(False)
+    book = ledger.Ledger(tmp_path / "ledger.sqlite", start_block=chain.height)
+
+    chain.sleep(1)
+    first = strategy.harvest({"from": gov})
+    chain.sleep(3600)
+    strategy.harvest({"from": gov})
+    assert book.index(strategy.address) == 2
+
+    ## The block of the second harvest is replaced by empty ones
+    chain.undo()
+    chain.mine(3)
+
+    book.index(strategy.address)
+    assert [harvest["tx_hash"] for harvest in book.harvests(strategy.address)] == [
+        first.txid
+    ]
+
+
+def test_ledger_shrinks_chunks(mock_strategy, gov, tmp_path):
+    strategy = mock_strategy(False)
+    start = chain.height
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    chain.mine(20)
+
+    book = ledger.Ledger(tmp_path / "ledger.sqlite", start_block=start)
+    get_logs = book._get_logs
+
+    ## A node that only serves 4 blocks at a time
+    def limited(strategy, from_block, to_block):
+        if to_block - from_block >= 4:
+            raise ValueError("query returned more than 10000 results")
+        return get_logs(strategy, from_block, to_block)
+
+    book._get_logs = limited
+    assert book.index(strategy.address) == 1
+    assert book.chunk <= 8
+
+
+def test_ledger_raises_other_errors(mock_strategy, tmp_path):
+    strategy = mock_strategy(False)
+    book = ledger.Ledger(tmp_path / "ledger.sqlite", start_block=chain.height)
+
+    ## Not about the chunk size, asking for less won't help
+    def broken(strategy, from_block, to_block):
+        raise KeyError("blockHash")
+
+    book._get_logs = broken
+    with pytest.raises(KeyError):
+        book.index(strategy.address)
+    assert book.chunk == ledger.START_CHUNK
+
+
+def test_ledger_checkpoint_past_head(mock_strategy, gov, tmp_path):
+    strategy = mock_strategy(False)
+    book = ledger.Ledger(tmp_path / "ledger.sqlite", start_block=chain.height)
+    chain.sleep(1)
+    first = strategy.harvest({"from": gov})
+
+    ## Checkpoint of a longer chain than the one the node now has
+    book._set_checkpoint(strategy.address, chain.height + 10, "0x00")
+    assert book.index(strategy.address) == 1
+    assert [harvest["tx_hash"] for harvest in book.harvests(strategy.address)] == [
+        first.txid
+    ]
+    assert book.checkpoint(strategy.address)[0] == chain.height
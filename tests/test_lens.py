@@ -0,0 +1,57 @@
+import pytest
+from brownie import chain, interface, Strategy, StrategyLens
+
+"""
+getState returns the same values as the individual views, in one call
+"""
+
+
+def assert_state_matches(state, strat):
+    assert state["estimatedTotalAssets"] == strat.estimatedTotalAssets()
+    assert state["deposited"] == strat.deposited()
+    assert state["borrowed"] == strat.borrowed()
+    assert state["balanceOfRewards"] == strat.balanceOfRewards()
+    assert state["valueOfRewards"] == strat.valueOfRewards()
+    assert state["canBorrow"] == strat.canBorrow()
+    assert (state["shouldRepay"], state["canRepay"]) == strat.canRepay()
+    assert state["debtBelowHealth"] == strat.debtBelowHealth()
+    assert state["minHealth"] == strat.minHealth()
+    assert state["minRebalanceAmount"] == strat.minRebalanceAmount()
+    assert state["maxIterations"] == strat.maxIterations()
+
+
+def test_get_state(levered_strat, vault, token):
+    lending_pool = interface.ILendingPool(levered_strat.LENDING_POOL())
+    chain.mine(1)
+    state = levered_strat.getState()
+
+    assert_state_matches(state, levered_strat)
+    assert state["wantBalance"] == token.balanceOf(levered_strat)
+    assert state["vaultTotalDebt"] == vault.strategies(levered_strat)["totalDebt"]
+    assert (
+        state["totalCollateralETH"],
+        state["totalDebtETH"],
+        state["availableBorrowsETH"],
+        state["currentLiquidationThreshold"],
+        state["ltv"],
+        state["healthFactor"],
+    ) == lending_pool.getUserAccountData(levered_strat)
+
+
+def test_get_state_unlevered(strategy):
+    state = strategy.getState()
+
+    assert_state_matches(state, strategy)
+    assert state["shouldRepay"] == False
+    assert state["deposited"] == 0
+
+
+def test_lens_get_states(levered_strat, vault, strategist):
+    other_strat = strategist.deploy(Strategy, vault)
+    lens = strategist.deploy(StrategyLens)
+    chain.mine(1)
+
+    states = lens.getStates([levered_strat, other_strat])
+    assert len(states) == 2
+    assert states[0] == levered_strat.getState()
+    assert states[1] == other_strat.getState()
@@ -8,7 +8,7 @@ Have the strat get liquidated, see what happens
 
 @pytest.fixture
 def lending_pool(levered_strat):
-    yield Contract.from_explorer(levered_strat.LENDING_POOL())
+    yield interface.ILendingPool(levered_strat.LENDING_POOL())
 
 
 # @pytest.fixture
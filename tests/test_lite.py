@@ -0,0 +1,126 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from brownie import Strategy, chain, web3
+from eth_abi import encode
+from scripts import lite
+
+"""
+Read-only reporter without brownie, see scripts/lite.py
+"""
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def state_types():
+    (output,) = lite.load_abi("Strategy")["getState"]["outputs"]
+    return "(" + ",".join(c["type"] for c in output["components"]) + ")"
+
+
+def test_decode_like_eth_abi():
+    abi = lite.load_abi("Strategy")
+    values = list(range(1, 21))
+    values[7] = True
+
+    state = lite.decode_output(
+        abi["getState"], "0x" + encode([state_types()], [values]).hex()
+    )
+    assert list(state.values()) == values
+    assert state["shouldRepay"] is True
+    assert state["maxIterations"] == 20
+
+    name = "0x" + encode(["string"], ["StrategyAAVELevered WBTC"]).hex()
+    assert lite.decode_output(abi["name"], name) == "StrategyAAVELevered WBTC"
+    assert lite.selector(abi["getState"]) == "0x1865c57d"
+
+
+def test_shipped_views_need_no_arrays():
+    for entry in lite.load_abi("Strategy").values():
+        assert all(lite.supported(output) for output in entry["outputs"])
+
+    with pytest.raises(ValueError, match="arrays"):
+        lite.decode_params([{"name": "", "type": "uint256[]"}], bytes(64))
+
+
+def test_reads_older_strategies():
+    ## A strategy deployed before getState, lowerHealth and upperHealth
+    abi = lite.load_abi("Strategy")
+    missing = {
+        lite.selector(abi[view]) for view in ("getState", "lowerHealth", "upperHealth")
+    }
+    replies = {
+        lite.selector(abi[view]): "0x" + encode(["uint256"], [i + 1]).hex()
+        for (i, view) in enumerate(lite.FALLBACK_VIEWS)
+    }
+    replies[lite.selector(abi["name"])] = "0x" + encode(["string"], ["AT"]).hex()
+
+    class Client:
+        def __init__(self):
+            self.batches = []
+
+        def batch(self, calls, allow_errors=False):
+            self.batches.append(calls)
+            data = [params[0]["data"] for (_, params) in calls]
+            assert allow_errors or not missing.intersection(data)
+            return [
+                None if selector in missing else replies[selector] for selector in data
+            ]
+
+    client = Client()
+    (row,) = lite.read_strategies(client, ["0x1"], 100)
+    assert len(client.batches) == 2
+    assert row["name"] == "AT"
+    fallback = ["total_assets", "rewards", "deposited", "borrowed", "can_borrow"]
+    assert [row[key] for key in fallback] == [1, 2, 3, 4, 5]
+    assert row["debt_below_health"] == 6
+    assert row["total_debt"] is row["health_factor"] is row["upper_health"] is None
+    assert list(row) == lite.FIELDS
+
+
+def test_starts_without_brownie():
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
+        return time.perf_counter() - start
+
+    ## Importing it and parsing the command line, against the interpreter alone
+    code = (
+        "import sys\n"
+        "from scripts import lite\n"
+        "try:\n"
+        "    lite.main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "assert 'brownie' not in sys.modules and 'web3' not in sys.modules\n"
+    )
+    assert run(code) - run("pass") < 0.2
+
+
+def test_shipped_abi_matches_strategy():
+    compiled = {entry["name"]: entry for entry in Strategy.abi if "name" in entry}
+    for (name, entry) in lite.load_abi("Strategy").items():
+        assert lite.canonical_type(
+            {"type": "tuple", "components": entry["outputs"]}
+        ) == lite.canonical_type(
+            {"type": "tuple", "components": compiled[name]["outputs"]}
+        )
+
+
+def test_lite_report_matches_strategy(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    chain.mine(1)
+
+    (row,) = lite.report(web3.provider.endpoint_uri, [strategy.address])
+    state = strategy.getState(block_identifier=row["block"])
+    assert row["block"] == chain.height
+    assert row["name"] == strategy.name()
+    assert row["deposited"] == state["deposited"]
+    assert row["borrowed"] == state["borrowed"]
+    assert row["total_debt"] == state["vaultTotalDebt"]
+    assert row["health_factor"] == state["healthFactor"] / 10 ** 18
+    assert list(row) == lite.FIELDS
@@ -2,6 +2,8 @@ import brownie
 from brownie import *
 import pytest
 
+pytestmark = pytest.mark.mainnet
+
 
 @pytest.fixture
 def live_vault(pm):
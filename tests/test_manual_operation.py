@@ -310,3 +310,27 @@ def test_manual_manualSwapFromAAVEToWant(
         > prev_assets
     )
     assert levered_strat.estimatedTotalAssets() > prev_assets
+
+
+def test_manual_manualLeverUp_reads_aave_once(
+    chain, gov, RELATIVE_APPROX, lpComponent, borrowed, levered_strat
+):
+    ## Delever by one step so there's something to lever up
+    (x, max_repay) = levered_strat.canRepay()
+    levered_strat.manualWithdrawStepFromAAVE(max_repay, {"from": gov})
+    expected_borrow = levered_strat.canBorrow()
+    assert expected_borrow > 0
+
+    prev_debt = borrowed.balanceOf(levered_strat)
+    chain.sleep(1)
+    tx = levered_strat.manualLeverUp({"from": gov})
+
+    ## The loop is computed locally, AAVE's account data is never scanned
+    called = [str(call.get("function")) for call in tx.subcalls]
+    assert not any("getUserAccountData" in fn for fn in called)
+    assert sum("getConfiguration" in fn for fn in called) == 1
+
+    ## First step borrows what canBorrow said
+    assert borrowed.balanceOf(levered_strat) > prev_debt + expected_borrow * (
+        1 - RELATIVE_APPROX
+    )
@@ -109,3 +109,27 @@ def test_triggers(
 
     strategy.harvestTrigger(0)
     strategy.tendTrigger(0)
+
+
+def test_small_withdrawal_keeps_leverage(
+    chain, token, vault, levered_strat, user, gov, amount
+):
+    ## Lever all the way to minHealth so the withdrawal has to repay some debt
+    for _ in range(4):
+        levered_strat.manualLeverUp({"from": gov})
+    borrowed_before = levered_strat.borrowed()
+    chain.sleep(1)
+
+    user_balance_before = token.balanceOf(user)
+    shares = vault.balanceOf(user) // 100
+    tx = vault.withdraw(shares, {"from": user})
+
+    ## We only freed what was asked and kept the rest levered
+    assert token.balanceOf(user) - user_balance_before >= amount // 100 - 1
+    assert 0 < levered_strat.borrowed() < borrowed_before
+    assert levered_strat.getState()["healthFactor"] >= levered_strat.minHealth()
+
+    ## Way cheaper than unwinding everything
+    chain.undo()
+    full = levered_strat.manualDivestFromAAVE({"from": gov})
+    assert tx.gas_used < full.gas_used / 2
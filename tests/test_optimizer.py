@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from scripts import optimizer, simulator
+
+"""
+Parameter search, see scripts/optimizer.py
+Pure Python, no chain needed
+"""
+
+GAS_PRICE = 50 * 10 ** 9
+
+
+@pytest.mark.parametrize(
+    "min_health,max_iterations,min_rebalance_amount",
+    [(1.08, 5, 0.5), (1.2, 10, 0.5), (1.0, 20, 5), (1.5, 3, 0.01)],
+)
+def test_leverage_matches_simulator(min_health, max_iterations, min_rebalance_amount):
+    market = optimizer.Market(supply_rate=0.002, borrow_rate=0.015)
+    grid = optimizer.evaluate(
+        market, 100, GAS_PRICE, min_health, max_iterations, min_rebalance_amount
+    )
+
+    ## Same loop in the contract's integer math
+    model = simulator.StrategyModel(
+        simulator.LendingPoolModel(simulator.Reserve(price=15 * 10 ** 18)),
+        want=100 * 10 ** 8,
+        total_debt=100 * 10 ** 8,
+        min_health=int(min_health * 10 ** 18),
+        min_rebalance_amount=int(min_rebalance_amount * 10 ** 8),
+        max_iterations=max_iterations,
+    )
+    model.adjust_position(0)
+
+    assert grid["deposited"] * 10 ** 8 == pytest.approx(model.deposited(), rel=1e-6)
+    assert grid["borrowed"] * 10 ** 8 == pytest.approx(model.borrowed(), rel=1e-6)
+    assert grid["iterations"] == model.pool.calls["borrow"]
+
+
+def test_rewards_pay_for_leverage():
+    no_rewards = optimizer.Market(supply_rate=0.002, borrow_rate=0.015)
+    rewards = optimizer.Market(
+        supply_rate=0.002, borrow_rate=0.015, borrow_reward_rate=0.03
+    )
+
+    ## Borrowing only costs, lever as little as the setters allow
+    worst = optimizer.optimize(no_rewards, 100, GAS_PRICE).recommended
+    ## Rewards on the debt are above its rate, lever up
+    best = optimizer.optimize(rewards, 100, GAS_PRICE).recommended
+
+    assert best["leverage"] > worst["leverage"]
+    assert best["net_apy"] > 0 > worst["net_apy"]
+    assert best["net_apy"] < best["gross_apy"]
+
+
+def test_recommended_keeps_the_margin():
+    market = optimizer.Market(
+        supply_rate=0.002, borrow_rate=0.015, borrow_reward_rate=0.03
+    )
+    loose = optimizer.optimize(market, 100, GAS_PRICE, min_days=30).recommended
+    strict = optimizer.optimize(market, 100, GAS_PRICE, min_days=1_700).recommended
+
+    assert strict["days_to_liquidation"] >= 1_700
+    assert strict["net_apy"] <= loose["net_apy"]
+    assert strict["min_health"] > loose["min_health"]
+    ## Ready for the setters
+    assert strict["min_health"] % 10 ** 12 == 0
+    assert isinstance(strict["min_rebalance_amount"], int)
+
+
+def test_frontier_trades_margin_for_yield():
+    market = optimizer.Market(
+        supply_rate=0.002, borrow_rate=0.015, borrow_reward_rate=0.03
+    )
+    result = optimizer.optimize(market, 100, GAS_PRICE)
+    days = [row["days_to_liquidation"] for row in result.frontier]
+    net_apy = [row["net_apy"] for row in result.frontier]
+
+    assert days == sorted(days, reverse=True)
+    assert net_apy == sorted(net_apy)
+    assert result.recommended in result.frontier
+
+
+def test_expensive_gas_levers_less():
+    market = optimizer.Market(
+        supply_rate=0.002, borrow_rate=0.015, borrow_reward_rate=0.03
+    )
+    cheap = optimizer.optimize(market, 10, GAS_PRICE).recommended
+    ## On a small deposit every loop iteration costs a noticeable share of the yield
+    expensive = optimizer.optimize(market, 10, 1_000 * GAS_PRICE).recommended
+
+    assert expensive["iterations"] < cheap["iterations"]
+
+
+def test_optimize_is_fast():
+    market = optimizer.Market(supply_rate=0.002, borrow_rate=0.015)
+
+    start = time.perf_counter()
+    optimizer.optimize(market, 100, GAS_PRICE)
+    assert time.perf_counter() - start < 1
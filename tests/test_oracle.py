@@ -0,0 +1,44 @@
+from brownie import MockPriceOracle
+
+"""
+The price oracle is cached, anyone can refresh it from the addresses provider
+Runs against the local mock lending pool
+"""
+
+
+def test_price_oracle_is_cached(mock_strategy, mocks):
+    strategy = mock_strategy(False)
+    assert strategy.priceOracle() == mocks.provider.getPriceOracle()
+
+    aave_price = mocks.oracle.getAssetPrice(mocks.aave)
+    want_price = mocks.oracle.getAssetPrice(mocks.want)
+    assert strategy.AAVEToETH(10 ** 18) == aave_price
+    assert strategy.ethToWant(want_price) == 10 ** 8
+    ## Both prices from one call, same result
+    assert strategy.valueOfAAVEToWant(10 ** 18) == strategy.ethToWant(
+        strategy.AAVEToETH(10 ** 18)
+    )
+
+
+def test_update_price_oracle(mock_strategy, mocks, user, gov):
+    strategy = mock_strategy(False)
+    value = strategy.valueOfAAVEToWant(10 ** 18)
+    aave_price = mocks.oracle.getAssetPrice(mocks.aave) * 3
+    want_price = mocks.oracle.getAssetPrice(mocks.want) * 2
+
+    oracle = MockPriceOracle.deploy({"from": gov})
+    oracle.setAssetPrice(mocks.aave, aave_price, {"from": gov})
+    oracle.setAssetPrice(mocks.want, want_price, {"from": gov})
+    mocks.provider.setPriceOracle(oracle, {"from": gov})
+
+    ## Still on the old one until someone refreshes it
+    assert strategy.valueOfAAVEToWant(10 ** 18) == value
+
+    tx = strategy.updatePriceOracle({"from": user})
+    assert tx.events["PriceOracleUpdated"]["priceOracle"] == oracle
+    assert strategy.priceOracle() == oracle
+    assert strategy.valueOfAAVEToWant(10 ** 18) == aave_price * 10 ** 8 // want_price
+
+    ## Nothing to do when it didn't change
+    tx = strategy.updatePriceOracle({"from": user})
+    assert "PriceOracleUpdated" not in tx.events
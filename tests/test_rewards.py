@@ -0,0 +1,95 @@
+import brownie
+from brownie import chain
+
+"""
+Rewards build up across harvests until minRewardsToSell, sellRewards sells them
+between harvests in chunks of at most maxRewardsToSell
+Runs against the local mock lending pool
+"""
+
+GAS_PRICE = 10 * 10 ** 9
+
+
+def test_harvest_lets_rewards_build_up(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    strategy.setMinRewardsToSell(2 ** 256 - 1, {"from": gov})
+
+    chain.sleep(3600 * 24 * 3)
+    chain.mine(1)
+    rewards = strategy.balanceOfRewards()
+    assert rewards > 0
+
+    ## Not claimed, not sold, still counted in the assets
+    strategy.harvest({"from": gov})
+    assert mocks.stk_aave.balanceOf(strategy) == 0
+    assert strategy.balanceOfRewards() >= rewards
+    assert strategy.valueOfRewards() > 0
+
+    ## Back to selling at every harvest
+    strategy.setMinRewardsToSell(0, {"from": gov})
+    strategy.harvest({"from": gov})
+    assert strategy.balanceOfRewards() < rewards
+
+
+def test_sell_rewards_in_chunks(mock_strategy, mocks, gov, strategist):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    chain.sleep(3600 * 24 * 3)
+    strategy.manualClaimRewards({"from": gov})
+    claimed = mocks.stk_aave.balanceOf(strategy)
+    chunk = claimed // 3
+    strategy.setMaxRewardsToSell(chunk, {"from": gov})
+
+    deposited = strategy.deposited()
+    strategy.sellRewards({"from": strategist})
+
+    ## One chunk sold, what was claimed on the way waits with the rest
+    assert mocks.stk_aave.balanceOf(strategy) >= claimed - chunk
+    assert mocks.stk_aave.balanceOf(strategy) < claimed
+    assert mocks.aave.balanceOf(strategy) == 0
+    ## The want is lent, not left idle
+    assert mocks.want.balanceOf(strategy) == 0
+    assert strategy.deposited() > deposited
+
+    ## The next harvest reports it as profit
+    chain.sleep(1)
+    tx = strategy.harvest({"from": gov})
+    assert tx.events["Harvested"]["profit"] > 0
+
+
+def test_sell_rewards_trigger(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    assert strategy.sellRewardsTrigger(0) == False
+
+    ## A few days of rewards pay for the claim, the swaps and the deposit
+    chain.sleep(3600 * 24 * 3)
+    chain.mine(1)
+    gas = strategy.sellRewardsGasEstimate()
+    assert strategy.sellRewardsTrigger(GAS_PRICE * gas) == True
+    assert strategy.sellRewardsTrigger(10 ** 18 * gas) == False
+
+    ## Not before there's minRewardsToSell
+    strategy.setMinRewardsToSell(strategy.balanceOfRewards() * 2, {"from": gov})
+    assert strategy.sellRewardsTrigger(0) == False
+
+
+def test_sell_rewards_permissions(mock_strategy, gov, strategist, user):
+    strategy = mock_strategy(False)
+
+    with brownie.reverts():
+        strategy.sellRewards({"from": user})
+    with brownie.reverts():
+        strategy.setMinRewardsToSell(0, {"from": user})
+    with brownie.reverts():
+        strategy.setMaxRewardsToSell(1, {"from": user})
+    with brownie.reverts("dev: maxRewardsToSell"):
+        strategy.setMaxRewardsToSell(0, {"from": gov})
+
+    strategy.sellRewards({"from": strategist})
+    strategy.sellRewards({"from": gov})
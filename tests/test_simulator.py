@@ -0,0 +1,303 @@
+import pytest
+from brownie import chain
+from scripts import simulator
+
+"""
+Pure Python model of the leverage loops
+Differential tests run the same action on chain and in the model and expect the exact same numbers
+"""
+
+
+def assert_model_matches(model, strat, block):
+    assert model.deposited() == strat.deposited(block_identifier=block)
+    assert model.borrowed() == strat.borrowed(block_identifier=block)
+    assert model.can_borrow() == strat.canBorrow(block_identifier=block)
+    assert model.debt_below_health() == strat.debtBelowHealth(block_identifier=block)
+    assert model.can_repay() == strat.canRepay(block_identifier=block)
+
+
+def test_simulator_views_match_strategy(levered_strat):
+    chain.sleep(3600 * 24)
+    chain.mine(1)
+    block = chain.height
+
+    model = simulator.from_strategy(levered_strat, block)
+    assert_model_matches(model, levered_strat, block)
+
+
+def test_simulator_lever_up_matches_strategy(levered_strat, gov):
+    ## Delever one step so there's room to lever up again
+    (_, max_repay) = levered_strat.canRepay()
+    levered_strat.manualWithdrawStepFromAAVE(max_repay, {"from": gov})
+    chain.sleep(3600)
+    chain.mine(1)
+
+    model = simulator.from_strategy(levered_strat)
+    tx = levered_strat.manualLeverUp({"from": gov})
+
+    model.pool.reserve.timestamp = tx.timestamp
+    model.invest()
+    assert_model_matches(model, levered_strat, tx.block_number)
+
+
+def test_simulator_divest_matches_strategy(levered_strat, token, gov):
+    chain.sleep(3600)
+    chain.mine(1)
+
+    model = simulator.from_strategy(levered_strat)
+    tx = levered_strat.manualDivestFromAAVE({"from": gov})
+
+    model.pool.reserve.timestamp = tx.timestamp
+    model.divest_from_aave()
+    assert_model_matches(model, levered_strat, tx.block_number)
+    assert model.want == token.balanceOf(levered_strat)
+    assert model.borrowed() == 0
+
+
+def test_simulator_harvest_and_withdraw():
+    amount = 1_000 * 10 ** 8
+    reserve = simulator.Reserve(
+        price=15 * 10 ** 18,
+        liquidity_rate=simulator.RAY // 100,  ## 1% supply
+        variable_borrow_rate=simulator.RAY * 3 // 100,  ## 3% borrow
+    )
+    strat = simulator.StrategyModel(
+        simulator.LendingPoolModel(reserve), want=amount, total_debt=amount
+    )
+
+    strat.adjust_position(0)
+    ## We lever up to at most ltv, maxIterations stops us before minHealth
+    assert strat.borrowed() <= strat.deposited() * reserve.ltv // simulator.MAX_BPS
+    assert strat.health_factor() > strat.min_health
+    assert strat.pool.calls["borrow"] == strat.max_iterations
+    assert pytest.approx(strat.estimated_total_assets()) == amount
+
+    ## A month of interest then harvest with some rewards
+    reserve.sleep(3600 * 24 * 30)
+    (profit, loss, debt_payment) = strat.harvest(reward_want=10 ** 6)
+    assert debt_payment == 0
+    assert profit + loss > 0
+
+    ## Withdraw frees just what's needed and stays levered
+    (liquidated, loss) = strat.liquidate_position(amount // 10)
+    assert liquidated == amount // 10
+    assert loss == 0
+    assert strat.borrowed() > 0
+    assert strat.health_factor() >= strat.min_health
+    assert strat.estimate_gas() > 0
+
+    ## Withdrawing everything fully unwinds
+    (liquidated, loss) = strat.liquidate_position(amount)
+    assert strat.borrowed() == 0
+
+
+def test_simulator_reverts_like_aave():
+    reserve = simulator.Reserve(price=15 * 10 ** 18)
+    pool = simulator.LendingPoolModel(reserve)
+    pool.deposit(10 ** 8)
+
+    ## Can't borrow above ltv
+    with pytest.raises(simulator.Revert):
+        pool.borrow(10 ** 8 * reserve.ltv // simulator.MAX_BPS + 1)
+
+    pool.borrow(10 ** 8 * reserve.ltv // simulator.MAX_BPS)
+
+    ## Can't withdraw below health 1
+    with pytest.raises(simulator.Revert):
+        pool.withdraw(10 ** 7)
+
+
+def test_simulator_frees_what_it_can_at_health_one():
+    ## Right at liquidation, AAVE allows no step down and no withdraw
+    deposited = 1_000 * 10 ** 8
+    borrowed = deposited * 7_500 // simulator.MAX_BPS
+    strat = simulator.StrategyModel(
+        simulator.LendingPoolModel(
+            simulator.Reserve(price=15 * 10 ** 18),
+            scaled_deposited=deposited,
+            scaled_borrowed=borrowed,
+        ),
+        total_debt=deposited - borrowed,
+    )
+    assert strat.can_repay() == (True, 0)
+
+    ## The rest is reported, instead of reverting on the withdraw
+    assert strat.liquidate_position(10 ** 8) == (0, 10 ** 8)
+    assert strat.deposited() == deposited
+    assert strat.borrowed() == borrowed
+
+
+def test_simulator_flash_loan_mode():
+    amount = 1_000 * 10 ** 8
+    reserve = simulator.Reserve(price=15 * 10 ** 18)
+    strat = simulator.StrategyModel(
+        simulator.LendingPoolModel(reserve),
+        want=amount,
+        total_debt=amount,
+        use_flash_loan=True,
+    )
+
+    ## One flash loan takes us straight to minHealth
+    strat.adjust_position(0)
+    assert strat.pool.calls["flashLoan"] == 1
+    assert strat.pool.calls["borrow"] == 1
+    assert pytest.approx(strat.health_factor(), rel=1e-6) == strat.min_health
+
+    ## And one more unwinds it, paying the premium
+    strat.divest_from_aave()
+    assert strat.pool.calls["flashLoan"] == 2
+    assert strat.borrowed() == 0
+    assert strat.deposited() == 0
+    assert amount - amount // 100 < strat.want < amount
+
+
+def test_simulator_flash_and_loop_targets():
+    def lever_up(use_flash_loan):
+        amount = 1_000 * 10 ** 8
+        strat = simulator.StrategyModel(
+            simulator.LendingPoolModel(simulator.Reserve(price=15 * 10 ** 18)),
+            want=amount,
+            total_debt=amount,
+            max_iterations=50,
+            use_flash_loan=use_flash_loan,
+        )
+        strat.adjust_position(0)
+        return strat
+
+    loop = lever_up(False)
+    flash = lever_up(True)
+    ltv = loop.pool.reserve.ltv
+
+    ## The loop's last step can borrow up to ltv, past minHealth with these params
+    assert loop.can_borrow() == 0
+    assert loop.borrowed() <= loop.deposited() * ltv // simulator.MAX_BPS
+    assert loop.health_factor() < loop.min_health
+
+    ## The flash loan stops at minHealth, and canBorrow says there's nothing left
+    assert flash.can_borrow() == 0
+    assert pytest.approx(flash.health_factor(), rel=1e-6) == flash.min_health
+    assert flash.borrowed() < loop.borrowed()
+
+
+def test_simulator_repays_health_drift():
+    amount = 1_000 * 10 ** 8
+    reserve = simulator.Reserve(
+        price=15 * 10 ** 18,
+        liquidity_rate=simulator.RAY * 2 // 1000,
+        variable_borrow_rate=simulator.RAY * 15 // 1000,
+    )
+    strat = simulator.StrategyModel(
+        simulator.LendingPoolModel(reserve),
+        want=amount,
+        total_debt=amount,
+        max_iterations=30,
+    )
+    strat.adjust_position(0)
+    assert strat.drift_to_repay(strat.load_position()) == 0
+
+    ## A year of interest pushes the debt past ltv, one withdraw and repay fixes it
+    reserve.sleep(3600 * 24 * 365)
+    assert strat.drift_to_repay(strat.load_position()) > 0
+
+    strat.pool.calls.clear()
+    strat.adjust_position(0)
+    assert strat.pool.calls["repay"] == 1
+    assert strat.pool.calls["borrow"] == 0
+    assert strat.drift_to_repay(strat.load_position()) == 0
+    assert strat.borrowed() <= strat.deposited() * reserve.ltv // simulator.MAX_BPS
+
+
+def test_simulator_keeps_drift_debt_without_loss():
+    amount = 1_000 * 10 ** 8
+    reserve = simulator.Reserve(
+        price=15 * 10 ** 18,
+        liquidity_rate=simulator.RAY * 2 // 1000,
+        variable_borrow_rate=simulator.RAY * 15 // 1000,
+    )
+    strat = simulator.StrategyModel(
+        simulator.LendingPoolModel(reserve),
+        want=amount,
+        total_debt=amount,
+        max_iterations=30,
+    )
+    strat.adjust_position(0)
+    reserve.sleep(3600 * 24 * 365)
+    position = strat.load_position()
+    assert (
+        strat._debt_below_health(
+            position.deposited, position.borrowed, position.ltv, strat.health_factor(),
+        )
+        > strat.want
+    )
+
+    ## Nothing earned to repay it with, adjustPosition steps it down, nothing is lost
+    (profit, loss, debt_payment) = strat.harvest()
+    assert loss == 0
+    assert strat.drift_to_repay(strat.load_position()) == 0
+
+
+def test_simulator_relevers_without_deposit():
+    amount = 1_000 * 10 ** 8
+    strat = simulator.StrategyModel(
+        simulator.LendingPoolModel(simulator.Reserve(price=15 * 10 ** 18)),
+        want=amount,
+        total_debt=amount,
+    )
+    strat.adjust_position(0)
+    assert strat.want == 0
+    assert strat.can_borrow() > 0
+
+    ## Tend with nothing to deposit still levers up to the target
+    strat.pool.calls.clear()
+    strat.adjust_position(0)
+    assert strat.pool.calls["deposit"] == strat.pool.calls["borrow"] > 0
+
+    ## Unless the vault wants funds back
+    strat.min_health = 10 ** 18
+    strat.pool.calls.clear()
+    strat.adjust_position(1)
+    assert strat.pool.calls["borrow"] == 0
+
+
+def test_simulator_health_band_saves_pool_calls():
+    def week(**band):
+        amount = 1_000 * 10 ** 8
+        reserve = simulator.Reserve(
+            price=15 * 10 ** 18,
+            liquidity_rate=simulator.RAY * 2 // 100,
+            variable_borrow_rate=simulator.RAY * 15 // 100,
+        )
+        strat = simulator.StrategyModel(
+            simulator.LendingPoolModel(reserve),
+            want=amount,
+            total_debt=amount,
+            max_iterations=30,
+            **band,
+        )
+        strat.adjust_position(0)
+        strat.pool.calls.clear()
+
+        ## Tend every 6 hours, with some want coming in each time
+        for _ in range(4 * 7):
+            reserve.sleep(3600 * 6)
+            strat.want += 5 * 10 ** 8
+            strat.adjust_position(0)
+        return strat
+
+    always_max = week()
+    band = week(lower_health=1_080 * 10 ** 15, upper_health=1_120 * 10 ** 15)
+
+    calls = lambda strat: sum(
+        strat.pool.calls[call] for call in ("borrow", "withdraw", "repay")
+    )
+    assert calls(band) * 3 < calls(always_max)
+    assert 1_080 * 10 ** 15 <= band.health_factor() <= 1_120 * 10 ** 15
+
+    ## Leaving the band goes straight to the middle, as far as ltv lets each borrow
+    position = band.load_position()
+    band.upper_health = band.health_factor() - 1
+    band.lower_health = band.upper_health - 40 * 10 ** 15
+    band.pool.calls.clear()
+    band.invest(position)
+    assert band.pool.calls["borrow"] <= 3
+    assert abs(band.health_factor() - band.target_health()) < 10 ** 15
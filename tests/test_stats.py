@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+from brownie import chain
+from scripts import stats
+
+"""
+Reporting on several strategies at once, see scripts/stats.py
+"""
+
+
+def harvested(mock_strategy, gov, count):
+    strategies = [mock_strategy(False) for _ in range(count)]
+    chain.sleep(1)
+    for strat in strategies:
+        strat.harvest({"from": gov})
+    chain.mine(1)
+    return strategies
+
+
+def test_stats_ndjson(mock_strategy, gov):
+    strategies = harvested(mock_strategy, gov, 3)
+    out = io.StringIO()
+    stats.report([strat.address for strat in strategies], "ndjson", out)
+
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    ## One row per strategy, in order, all at the same block
+    assert [row["address"] for row in rows] == [strat.address for strat in strategies]
+    assert len({row["block"] for row in rows}) == 1
+    for (row, strat) in zip(rows, strategies):
+        assert row["deposited"] == strat.deposited(block_identifier=row["block"])
+        assert row["borrowed"] == strat.borrowed(block_identifier=row["block"])
+        assert row["health_factor"] > 1
+
+    ## Split in batches, same rows
+    batched = stats.read_strategies(
+        [strat.address for strat in strategies], rows[0]["block"], batch_size=2
+    )
+    assert [row["borrowed"] for row in batched] == [row["borrowed"] for row in rows]
+
+
+def test_stats_csv_and_json(mock_strategy, gov):
+    strategies = harvested(mock_strategy, gov, 2)
+    addresses = [strat.address for strat in strategies]
+    block = chain.height
+
+    csv_out = io.StringIO()
+    stats.report(addresses, "csv", csv_out, block)
+    json_out = io.StringIO()
+    stats.report(addresses, "json", json_out, block)
+
+    csv_rows = list(csv.DictReader(io.StringIO(csv_out.getvalue())))
+    json_rows = json.loads(json_out.getvalue())
+    assert list(csv_rows[0]) == stats.FIELDS
+    assert [row["address"] for row in csv_rows] == addresses
+    assert [int(row["borrowed"]) for row in csv_rows] == [
+        row["borrowed"] for row in json_rows
+    ]
+
+
+def test_stats_text(mock_strategy, gov):
+    (strategy,) = harvested(mock_strategy, gov, 1)
+    out = io.StringIO()
+    stats.report([strategy.address], "text", out)
+
+    lines = out.getvalue().splitlines()
+    assert lines[lines.index("Total borrowed") + 1] == str(strategy.borrowed())
@@ -0,0 +1,67 @@
+from brownie import chain, config
+
+"""
+Tend only moves leverage: levers up to the target, or repays what drifted past ltv
+No rewards, no report to the vault
+Runs against the local mock lending pool
+"""
+
+
+def vault_of(pm, strategy):
+    return pm(config["dependencies"][0]).Vault.at(strategy.vault())
+
+
+def test_tend_relevers_without_new_funds(pm, mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    harvest = strategy.harvest({"from": gov})
+
+    ## A lower minHealth leaves room to lever up, with no idle want at all
+    strategy.setMinHealth(1_050_000_000_000_000_000, {"from": gov})
+    assert mocks.want.balanceOf(strategy) == 0
+    assert strategy.canBorrow() > 0
+
+    vault = vault_of(pm, strategy)
+    last_report = vault.strategies(strategy)["lastReport"]
+    chain.sleep(3600)
+    borrowed = strategy.borrowed()
+    rewards = strategy.balanceOfRewards()
+    tx = strategy.tend({"from": gov})
+
+    assert strategy.borrowed() > borrowed
+    assert tx.events["LeveredUp"]["iterations"] > 0
+    ## Leverage only
+    assert "Harvested" not in tx.events
+    assert "RewardsSold" not in tx.events
+    assert vault.strategies(strategy)["lastReport"] == last_report
+    assert strategy.balanceOfRewards() >= rewards
+    assert tx.gas_used < harvest.gas_used
+
+
+def test_tend_does_nothing_at_target(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    while strategy.canBorrow() > 0:
+        strategy.manualLeverUp({"from": gov})
+
+    borrowed = strategy.borrowed()
+    tx = strategy.tend({"from": gov})
+    assert "LeveredUp" not in tx.events
+    assert "LeveredDown" not in tx.events
+    assert strategy.borrowed() >= borrowed
+
+
+def test_tend_keeps_leverage_while_vault_wants_funds(pm, mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    strategy.setMinHealth(1_050_000_000_000_000_000, {"from": gov})
+
+    vault = vault_of(pm, strategy)
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    assert vault.debtOutstanding(strategy) > 0
+
+    ## Not levering up funds the next harvest has to give back
+    tx = strategy.tend({"from": gov})
+    assert "LeveredUp" not in tx.events
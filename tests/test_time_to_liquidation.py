@@ -0,0 +1,69 @@
+import math
+import time
+
+import pytest
+from scripts import time_to_liquidation as ttl
+
+"""
+Monte Carlo time to liquidation, see scripts/time_to_liquidation.py
+Pure Python, no chain needed
+"""
+
+DAY = 24 * 3600
+
+
+def test_fixed_rates_match_closed_form():
+    ## Health 75 / 74 eroded by 10% a year compounded per second
+    sim = ttl.simulate(
+        100, 74, 7_500, 0.10, 0.0, years=2, paths=5, step=3600, volatility=0
+    )
+    expected = math.log(75 / 74) / math.log1p(0.10 / ttl.SECONDS_PER_YEAR)
+
+    assert len(set(sim.time_to_liquidation)) == 1
+    assert expected <= sim.time_to_liquidation[0] < expected + 3600
+    assert sim.liquidation_probability() == 1
+
+
+def test_supply_interest_delays_liquidation():
+    without = ttl.simulate(100, 74, 7_500, 0.10, 0.0, paths=5, volatility=0)
+    ## Supply interest only counts on the deposit, 100 / 74 more than the debt
+    with_supply = ttl.simulate(100, 74, 7_500, 0.10, 0.05, paths=5, volatility=0)
+    assert with_supply.percentile(50) > without.percentile(50)
+
+    ## Supply at the borrow rate, health never drops
+    even = ttl.simulate(100, 74, 7_500, 0.10, 0.10, paths=5, volatility=0)
+    assert even.liquidation_probability() == 0
+    assert even.percentile(50) == math.inf
+
+
+def test_health_at_horizons():
+    sim = ttl.simulate(
+        100,
+        70,
+        7_500,
+        0.03,
+        0.01,
+        paths=1_000,
+        horizons=[0, ttl.SECONDS_PER_YEAR],
+        seed=42,
+    )
+    assert sim.health[0] == pytest.approx(75 / 70)
+    ## Rates move, so does health, but on average it drops
+    assert sim.health[ttl.SECONDS_PER_YEAR].std() > 0
+    assert sim.health[ttl.SECONDS_PER_YEAR].mean() < 75 / 70
+
+
+def test_from_account_uses_the_real_threshold():
+    account_data = [0, 0, 0, 6_500, 0, 0]
+    reserve_data = [0, 0, 0, 0, ttl.RAY // 10, 0]
+
+    ## 100 * 65% < 70, already liquidatable
+    sim = ttl.from_account(100, 70, account_data, reserve_data, paths=10)
+    assert sim.liquidation_probability(0) == 1
+
+
+def test_ten_thousand_paths_two_years_under_a_second():
+    start = time.perf_counter()
+    sim = ttl.simulate(3_287, 2_287, 7_500, 0.015, 0.002, years=2, paths=10_000)
+    assert time.perf_counter() - start < 1
+    assert len(sim.time_to_liquidation) == 10_000
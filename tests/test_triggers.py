@@ -0,0 +1,102 @@
+from brownie import chain
+
+"""
+harvestTrigger takes the cost of a plain harvest and scales it to harvestGasEstimate
+tendTrigger takes the whole call cost, keepers price it from tendGasEstimate
+Runs against the local mock lending pool
+"""
+
+GAS_PRICE = 10 * 10 ** 9
+HARVEST_GAS = 250_000  ## Strategy.HARVEST_GAS
+
+
+def harvest_cost(gas_price=GAS_PRICE):
+    return gas_price * HARVEST_GAS
+
+
+def tend_cost(strategy, gas_price=GAS_PRICE):
+    return gas_price * strategy.tendGasEstimate()
+
+
+def test_harvest_trigger_with_credit(mock_strategy):
+    strategy = mock_strategy(False)
+
+    ## Nothing is invested yet, the harvest will lever up the whole credit
+    assert strategy.harvestTrigger(0) == True
+    assert strategy.harvestTrigger(harvest_cost()) == True
+    ## Unless gas costs more than the deposit itself
+    assert strategy.harvestTrigger(harvest_cost(10 ** 18)) == False
+
+
+def test_harvest_trigger_waits_for_rewards(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+    ## The default maxReportDelay would harvest before rewards add up
+    strategy.setMaxReportDelay(3600 * 24 * 7, {"from": gov})
+
+    ## Rewards of an hour don't pay for the claim and the swaps
+    chain.sleep(3600)
+    chain.mine(1)
+    assert strategy.harvestTrigger(harvest_cost()) == False
+    ## Scaled to the path, the claim and the swaps cost more than a plain harvest
+    assert strategy.harvestGasEstimate() > HARVEST_GAS
+
+    ## A few days in they do, well before maxReportDelay
+    chain.sleep(3600 * 24 * 3)
+    chain.mine(1)
+    assert strategy.harvestTrigger(harvest_cost()) == True
+    assert strategy.harvestTrigger(harvest_cost(100 * GAS_PRICE)) == False
+
+    ## Rewards under minRewardsToSell aren't sold, so they don't count
+    rewards = strategy.balanceOfRewards()
+    strategy.setMinRewardsToSell(rewards * 2, {"from": gov})
+    assert strategy.harvestTrigger(harvest_cost()) == False
+    strategy.setMinRewardsToSell(0, {"from": gov})
+
+    ## And maxReportDelay harvests whatever the gas
+    chain.sleep(strategy.maxReportDelay())
+    chain.mine(1)
+    assert strategy.harvestTrigger(harvest_cost(100 * GAS_PRICE)) == True
+
+
+def test_tend_trigger_on_room_to_lever_up(mock_strategy, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    ## Delever one step, tend puts it back to work
+    (_, max_repay) = strategy.canRepay()
+    strategy.manualWithdrawStepFromAAVE(max_repay, {"from": gov})
+    assert strategy.canBorrow() > 0
+
+    assert strategy.tendTrigger(tend_cost(strategy)) == True
+    assert strategy.tendTrigger(tend_cost(strategy, 10 ** 18)) == False
+
+    borrowed_before = strategy.borrowed()
+    strategy.tend({"from": gov})
+    assert strategy.borrowed() > borrowed_before
+
+
+def test_tend_trigger_on_health_drift(mock_strategy, mocks, gov):
+    strategy = mock_strategy(False)
+    chain.sleep(1)
+    strategy.harvest({"from": gov})
+
+    ## Lever all the way to ltv
+    while strategy.canBorrow() > 0:
+        strategy.manualLeverUp({"from": gov})
+    assert strategy.tendTrigger(0) == False
+
+    ## A year of interest pushes the debt past ltv, tend whatever the gas
+    chain.sleep(3600 * 24 * 365)
+    chain.mine(1)
+    assert strategy.debtBelowHealth() > 0
+    assert strategy.tendTrigger(tend_cost(strategy, 10 ** 18)) == True
+
+    health_before = mocks.pool.getUserAccountData(strategy)[5]
+    strategy.tend({"from": gov})
+
+    ## Back at ltv in one step, without levering up again
+    assert mocks.pool.getUserAccountData(strategy)[5] > health_before
+    assert strategy.tendTrigger(0) == False